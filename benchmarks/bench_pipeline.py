@@ -0,0 +1,235 @@
+"""Benchmark the ingest -> aggregate -> predict -> render pipeline stage by stage
+
+Each scale tiles the sample export into a larger file (every copy gets its
+own client names), or with --synthetic generates scale x 100,000 rows, then
+times every stage separately and writes the timings to a JSON file so runs
+can be compared over time. Runs fully offline::
+
+    python benchmarks/bench_pipeline.py --scales 1 10 50
+    python benchmarks/bench_pipeline.py --synthetic --scales 1 10 100
+    python benchmarks/bench_pipeline.py --compare benchmarks/results/pipeline-20241024-120000.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bsr import charts  # noqa: E402
+from bsr.aggregate import client_sla, daily_sla, jobs_for_account, summarize_jobs, worst_clients  # noqa: E402
+from bsr.capacity import capacity_summary  # noqa: E402
+from bsr.compact import compact_jobs  # noqa: E402
+from bsr.config import DEFAULT_MIN_HOST_JOBS, RAW_EXPORT_FILE  # noqa: E402
+from bsr.cube import build_cube, failure_pareto  # noqa: E402
+from bsr.ingest import load_jobs, read_bur_export  # noqa: E402
+from bsr.predict import predict_month_end_sla  # noqa: E402
+from bsr.synthetic import generate_export  # noqa: E402
+from bsr.timeseries import MAX_CHART_POINTS, hourly_series, job_series  # noqa: E402
+
+DEFAULT_SCALES = [1, 10, 50]
+DEFAULT_REPEAT = 3
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+WORST_COUNT = 60
+SYNTHETIC_ROWS_PER_SCALE = 100_000
+SYNTHETIC_ROWS_PER_HOST = 50
+
+
+def scaled_export(source, scale, path):
+    """Write the source export tiled scale times, each copy with its own client names"""
+    raw = pd.read_csv(source, dtype=str, keep_default_na=False)
+    copies = [raw]
+    for i in range(1, scale):
+        copy = raw.copy()
+        # Prefix rather than suffix so the FQDN and backup-interface rules keep the copies distinct
+        copy["Client"] = f"r{i}-" + copy["Client"]
+        copies.append(copy)
+    pd.concat(copies, ignore_index=True).to_csv(path, index=False)
+    return path
+
+
+def timed(function, repeat):
+    """Run a function repeat times and return its last result and the timing summary"""
+    seconds = []
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - started)
+    return result, {"min": min(seconds), "median": statistics.median(seconds), "repeat": repeat}
+
+
+def figure_payload(*figures):
+    """Serialize figures the way they are sent to the browser and return the total bytes"""
+    return sum(len(figure.to_json()) for figure in figures)
+
+
+def overview_figures(daily):
+    return figure_payload(charts.create_sla_trend_chart(daily))
+
+
+def trends_figures(daily, series, current_sla):
+    hourly = hourly_series(series)
+    return figure_payload(
+        charts.create_daily_outcome_chart(daily),
+        charts.create_throughput_chart(hourly, MAX_CHART_POINTS),
+        charts.create_duration_chart(hourly, MAX_CHART_POINTS),
+        charts.create_throughput_chart(series, MAX_CHART_POINTS),
+        charts.create_duration_chart(series, MAX_CHART_POINTS),
+        charts.create_historical_sla_chart(pd.DataFrame({"Month_Name": ["Oct 2024"], "SLA": [current_sla]})),
+    )
+
+
+def host_figures(worst_hosts):
+    table = charts.host_status_table(worst_hosts, "Client Name")
+    return figure_payload(charts.create_risk_distribution_chart(table["Risk Level"]))
+
+
+def train_model(jobs, account):
+    """Train the account model used by the prediction stage, or None with too little history"""
+    from bsr.training import train_account
+
+    try:
+        model, scaler, _ = train_account(jobs, account)
+    except ValueError:
+        return None
+    return model, scaler
+
+
+def synthetic_export(scale, path, seed=0):
+    """Write a synthetic export with scale x SYNTHETIC_ROWS_PER_SCALE rows"""
+    rows = scale * SYNTHETIC_ROWS_PER_SCALE
+    generate_export(path, rows=rows, hosts=max(rows // SYNTHETIC_ROWS_PER_HOST, 1), seed=seed)
+    return path
+
+
+def run_scale(source, scale, work_dir, repeat):
+    """Time every pipeline stage on the source export tiled scale times, or on synthetic data"""
+    path = os.path.join(work_dir, f"export-x{scale}.csv")
+    if source is None:
+        synthetic_export(scale, path)
+    else:
+        scaled_export(source, scale, path)
+    cache_dir = os.path.join(work_dir, f"cache-x{scale}")
+    stages = {}
+
+    _, stages["load_csv"] = timed(lambda: read_bur_export(path), repeat)
+    _, stages["load_cold"] = timed(lambda: load_jobs(path, tempfile.mkdtemp(dir=work_dir)), repeat)
+    load_jobs(path, cache_dir)
+    jobs, stages["load_columnar"] = timed(lambda: load_jobs(path, cache_dir), repeat)
+    _, stages["compact"] = timed(lambda: compact_jobs(jobs), repeat)
+    daily, stages["aggregate_daily"] = timed(lambda: daily_sla(jobs), repeat)
+    client_data, stages["aggregate_client"] = timed(lambda: client_sla(jobs), repeat)
+    worst_hosts, stages["worst_hosts"] = timed(
+        lambda: worst_clients(client_data, WORST_COUNT, DEFAULT_MIN_HOST_JOBS), repeat)
+    _, stages["capacity"] = timed(lambda: capacity_summary(jobs), repeat)
+    cube, stages["cube_build"] = timed(lambda: build_cube(jobs), repeat)
+
+    # Prediction and figures run for the largest account, as the dashboard does per account
+    account = jobs["Customer"].value_counts().index[0]
+    account_jobs = jobs_for_account(jobs, account)
+    summary = summarize_jobs(account_jobs)
+    trained = train_model(account_jobs, account)
+    if trained is not None:
+        model, scaler = trained
+        _, stages["predict"] = timed(
+            lambda: predict_month_end_sla(summary["daily_data"], summary["days_remaining"], model, scaler), repeat)
+
+    account_cube = cube[cube["Customer"] == account]
+    _, stages["cube_pareto"] = timed(lambda: failure_pareto(account_cube, "Policy"), repeat)
+    series, stages["job_series"] = timed(lambda: job_series(account_jobs), repeat)
+    payloads = {}
+    payloads["overview"], stages["figures_overview"] = timed(lambda: overview_figures(summary["daily_data"]), repeat)
+    payloads["trends"], stages["figures_trends"] = timed(
+        lambda: trends_figures(summary["daily_data"], series, summary["current_sla"]), repeat)
+    payloads["hosts"], stages["figures_hosts"] = timed(lambda: host_figures(worst_hosts), repeat)
+
+    return {
+        "scale": scale,
+        "rows": len(jobs),
+        "clients": int(jobs["Client"].nunique()),
+        "file_mb": os.path.getsize(path) / 1024 ** 2,
+        "stages": stages,
+        "figure_bytes": payloads,
+    }
+
+
+def environment():
+    """Describe the machine and library versions a run was made with"""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+    }
+
+
+def compare(current, baseline):
+    """Print the median time of every stage relative to a baseline run"""
+    baseline_scales = {entry["scale"]: entry for entry in baseline["scales"]}
+    for entry in current["scales"]:
+        base = baseline_scales.get(entry["scale"])
+        if base is None:
+            continue
+        print(f"\nscale x{entry['scale']} vs {baseline['created']}")
+        for stage, timing in entry["stages"].items():
+            if stage in base["stages"]:
+                ratio = timing["median"] / base["stages"][stage]["median"]
+                print(f"  {stage:<18} {timing['median'] * 1000:10.1f} ms  {ratio:6.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time each stage of the BSR pipeline at several data scales")
+    parser.add_argument("--source", default=RAW_EXPORT_FILE, help="BUR SLA REPORT CSV file to scale up")
+    parser.add_argument("--synthetic", action="store_true", help="Benchmark generated data instead of the source")
+    parser.add_argument("--scales", type=int, nargs="+", default=DEFAULT_SCALES)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--output", help="JSON results file (default: benchmarks/results/pipeline-<time>.json)")
+    parser.add_argument("--compare", help="Earlier JSON results file to compare against")
+    args = parser.parse_args(argv)
+
+    created = datetime.now()
+    source = None if args.synthetic else args.source
+    report = {
+        "created": created.isoformat(timespec="seconds"),
+        "environment": environment(),
+        "source": "synthetic" if source is None else os.path.basename(source),
+        "scales": [],
+    }
+    with tempfile.TemporaryDirectory(prefix="bsr-bench-") as work_dir:
+        for scale in args.scales:
+            entry = run_scale(source, scale, work_dir, args.repeat)
+            report["scales"].append(entry)
+            print(f"x{scale}: {entry['rows']} rows, {entry['clients']} clients")
+            for stage, timing in entry["stages"].items():
+                print(f"  {stage:<18} {timing['median'] * 1000:10.1f} ms")
+
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{created:%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(report, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
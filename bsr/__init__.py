@@ -0,0 +1 @@
+"""Data loading and processing for the BSR Prediction Dashboard"""
@@ -0,0 +1,6 @@
+"""Run the metrics CLI with ``python -m bsr``"""
+import sys
+
+from .cli import main
+
+sys.exit(main())
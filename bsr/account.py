@@ -0,0 +1,243 @@
+"""UI-free loading of everything the dashboard shows for one account"""
+import os
+
+import pandas as pd
+
+from .aggregate import calculate_required_sla, client_sla, worst_clients
+from .cache import dataset_cache, file_fingerprint
+from .capacity import capacity_summary
+from .compact import compact_jobs, memory_report
+from .config import (
+    BACKUP_WINDOW_HOURS, COMPACT_JOBS, DEFAULT_MIN_HOST_JOBS, DEFAULT_RESULTS_DIR, DEFAULT_TARGET_SLA, RAW_EXPORT_FILE,
+    RESULTS_FILE_MAPPING
+)
+from .cube import cube_path, empty_cube, load_cube
+from .forecast import DEFAULT_TRIALS, simulate_month_end
+from .history import account_monthly, load_monthly
+from .incremental import ingest_export, load_daily_store, month_to_date, store_path
+from .ingest import DEFAULT_CACHE_DIR
+from .predict import latest_version, predict_account
+from .profiling import stage
+from .query import distinct_values, job_store_dir, read_account_jobs
+from .results import latest_results_file, read_results
+from .sketch import empty_sketches, load_sketches, sketch_path
+from .timeseries import SERIES_COLUMNS, job_series
+
+
+def results_file_for(account, results_dir=DEFAULT_RESULTS_DIR):
+    """Return the account's latest batch results file, falling back to the static mapping"""
+    return latest_results_file(account, results_dir) or RESULTS_FILE_MAPPING.get(account)
+
+
+def job_store_fingerprint(store_dir=DEFAULT_CACHE_DIR):
+    """Return a key that changes whenever ingestion rewrites job files"""
+    # Ingestion rewrites the daily store whenever it rewrites job files, except when first creating the job store
+    return (file_fingerprint(store_path(store_dir)), os.path.isdir(job_store_dir(store_dir)))
+
+
+def account_month_jobs(account, store_dir=DEFAULT_CACHE_DIR):
+    """Return an account's jobs of its latest stored month, read from its own job files and kept compact"""
+    def load():
+        store = load_daily_store(store_dir)
+        days = store.loc[store["Customer"] == account, "Backup Day"]
+        if days.empty:
+            return None
+        with stage("file load") as record:
+            jobs = read_account_jobs(account, days.max().replace(day=1), store_dir)
+            record["rows"] = 0 if jobs is None else len(jobs)
+        if COMPACT_JOBS and jobs is not None:
+            with stage("compact", rows=len(jobs)):
+                jobs = compact_jobs(jobs)
+        return jobs
+
+    return dataset_cache().get_or_load(
+        ('account_month_jobs', job_store_fingerprint(store_dir), account, COMPACT_JOBS), load
+    )
+
+
+def cached_distinct_values(column, store_dir=DEFAULT_CACHE_DIR):
+    """Return the distinct values of a job store column, rescanned only after ingestion rewrites the store"""
+    return dataset_cache().get_or_load(
+        ('distinct_values', job_store_fingerprint(store_dir), column), lambda: distinct_values(column, store_dir)
+    )
+
+
+def read_account_data(account, file_path, raw_export=RAW_EXPORT_FILE):
+    """Read the results file and the account's stored jobs and aggregate them"""
+    # Read the results file from system
+    with stage("metric extraction") as record:
+        results = read_results(file_path)
+        record["rows"] = len(results['hosts'])
+    metrics = results['metrics']
+    current_sla = metrics['current_sla']
+    days_processed = metrics['days_processed']
+    days_remaining = metrics['days_remaining']
+    predicted_sla = metrics['predicted_sla']
+
+    # Worst performing hosts reported in the results file
+    worst_hosts = results['hosts']
+    daily_data = pd.DataFrame(columns=['Backup Date', 'SLA', 'Total_Jobs'])
+    client_data = None
+    series = pd.DataFrame(columns=SERIES_COLUMNS)
+    monthly_history = None
+    capacity = None
+    cube = empty_cube()
+    sketches = empty_sketches()
+    job_memory = None
+
+    # Derive SLA, daily trend and worst hosts from the stores when the account has stored jobs
+    if raw_export and os.path.exists(raw_export):
+        # Month-to-date figures come from the per-day store, which only re-aggregates changed days
+        def load_store():
+            with stage("daily store ingest"):
+                return ingest_export(raw_export)[0]
+
+        daily_store = dataset_cache().get_or_load(('daily_store', file_fingerprint(raw_export)), load_store)
+        month_jobs = account_month_jobs(account)
+        if month_jobs is not None and len(month_jobs):
+            job_memory = memory_report(month_jobs)
+            with stage("aggregation", rows=len(month_jobs)):
+                summary = month_to_date(daily_store, account)
+                current_sla = summary['current_sla']
+                days_processed = summary['days_processed']
+                days_remaining = summary['days_remaining']
+                daily_data = summary['daily_data']
+                client_data = client_sla(month_jobs)
+            with stage("job series", rows=len(month_jobs)):
+                series = job_series(month_jobs)
+            capacity = account_capacity(account)
+
+            # Predict in-process when a trained model exists for the account
+            with stage("prediction", rows=len(daily_data)):
+                model_prediction = predict_account(account, daily_data, days_remaining)
+            if model_prediction is not None:
+                predicted_sla = model_prediction
+
+        # Monthly rollups per region, filled by the ingest above
+        with stage("history rollup"):
+            monthly_history = account_monthly(load_monthly(DEFAULT_CACHE_DIR), account)
+        # The account's cube rows and sketches, so dashboard views never read the stores themselves
+        cube = account_cube(account)
+        sketches = account_sketches(account)
+
+    return {
+        'results': results,
+        'current_sla': current_sla,
+        'predicted_sla': predicted_sla,
+        'days_processed': days_processed,
+        'days_remaining': days_remaining,
+        'daily_data': daily_data,
+        'client_data': client_data,
+        'job_series': series,
+        'monthly_history': monthly_history,
+        'worst_clients': worst_hosts,
+        'capacity': capacity,
+        'cube': cube,
+        'sketches': sketches,
+        'job_memory': job_memory
+    }
+
+
+def account_data_key(account, file_path, raw_export=RAW_EXPORT_FILE):
+    """Return the cache key identifying the current version of an account's data"""
+    return (account, file_fingerprint(file_path), file_fingerprint(raw_export), latest_version(account))
+
+
+def account_capacity(account, store_dir=DEFAULT_CACHE_DIR, window_hours=BACKUP_WINDOW_HOURS):
+    """Return the month-to-date backup window capacity analysis of an account, or None without stored jobs"""
+    def analyse():
+        month_jobs = account_month_jobs(account, store_dir)
+        if month_jobs is None or not len(month_jobs):
+            return None
+        with stage("capacity", rows=len(month_jobs)):
+            return capacity_summary(month_jobs, window_hours)
+
+    return dataset_cache().get_or_load(
+        ('capacity', job_store_fingerprint(store_dir), account, window_hours), analyse
+    )
+
+
+def account_sketches(account, store_dir=DEFAULT_CACHE_DIR):
+    """Return an account's stored daily sketches, reloaded whenever ingestion rewrites them"""
+    fingerprint = file_fingerprint(sketch_path(store_dir))
+    sketches = dataset_cache().get_or_load(('sketches', fingerprint), lambda: load_sketches(store_dir))
+    return dataset_cache().get_or_load(
+        ('account_sketches', fingerprint, account),
+        lambda: sketches[sketches["Customer"] == account].reset_index(drop=True)
+    )
+
+
+def account_cube(account, store_dir=DEFAULT_CACHE_DIR):
+    """Return an account's rows of the rollup cube, reloaded whenever ingestion rewrites it"""
+    fingerprint = file_fingerprint(cube_path(store_dir))
+    cube = dataset_cache().get_or_load(('cube', fingerprint), lambda: load_cube(store_dir))
+    return dataset_cache().get_or_load(
+        ('account_cube', fingerprint, account),
+        lambda: cube[cube["Customer"] == account].reset_index(drop=True)
+    )
+
+
+def account_forecast(data_key, daily_data, days_remaining, target_sla=DEFAULT_TARGET_SLA):
+    """Return the Monte Carlo month-end forecast for an account, simulated once per data version and target"""
+    def simulate():
+        with stage("forecast", rows=DEFAULT_TRIALS):
+            return simulate_month_end(daily_data, days_remaining, target_sla)
+
+    return dataset_cache().get_or_load(('forecast', data_key, target_sla), simulate)
+
+
+def load_account(account, worst_count=5, min_jobs=DEFAULT_MIN_HOST_JOBS, target_sla=DEFAULT_TARGET_SLA,
+                 raw_export=RAW_EXPORT_FILE, results_dir=DEFAULT_RESULTS_DIR):
+    """Return the processed dashboard data for an account, reusing cached aggregates when unchanged"""
+    file_path = results_file_for(account, results_dir)
+    if file_path is None:
+        raise FileNotFoundError(f"No results file configured for {account}")
+
+    # Reuse the aggregated account data while no source file or model has changed
+    data_key = account_data_key(account, file_path, raw_export)
+    account_data = dataset_cache().get_or_load(
+        ('account', data_key),
+        lambda: read_account_data(account, file_path, raw_export)
+    )
+
+    return account_view(account, file_path, data_key, account_data, worst_count, min_jobs, target_sla)
+
+
+def account_view(account, file_path, data_key, account_data, worst_count=5, min_jobs=DEFAULT_MIN_HOST_JOBS,
+                 target_sla=DEFAULT_TARGET_SLA):
+    """Return the dashboard data of an account from its aggregated data and the display settings"""
+    worst_hosts = account_data['worst_clients']
+    if account_data['client_data'] is not None:
+        def select_worst():
+            with stage("worst hosts", rows=len(account_data['client_data'])):
+                return worst_clients(account_data['client_data'], worst_count, min_jobs)
+
+        worst_hosts = dataset_cache().get_or_load(('worst_hosts', data_key, worst_count, min_jobs), select_worst)
+
+    return {
+        'account': account,
+        'file_path': file_path,
+        'data_key': data_key,
+        'results': account_data['results'],
+        'current_sla': account_data['current_sla'],
+        'predicted_sla': account_data['predicted_sla'],
+        'days_processed': account_data['days_processed'],
+        'days_remaining': account_data['days_remaining'],
+        'required_sla': calculate_required_sla(
+            account_data['current_sla'], target_sla,
+            account_data['days_processed'], account_data['days_remaining']
+        ),
+        'target_sla': target_sla,
+        'forecast': account_forecast(
+            data_key, account_data['daily_data'], account_data['days_remaining'], target_sla
+        ),
+        'daily_data': account_data['daily_data'],
+        'job_series': account_data['job_series'],
+        'client_data': account_data['client_data'],
+        'monthly_history': account_data['monthly_history'],
+        'worst_clients': worst_hosts,
+        'capacity': account_data['capacity'],
+        'cube': account_data['cube'],
+        'sketches': account_data['sketches'],
+        'job_memory': account_data['job_memory']
+    }
@@ -0,0 +1,180 @@
+"""Vectorized SLA aggregation over raw BUR job records"""
+import calendar
+
+import numpy as np
+import pandas as pd
+
+# Job outcomes counted towards SLA; "Progress" jobs are still running and excluded
+OUTCOMES = ["Success", "Partial", "Failure"]
+# Stands in for a missing dimension value, so those jobs form their own group instead of being dropped
+MISSING_LABEL = "(missing)"
+
+
+def _column_codes(values):
+    """Return integer codes and the sorted unique labels for a single column"""
+    if isinstance(values.dtype, pd.CategoricalDtype):
+        values = values.cat.remove_unused_categories()
+        return values.cat.codes.to_numpy(), values.cat.categories
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes, pd.Index(uniques)
+
+
+def fill_missing_keys(jobs, columns):
+    """Return the jobs with missing values in the given key columns replaced by MISSING_LABEL"""
+    filled = {}
+    for column in columns:
+        values = jobs[column]
+        if not values.isna().any():
+            continue
+        if isinstance(values.dtype, pd.CategoricalDtype) and MISSING_LABEL not in values.cat.categories:
+            values = values.cat.add_categories([MISSING_LABEL])
+        filled[column] = values.fillna(MISSING_LABEL)
+    return jobs.assign(**filled) if filled else jobs
+
+
+def group_codes(jobs, by):
+    """Return integer group codes and the group labels for one or more key columns"""
+    if isinstance(by, str):
+        codes, labels = _column_codes(jobs[by])
+        return codes, labels.rename(by)
+
+    # Combine per-column codes into one key, then compact it to the groups present
+    combined = np.zeros(len(jobs), dtype="int64")
+    valid = np.ones(len(jobs), dtype=bool)
+    levels = []
+    for column in by:
+        codes, labels = _column_codes(jobs[column])
+        combined = combined * len(labels) + codes
+        valid &= codes >= 0
+        levels.append(labels)
+    present, compact = np.unique(combined[valid], return_inverse=True)
+    codes = np.full(len(jobs), -1, dtype="int64")
+    codes[valid] = compact
+
+    # Decode the combined keys back into one label array per column
+    label_codes = []
+    for labels in reversed(levels):
+        label_codes.append(present % len(labels))
+        present = present // len(labels)
+    label_codes.reverse()
+    index = pd.MultiIndex.from_arrays(
+        [labels.take(c) for labels, c in zip(levels, label_codes)], names=list(by))
+    return codes, index
+
+
+def outcome_counts(jobs, by, groups=None):
+    """Count Success/Partial/Failure jobs per group using bincount over group codes"""
+    # Callers that also need the group codes can pass the group_codes result in
+    codes, labels = groups if groups is not None else group_codes(jobs, by)
+    # Look each status category up once; statuses that are not outcomes (e.g. "Progress") get -1
+    status = jobs["Status"].astype("category")
+    lookup = np.append(pd.Index(OUTCOMES).get_indexer(status.cat.categories), -1)
+    outcome_codes = lookup[status.cat.codes.to_numpy()]
+    n_groups = len(labels)
+    valid = (codes >= 0) & (outcome_codes >= 0)
+
+    # One bincount over (group, outcome) pairs instead of a pass per outcome
+    flat = codes[valid].astype("int64") * len(OUTCOMES) + outcome_codes[valid]
+    counts = np.bincount(flat, minlength=n_groups * len(OUTCOMES)).reshape(n_groups, len(OUTCOMES))
+
+    table = pd.DataFrame(counts, columns=OUTCOMES, index=labels)
+    table["Total_Jobs"] = table[OUTCOMES].sum(axis=1)
+    return table
+
+
+def add_rates(table):
+    """Add Success/Partial/Failure rates and SLA (%) columns to an outcome count table"""
+    total = table["Total_Jobs"].to_numpy(dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for outcome in OUTCOMES:
+            table[f"{outcome}_Rate"] = np.where(total > 0, table[outcome] / total, np.nan)
+    table["SLA"] = table["Success_Rate"] * 100
+    return table
+
+
+def daily_sla(jobs):
+    """Return per-day job counts, outcome rates and SLA"""
+    table = add_rates(outcome_counts(jobs, "Backup Day"))
+    table = table[table["Total_Jobs"] > 0].reset_index()
+    return table.rename(columns={"Backup Day": "Backup Date"})
+
+
+def client_sla(jobs, client_column="Client"):
+    """Return per-client job counts, outcome rates and SLA"""
+    table = add_rates(outcome_counts(jobs, client_column))
+    return table[table["Total_Jobs"] > 0].reset_index()
+
+
+def month_progress(backup_days):
+    """Return (days_processed, days_remaining) for the latest month covered by the backup days"""
+    backup_days = pd.to_datetime(pd.Series(backup_days)).dropna()
+    if backup_days.empty:
+        return 0, 0
+    latest = backup_days.max()
+    in_month = backup_days[(backup_days.dt.year == latest.year) & (backup_days.dt.month == latest.month)]
+    days_in_month = calendar.monthrange(latest.year, latest.month)[1]
+    return int(in_month.dt.normalize().nunique()), int(days_in_month - latest.day)
+
+
+def current_month_jobs(jobs):
+    """Return the job records falling in the latest month present in the data"""
+    latest = jobs["Backup Day"].max()
+    if pd.isna(latest):
+        return jobs
+    return jobs[jobs["Backup Day"] >= latest.replace(day=1)]
+
+
+def summarize_jobs(jobs):
+    """Aggregate raw job records into the month-to-date metrics used by the dashboard"""
+    jobs = current_month_jobs(jobs)
+    summary = summarize_daily(daily_sla(jobs))
+    summary["client_data"] = client_sla(jobs)
+    return summary
+
+
+def summarize_daily(daily):
+    """Derive month-to-date metrics from a per-day outcome table"""
+    total = daily["Total_Jobs"].sum()
+    successes = daily["Success"].sum()
+    days_processed, days_remaining = month_progress(daily["Backup Date"])
+    return {
+        "current_sla": float(successes / total * 100) if total else float("nan"),
+        "total_jobs": int(total),
+        "days_processed": days_processed,
+        "days_remaining": days_remaining,
+        "daily_data": daily,
+    }
+
+
+def jobs_for_account(jobs, account):
+    """Return the job records belonging to one customer account"""
+    return jobs[jobs["Customer"] == account]
+
+
+def worst_clients(client_data, count, min_jobs=1):
+    """Return the lowest-SLA clients, busiest first among equal SLA, without sorting every client"""
+    total_jobs = client_data["Total_Jobs"].to_numpy()
+    eligible = (total_jobs >= min_jobs).nonzero()[0]
+    sla = client_data["SLA"].to_numpy(dtype="float64")[eligible]
+    if count <= 0 or len(eligible) == 0:
+        return client_data.iloc[[]].reset_index(drop=True)
+
+    # Partial selection keeps only clients at or below the count-th lowest SLA, ties included
+    candidates = np.arange(len(eligible))
+    if count < len(eligible):
+        threshold = np.partition(sla, count - 1)[count - 1]
+        candidates = (sla <= threshold).nonzero()[0]
+
+    # Order the few candidates by SLA, then by job volume descending
+    order = np.lexsort((-total_jobs[eligible][candidates], sla[candidates]))[:count]
+    return client_data.iloc[eligible[candidates[order]]].reset_index(drop=True)
+
+
+def calculate_required_sla(current_sla, target_sla, days_processed, days_remaining):
+    """Calculate required SLA for remaining days to meet target"""
+    if days_remaining <= 0:
+        # The month is complete, no further days can change the outcome
+        return 0.0
+    total_days = days_processed + days_remaining
+    required_success_rate = (target_sla * total_days - current_sla * days_processed) / days_remaining
+    return min(max(required_success_rate, 0), 100)
@@ -0,0 +1,145 @@
+"""Headless batch run producing every account's results in parallel
+
+Run as a batch job, e.g.::
+
+    python -m bsr.batch "BUR SLA REPORT_Oct24.csv" --output-dir results
+"""
+import argparse
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import pandas as pd
+
+from .aggregate import calculate_required_sla, summarize_jobs, worst_clients
+from .config import ACCOUNTS, DEFAULT_MIN_HOST_JOBS, DEFAULT_RESULTS_DIR, DEFAULT_TARGET_SLA
+from .ingest import load_jobs
+from .predict import DEFAULT_MODEL_DIR, account_slug, latest_version, load_metadata, load_model, predict_month_end_sla
+from .results import build_results, results_filename, write_results
+
+DEFAULT_WORST_COUNT = 5
+
+
+def load_exports(paths):
+    """Load and concatenate several raw exports, keeping text columns categorical"""
+    frames = [load_jobs(path) for path in paths]
+    if len(frames) == 1:
+        return frames[0]
+    jobs = pd.concat(frames, ignore_index=True)
+    # Concatenating differing categories falls back to object columns
+    for column in frames[0].select_dtypes("category").columns:
+        jobs[column] = jobs[column].astype("category")
+    return jobs
+
+
+def partition_by_customer(jobs, partition_dir):
+    """Write one Parquet partition per Customer and return {account: path}"""
+    partitions = {}
+    for account, account_jobs in jobs.groupby("Customer", observed=True, sort=True):
+        path = os.path.join(partition_dir, f"{account_slug(account)}.parquet")
+        account_jobs.to_parquet(path, index=False)
+        partitions[account] = path
+    return partitions
+
+
+def account_prediction(account, jobs, summary, model_dir, train_missing):
+    """Predict month-end SLA with the account's model, training one first if allowed and needed"""
+    version = latest_version(account, model_dir)
+    if version is None and train_missing:
+        from .training import save_artifacts, train_account
+        try:
+            model, scaler, metadata = train_account(jobs, account)
+        except ValueError:
+            return None, None
+        version = save_artifacts(account, model, scaler, metadata, model_dir)
+    if version is None:
+        return None, None
+    model, scaler = load_model(account, version, model_dir)
+    predicted = predict_month_end_sla(summary["daily_data"], summary["days_remaining"], model, scaler)
+    return predicted, load_metadata(account, version, model_dir)
+
+
+def process_account(account, partition_path, output_dir, model_dir=DEFAULT_MODEL_DIR,
+                    worst_count=DEFAULT_WORST_COUNT, target_sla=DEFAULT_TARGET_SLA, train_missing=True,
+                    min_jobs=DEFAULT_MIN_HOST_JOBS):
+    """Aggregate, predict and write the results file for one account"""
+    started = time.perf_counter()
+    jobs = pd.read_parquet(partition_path)
+    summary = summarize_jobs(jobs)
+
+    predicted_sla, metadata = account_prediction(account, jobs, summary, model_dir, train_missing)
+    if predicted_sla is None:
+        # Too little history for a model, report the month-to-date SLA as the forecast
+        predicted_sla = summary["current_sla"]
+    required_sla = calculate_required_sla(
+        summary["current_sla"], target_sla, summary["days_processed"], summary["days_remaining"])
+    worst_hosts = worst_clients(summary["client_data"], worst_count, min_jobs)
+
+    run_date = summary["daily_data"]["Backup Date"].max()
+    results = build_results(
+        account, run_date, summary, predicted_sla, required_sla, target_sla, metadata, worst_hosts)
+    path = write_results(results, os.path.join(output_dir, results_filename(account, run_date)))
+    return {"account": account, "path": path, "jobs": len(jobs), "seconds": time.perf_counter() - started}
+
+
+def run_batch(export_paths, output_dir=DEFAULT_RESULTS_DIR, model_dir=DEFAULT_MODEL_DIR, accounts=None,
+              max_workers=None, worst_count=DEFAULT_WORST_COUNT, target_sla=DEFAULT_TARGET_SLA, train_missing=True,
+              min_jobs=DEFAULT_MIN_HOST_JOBS):
+    """Produce a results file per account from raw exports, one account per worker process"""
+    jobs = load_exports(export_paths)
+    reports = []
+    with tempfile.TemporaryDirectory(prefix="bsr-partitions-") as partition_dir:
+        partitions = partition_by_customer(jobs, partition_dir)
+        del jobs
+        if accounts:
+            partitions = {account: path for account, path in partitions.items() if account in accounts}
+
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = {
+                pool.submit(process_account, account, path, output_dir, model_dir, worst_count, target_sla,
+                            train_missing, min_jobs): account
+                for account, path in partitions.items()
+            }
+            for future in as_completed(futures):
+                try:
+                    reports.append(future.result())
+                except Exception as e:
+                    reports.append({"account": futures[future], "error": str(e)})
+
+    # Configured accounts missing from every export are reported rather than silently skipped
+    for account in accounts or ACCOUNTS:
+        if account not in partitions:
+            reports.append({"account": account, "error": "no jobs in the exports"})
+    return reports
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compute every account's SLA results from raw BUR exports")
+    parser.add_argument("exports", nargs="+", help="BUR SLA REPORT CSV files")
+    parser.add_argument("--output-dir", default=DEFAULT_RESULTS_DIR)
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--accounts", nargs="*", help="Accounts to process (default: every Customer in the exports)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--worst-count", type=int, default=DEFAULT_WORST_COUNT)
+    parser.add_argument("--min-jobs", type=int, default=DEFAULT_MIN_HOST_JOBS,
+                        help="Minimum jobs for a client to be listed as a worst host")
+    parser.add_argument("--target-sla", type=float, default=DEFAULT_TARGET_SLA)
+    parser.add_argument("--no-train", action="store_true", help="Do not train models for accounts without one")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    reports = run_batch(
+        args.exports, args.output_dir, args.model_dir, args.accounts, args.workers,
+        args.worst_count, args.target_sla, not args.no_train, args.min_jobs
+    )
+    for report in sorted(reports, key=lambda r: r["account"]):
+        if "error" in report:
+            print(f"{report['account']}: {report['error']}")
+        else:
+            print(f"{report['account']}: {report['jobs']} jobs -> {report['path']} ({report['seconds']:.2f}s)")
+    print(f"Finished in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,127 @@
+"""Process-wide LRU caching of loaded datasets and derived figures"""
+import os
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Memory budgets, overridable for deployments
+DEFAULT_DATASET_BUDGET_MB = int(os.environ.get("BSR_DATASET_CACHE_MB", "1024"))
+DEFAULT_FIGURE_BUDGET_MB = int(os.environ.get("BSR_FIGURE_CACHE_MB", "128"))
+
+
+def file_fingerprint(path):
+    """Return a cheap fingerprint of a file that changes whenever it is rewritten"""
+    if path is None or not os.path.exists(path):
+        return (path, None, None)
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def tmp_path_for(path):
+    """Return a temporary path next to a file that no other writer shares, to write and then os.replace"""
+    return f"{path}.{os.getpid()}-{uuid.uuid4().hex[:8]}.tmp"
+
+
+def estimate_size(obj):
+    """Estimate the in-memory size of a cached value in bytes"""
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep=True)
+        return int(usage.sum()) if isinstance(obj, pd.DataFrame) else int(usage)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(estimate_size(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return sys.getsizeof(obj) + sum(estimate_size(v) for v in obj)
+    if hasattr(obj, "to_plotly_json"):
+        return estimate_size(obj.to_plotly_json())
+    return sys.getsizeof(obj)
+
+
+class LRUCache:
+    """Thread-safe LRU cache evicting least recently used entries beyond a memory budget"""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._sizes = {}
+        self._lock = threading.RLock()
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        """Return a cached value and mark it as recently used"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key, value):
+        """Store a value, evicting older entries until the budget is respected"""
+        size = estimate_size(value)
+        with self._lock:
+            if key in self._entries:
+                self.current_bytes -= self._sizes.pop(key)
+                del self._entries[key]
+            self._entries[key] = value
+            self._sizes[key] = size
+            self.current_bytes += size
+            # Always keep the newest entry, even if it alone exceeds the budget
+            while self.current_bytes > self.max_bytes and len(self._entries) > 1:
+                old_key, _ = self._entries.popitem(last=False)
+                self.current_bytes -= self._sizes.pop(old_key)
+        return value
+
+    def get_or_load(self, key, loader):
+        """Return the cached value for key, calling loader() on a miss"""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = self.put(key, loader())
+        return value
+
+    def clear(self):
+        """Drop every cached entry"""
+        with self._lock:
+            self._entries.clear()
+            self._sizes.clear()
+            self.current_bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return entry count, memory use and hit/miss counters"""
+        return {
+            "entries": len(self._entries),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def dataset_cache():
+    """Return the dataset cache shared by every session in this process"""
+    return _dataset_cache
+
+
+def figure_cache():
+    """Return the figure cache shared by every session in this process"""
+    return _figure_cache
+
+
+_dataset_cache = LRUCache(DEFAULT_DATASET_BUDGET_MB * 1024 * 1024)
+_figure_cache = LRUCache(DEFAULT_FIGURE_BUDGET_MB * 1024 * 1024)
@@ -0,0 +1,148 @@
+"""Backup window capacity: job durations, concurrent jobs per media server and window overruns
+
+Every job is an interval from its Start Date to its End Date. The running-jobs
+timeline of each media server comes from one sweep over the sorted start and
+end events (one O(n log n) value sort, the rest is linear), so it stays
+fast on tens of millions of intervals.
+
+A job overruns when it ends after its backup window closes. The window opens
+at the scheduled time in the policy name (e.g. ``Daily_30day_10PM_EST_VSS``),
+taken on the occurrence nearest the job's start so exports in another time
+zone still line up, and lasts ``BACKUP_WINDOW_HOURS``. Jobs of policies
+without a time in their name get a window opening at their own start.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from .compact import job_timestamps
+from .config import BACKUP_WINDOW_HOURS
+
+SCHEDULE_PATTERN = re.compile(r"(?<![0-9])(\d{1,2})(?::?(\d{2}))?\s*([AP]M)", re.IGNORECASE)
+DAY_SECONDS = 24 * 3600
+
+
+def schedule_hour(policy):
+    """Return the scheduled start hour of day in a policy name, or NaN when it has none"""
+    match = SCHEDULE_PATTERN.search(str(policy))
+    if match is None:
+        return np.nan
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2) or 0), match.group(3).upper()
+    if not 1 <= hour <= 12 or minute > 59:
+        return np.nan
+    return hour % 12 + (12 if meridiem == "PM" else 0) + minute / 60
+
+
+def job_intervals(jobs):
+    """Return one row per job with a valid start and end, as epoch seconds, sorted by server and start"""
+    start = job_timestamps(jobs, "Start Date").to_numpy().astype("datetime64[s]")
+    end = job_timestamps(jobs, "End Date").to_numpy().astype("datetime64[s]")
+    valid = ~np.isnat(start) & ~np.isnat(end) & (end >= start)
+    start_seconds = start[valid].astype("int64")
+    end_seconds = end[valid].astype("int64")
+    intervals = pd.DataFrame({
+        "Server": jobs["Server"].astype("category").array[valid],
+        "Policy": jobs["Policy"].astype("category").array[valid],
+        "Client": jobs["Client"].astype("category").array[valid],
+        "Start": start_seconds,
+        "End": end_seconds,
+        "Duration_Min": (end_seconds - start_seconds) / 60,
+    })
+    return intervals.sort_values(["Server", "Start"], kind="stable", ignore_index=True)
+
+
+def running_jobs(intervals):
+    """Return each media server's number of running jobs after every change, by sweep-line"""
+    servers = intervals["Server"].cat.codes.to_numpy().astype("int64")
+    if not len(intervals):
+        return pd.DataFrame({"Server": intervals["Server"][:0], "Time": pd.Series(dtype="datetime64[s]"),
+                             "Running": pd.Series(dtype="int64")})
+    origin = int(intervals["Start"].min())
+    starts = intervals["Start"].to_numpy() - origin
+    ends = intervals["End"].to_numpy() - origin
+
+    # One sortable key per event: server, then time, then ends before starts so touching jobs do not overlap.
+    # The low bit tells starts from ends, so a plain value sort is enough and no argsort is needed.
+    span = int(ends.max()) + 1
+    keys = np.sort(np.concatenate([(servers * span + ends) * 2, (servers * span + starts) * 2 + 1]))
+    # Every server's events sum to zero, so one running total across servers restarts at 0 for each
+    running = np.cumsum((keys & 1) * 2 - 1)
+
+    # Keep the final count at each (server, time)
+    event_times = keys // 2
+    last = np.append(event_times[1:] != event_times[:-1], True)
+    event_times = event_times[last]
+    categories = intervals["Server"].cat.categories
+    return pd.DataFrame({
+        "Server": pd.Categorical.from_codes(event_times // span, categories),
+        "Time": (event_times % span + origin).astype("datetime64[s]"),
+        "Running": running[last],
+    })
+
+
+def peak_concurrency(timeline):
+    """Return each media server's peak number of running jobs and when it was first reached"""
+    if timeline.empty:
+        return pd.DataFrame(columns=["Server", "Peak_Running", "Peak_Time"])
+    peaks = timeline.loc[timeline.groupby("Server", observed=True)["Running"].idxmax()]
+    peaks = peaks.rename(columns={"Running": "Peak_Running", "Time": "Peak_Time"})
+    return peaks[["Server", "Peak_Running", "Peak_Time"]].sort_values(
+        "Peak_Running", ascending=False, ignore_index=True)
+
+
+def window_overruns(intervals, window_hours=BACKUP_WINDOW_HOURS):
+    """Add each job's backup window close time and how many minutes it ran past it"""
+    policies = intervals["Policy"].cat
+    hours = np.append(np.array([schedule_hour(policy) for policy in policies.categories], dtype="float64"), np.nan)
+    scheduled = hours[policies.codes.to_numpy()]
+
+    starts = intervals["Start"].to_numpy()
+    # Scheduled opening on the day of the start, moved to the occurrence nearest the start
+    opens = starts - starts % DAY_SECONDS + np.nan_to_num(scheduled * 3600).astype("int64")
+    opens += np.round((starts - opens) / DAY_SECONDS).astype("int64") * DAY_SECONDS
+    opens = np.where(np.isnan(scheduled), starts, opens)
+
+    closes = opens + int(window_hours * 3600)
+    overrun = np.maximum(intervals["End"].to_numpy() - closes, 0) / 60
+    return intervals.assign(
+        Scheduled=~np.isnan(scheduled),
+        Window_Close=closes.astype("datetime64[s]"),
+        Overrun_Min=overrun,
+        Overrun=overrun > 0,
+    )
+
+
+def duration_stats(intervals, by=("Server", "Policy")):
+    """Return job duration percentiles and overrun counts per group"""
+    grouped = intervals.groupby(list(by), observed=True, sort=True)
+    durations = grouped["Duration_Min"]
+    stats = pd.DataFrame({
+        "Jobs": durations.size(),
+        "Median_Min": durations.median(),
+        "P90_Min": durations.quantile(0.9),
+        "P99_Min": durations.quantile(0.99),
+        "Max_Min": durations.max(),
+    })
+    if "Overrun" in intervals:
+        stats["Overruns"] = grouped["Overrun"].sum()
+        stats["Overrun_Rate"] = stats["Overruns"] / stats["Jobs"] * 100
+    return stats.reset_index()
+
+
+def capacity_summary(jobs, window_hours=BACKUP_WINDOW_HOURS):
+    """Return the running-jobs timeline, peaks, duration statistics and overrunning jobs of a job table"""
+    intervals = window_overruns(job_intervals(jobs), window_hours)
+    timeline = running_jobs(intervals)
+    overruns = intervals[intervals["Overrun"]].sort_values("Overrun_Min", ascending=False, ignore_index=True)
+    return {
+        "jobs": len(intervals),
+        "window_hours": window_hours,
+        "timeline": timeline,
+        "peaks": peak_concurrency(timeline),
+        "durations": duration_stats(intervals),
+        "overruns": overruns.assign(
+            Start=overruns["Start"].astype("datetime64[s]"),
+            End=overruns["End"].astype("datetime64[s]"),
+        ),
+    }
@@ -0,0 +1,337 @@
+"""Plotly figures and derived tables for the dashboard tabs, independent of Streamlit"""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from .timeseries import WEBGL_THRESHOLD, downsample
+
+
+# Update the plotly chart themes to be compatible with both light and dark modes
+def update_plot_theme(fig):
+    """Update plot theme for compatibility with both light and dark modes"""
+    fig.update_layout(
+        plot_bgcolor='rgba(0,0,0,0)',
+        paper_bgcolor='rgba(0,0,0,0)',
+        font_color='var(--text-color)',
+        xaxis=dict(
+            gridcolor='rgba(128,128,128,0.2)',
+            zerolinecolor='rgba(128,128,128,0.2)'
+        ),
+        yaxis=dict(
+            gridcolor='rgba(128,128,128,0.2)',
+            zerolinecolor='rgba(128,128,128,0.2)'
+        )
+    )
+    return fig
+
+
+def create_sla_trend_chart(daily_data):
+    """Create SLA trend chart"""
+    # Ensure 'Backup Date' is in datetime format without modifying the cached frame
+    backup_dates = pd.to_datetime(daily_data['Backup Date'])
+
+    # Create the figure
+    fig = px.line(
+        daily_data.assign(**{'Backup Date': backup_dates}),
+        x='Backup Date',
+        y='SLA',
+        title='Daily Success Rate 🏆'
+    )
+
+    fig.update_layout(
+        xaxis_title="Date",
+        yaxis_title="SLA (%)",
+        showlegend=True,
+        height=400,
+        title_font_size=24
+    )
+
+    # Month/day tick labels, letting plotly space them so long ranges do not get a tick per day
+    fig.update_xaxes(
+        tickformat='%b %d',
+        nticks=31,
+        tickangle=45  # Optional: angle the ticks for better readability
+    )
+
+    return fig
+
+
+def create_sla_forecast_chart(cumulative, forecast):
+    """Create month-to-date SLA with the simulated month-end percentile bands"""
+    bands = forecast['bands']
+    fig = go.Figure()
+    # Start the bands at the last observed day so they join the actual line
+    last = cumulative.iloc[-1]
+    dates = pd.concat([pd.Series([last['Backup Date']]), bands['Backup Date']], ignore_index=True)
+    for low, high, opacity in [('P5', 'P95', 0.15), ('P25', 'P75', 0.3)]:
+        fig.add_trace(go.Scatter(
+            x=dates, y=[last['SLA']] + bands[high].tolist(), mode='lines', line=dict(width=0),
+            showlegend=False, hoverinfo='skip'
+        ))
+        fig.add_trace(go.Scatter(
+            x=dates, y=[last['SLA']] + bands[low].tolist(), mode='lines', line=dict(width=0),
+            fill='tonexty', fillcolor=f'rgba(31, 119, 180, {opacity})', name=f'{low[1:]}-{high[1:]}th percentile'
+        ))
+    fig.add_trace(go.Scatter(
+        x=dates, y=[last['SLA']] + bands['P50'].tolist(), mode='lines', line=dict(dash='dash', color='#1f77b4'),
+        name='Median forecast'
+    ))
+    fig.add_trace(go.Scatter(
+        x=cumulative['Backup Date'], y=cumulative['SLA'], mode='lines+markers', line=dict(color='#1f77b4'),
+        name='Month to date'
+    ))
+    fig.add_hline(y=forecast['target_sla'], line_dash='dot', line_color='red', annotation_text='Target')
+    fig.update_layout(
+        title=f"Month-End SLA Forecast ({forecast['trials']:,} simulations)",
+        xaxis_title="Date",
+        yaxis_title="Month-to-date SLA (%)",
+        height=400
+    )
+    fig.update_xaxes(tickformat='%b %d', nticks=31, tickangle=45)
+    return fig
+
+
+def create_daily_outcome_chart(daily_data):
+    """Create stacked daily job outcome chart"""
+    fig = go.Figure()
+    for outcome, color in [('Success', 'green'), ('Partial', 'orange'), ('Failure', 'red')]:
+        fig.add_trace(go.Bar(
+            x=daily_data['Backup Date'],
+            y=daily_data[outcome],
+            name=outcome,
+            marker_color=color
+        ))
+    fig.update_layout(
+        barmode='stack',
+        title='Daily Job Outcomes',
+        xaxis_title="Date",
+        yaxis_title="Jobs",
+        height=400
+    )
+    return update_plot_theme(fig)
+
+
+def series_trace(series, column, name, color, mode):
+    """Build a line or marker trace, switching to WebGL for long series"""
+    trace = go.Scattergl if len(series) > WEBGL_THRESHOLD else go.Scatter
+    return trace(
+        x=series['Start Date'],
+        y=series[column],
+        mode=mode,
+        name=name,
+        line=dict(color=color, width=1),
+        marker=dict(color=color, size=3)
+    )
+
+
+def create_throughput_chart(series, max_points):
+    """Create throughput chart, keeping the series shape with LTTB downsampling"""
+    points = downsample(series, 'Start Date', 'KB/Sec', max_points)
+    fig = go.Figure(series_trace(points, 'KB/Sec', 'Throughput', '#5F249F', 'lines'))
+    fig.update_layout(
+        title='Backup Throughput',
+        xaxis_title="Job Start",
+        yaxis_title="KB/Sec",
+        height=400
+    )
+    return update_plot_theme(fig)
+
+
+def create_duration_chart(series, max_points):
+    """Create job duration chart, keeping every spike with min-max downsampling"""
+    # Hourly series chart the longest job of each hour
+    column = 'Max_Duration_Min' if 'Max_Duration_Min' in series else 'Duration_Min'
+    points = downsample(series, 'Start Date', column, max_points, method='minmax')
+    mode = 'lines' if column == 'Max_Duration_Min' else 'markers'
+    fig = go.Figure(series_trace(points, column, 'Duration', '#ED9B33', mode))
+    fig.update_layout(
+        title='Job Duration',
+        xaxis_title="Job Start",
+        yaxis_title="Duration (min)",
+        height=400
+    )
+    return update_plot_theme(fig)
+
+
+def create_historical_sla_chart(monthly):
+    """Create monthly SLA comparison chart from the historical store's monthly rollup"""
+    fig = px.line(
+        monthly,
+        x='Month_Name',
+        y='SLA',
+        markers=True,
+        title='Monthly SLA Comparison'
+    )
+    fig.update_layout(
+        height=400,
+        xaxis_title="Month",
+        yaxis_title="SLA (%)",
+        showlegend=False
+    )
+    return fig
+
+
+def create_ytd_sla_chart(ytd):
+    """Create year-to-date monthly SLA trend chart"""
+    fig = px.line(
+        ytd,
+        x='Month_Name',
+        y='SLA',
+        title='YTD SLA Trend',
+        markers=True
+    )
+    fig.update_layout(xaxis_title="Month", yaxis_title="SLA (%)")
+    return fig
+
+
+def create_regional_sla_chart(regional):
+    """Create per-region SLA bar chart labelled with each region's job count"""
+    fig = px.bar(
+        regional,
+        x='Region',
+        y='SLA',
+        text=regional['Total_Jobs'].map('Jobs: {:,}'.format),
+        title='Regional SLA'
+    )
+    fig.update_layout(yaxis_title="SLA (%)", yaxis_range=[min(90, regional['SLA'].min() - 1), 100])
+    return fig
+
+
+def client_health_summary(client_data):
+    """Count clients that are healthy, at risk or critical by their month-to-date SLA"""
+    sla = client_data['SLA'].to_numpy()
+    return pd.DataFrame({
+        'Status': ['Healthy', 'At Risk', 'Critical'],
+        'Client Count': [int((sla >= 98).sum()), int(((sla >= 95) & (sla < 98)).sum()), int((sla < 95).sum())],
+        'Description': [
+            'Meeting or exceeding SLA targets',
+            'Showing signs of degradation',
+            'Immediate attention required'
+        ]
+    })
+
+
+def create_client_health_chart(health):
+    """Create account health donut chart"""
+    return go.Figure(data=[go.Pie(
+        labels=health['Status'],
+        values=health['Client Count'],
+        hole=0.4,  # Makes it a donut chart
+        textinfo='label+percent',
+        marker=dict(colors=['green', 'yellow', 'orange']),
+    )])
+
+
+def create_concurrency_chart(timeline, peaks, max_points, top=10):
+    """Create the running-jobs timeline of the busiest media servers, keeping peaks with min-max downsampling"""
+    servers = peaks['Server'].head(top).tolist()
+    budget = max(max_points // max(len(servers), 1), 2)
+    fig = go.Figure()
+    for server in servers:
+        points = downsample(timeline[timeline['Server'] == server], 'Time', 'Running', budget, method='minmax')
+        trace = go.Scattergl if len(points) > WEBGL_THRESHOLD else go.Scatter
+        fig.add_trace(trace(x=points['Time'], y=points['Running'], mode='lines', name=str(server),
+                            line=dict(shape='hv', width=1)))
+    fig.update_layout(
+        title='Concurrent Running Jobs per Media Server',
+        xaxis_title="Time",
+        yaxis_title="Running jobs",
+        height=450
+    )
+    return update_plot_theme(fig)
+
+
+def create_duration_distribution_chart(durations, top=15):
+    """Create median, 90th and 99th percentile job durations of the longest running server and policy pairs"""
+    longest = durations.nlargest(top, 'P99_Min').iloc[::-1]
+    labels = longest['Server'].astype(str) + ' / ' + longest['Policy'].astype(str)
+    fig = go.Figure()
+    for column, name, color in [('Median_Min', 'Median', '#5F249F'), ('P90_Min', 'P90', '#ED9B33'),
+                                ('P99_Min', 'P99', '#E74C3C')]:
+        fig.add_trace(go.Bar(y=labels, x=longest[column], name=name, orientation='h', marker_color=color))
+    fig.update_layout(
+        title='Job Duration by Server and Policy',
+        barmode='group',
+        xaxis_title="Duration (min)",
+        height=max(400, 45 * len(longest) + 120)
+    )
+    return update_plot_theme(fig)
+
+
+def create_failure_pareto_chart(pareto, dimension, top=20):
+    """Create a Pareto chart of unsuccessful jobs per dimension value with their cumulative share"""
+    pareto = pareto.head(top)
+    labels = pareto[dimension].astype(str)
+    fig = go.Figure()
+    fig.add_trace(go.Bar(x=labels, y=pareto['Failure'], name='Failure', marker_color='red'))
+    fig.add_trace(go.Bar(x=labels, y=pareto['Partial'], name='Partial', marker_color='orange'))
+    fig.add_trace(go.Scatter(
+        x=labels, y=pareto['Cumulative_Share'], name='Cumulative share', yaxis='y2',
+        mode='lines+markers', line=dict(color='#5F249F')
+    ))
+    fig.update_layout(
+        title=f'Unsuccessful Jobs by {dimension}',
+        barmode='stack',
+        yaxis=dict(title="Unsuccessful jobs"),
+        yaxis2=dict(title="Cumulative share (%)", overlaying='y', side='right', range=[0, 105]),
+        height=450
+    )
+    return update_plot_theme(fig)
+
+
+def create_risk_distribution_chart(risk_levels):
+    """Create host risk distribution pie chart"""
+    risk_dist = risk_levels.value_counts()
+    return px.pie(
+        values=risk_dist.values,
+        names=risk_dist.index,
+        title='Host Risk Distribution'
+    )
+
+
+def host_status_table(hosts, name_column):
+    """Build the host status table with risk levels from the typed host table"""
+    sla = hosts['SLA'].to_numpy()
+    high, medium = sla < 95, sla < 98
+    return pd.DataFrame({
+        name_column: hosts['Client'],
+        'Current SLA': hosts['SLA'].map('{:.2f}%'.format),
+        'Total Jobs': hosts['Total_Jobs'].astype(int),
+        'Status': np.select([high, medium], ['🔴', '🟡'], default='🟢'),
+        'Risk Level': np.select([high, medium], ['High', 'Medium'], default='Low'),
+        'Action Required': np.select([high, medium], ['Immediate', 'Monitor'], default='None')
+    })
+
+
+def daily_sla_stats(daily_data):
+    """Return the average, minimum and maximum daily SLA"""
+    daily_sla = daily_data['SLA'].astype(float)
+    return {'mean': daily_sla.mean(), 'min': daily_sla.min(), 'max': daily_sla.max()}
+
+
+def create_stage_timeline_chart(timings):
+    """Create a flame view of profiled stages, nested stages indented below their parent"""
+    timings = timings.dropna(subset=['seconds']).reset_index(drop=True)
+    # Non-breaking spaces, as plotly trims leading whitespace from tick labels
+    labels = ['\u00a0' * 4 * depth + name for depth, name in zip(timings['depth'], timings['stage'])]
+    palette = px.colors.qualitative.Pastel
+    fig = go.Figure(go.Bar(
+        y=timings.index,
+        x=timings['seconds'] * 1000,
+        base=timings['start'] * 1000,
+        orientation='h',
+        # One color per nesting level, like the rows of a flame graph
+        marker_color=[palette[depth % len(palette)] for depth in timings['depth']],
+        text=[f'{ms:.1f} ms' for ms in timings['seconds'] * 1000],
+        textposition='auto',
+        hovertemplate='%{customdata}<br>start %{base:.1f} ms, %{x:.1f} ms<extra></extra>',
+        customdata=timings['stage']
+    ))
+    fig.update_layout(
+        title='Pipeline Stages',
+        xaxis_title="Time since rerun start (ms)",
+        height=max(250, 28 * len(timings) + 120),
+        yaxis=dict(tickvals=timings.index, ticktext=labels, autorange='reversed')
+    )
+    return update_plot_theme(fig)
@@ -0,0 +1,125 @@
+"""Command-line access to the dashboard's metrics without Streamlit
+
+Print or export what the dashboard shows for one or more accounts, e.g.::
+
+    python -m bsr "Trane Technologies" --worst-count 10
+    python -m bsr --format json --output metrics.json
+"""
+import argparse
+import json
+import sys
+
+from .config import ACCOUNTS, DEFAULT_MIN_HOST_JOBS, DEFAULT_RESULTS_DIR, DEFAULT_TARGET_SLA, RAW_EXPORT_FILE
+
+METRIC_KEYS = ["current_sla", "predicted_sla", "required_sla", "target_sla", "days_processed", "days_remaining"]
+
+
+def account_metrics(processed_data):
+    """Return the JSON-serializable metrics and worst hosts of a processed account"""
+    metrics = {key: processed_data[key] for key in METRIC_KEYS}
+    metrics = {key: (float(value) if key.endswith("_sla") else int(value)) if value is not None else None
+               for key, value in metrics.items()}
+    return {
+        "account": processed_data["account"],
+        "results_file": processed_data["file_path"],
+        **metrics,
+        **forecast_metrics(processed_data["forecast"]),
+        "worst_hosts": processed_data["worst_clients"].to_dict(orient="records"),
+    }
+
+
+def forecast_metrics(forecast):
+    """Return the probability of meeting the target and the month-end percentiles of a forecast"""
+    if forecast is None:
+        return {"p_meet_target": None, "forecast_p5_sla": None, "forecast_p50_sla": None, "forecast_p95_sla": None}
+    percentiles = forecast["percentiles"]
+    return {
+        "p_meet_target": forecast["probability"],
+        "forecast_p5_sla": percentiles[5],
+        "forecast_p50_sla": percentiles[50],
+        "forecast_p95_sla": percentiles[95],
+    }
+
+
+def format_text(report):
+    """Render one account's metrics as a plain-text block"""
+    lines = [report["account"], "-" * len(report["account"])]
+    for key in METRIC_KEYS + list(forecast_metrics(None)):
+        value = report[key]
+        label = key.replace("_", " ").capitalize().replace("sla", "SLA")
+        if value is None:
+            lines.append(f"{label}: n/a")
+        elif key.endswith("_sla"):
+            lines.append(f"{label}: {value:.2f}%")
+        elif key == "p_meet_target":
+            lines.append(f"Chance of meeting target: {value:.1%}")
+        else:
+            lines.append(f"{label}: {value}")
+    lines.append("Worst performing hosts:")
+    for host in report["worst_hosts"]:
+        lines.append(f"  {host['Client']}: SLA {host['SLA']:.2f}%, {host['Total_Jobs']} jobs")
+    return "\n".join(lines)
+
+
+def format_csv(reports):
+    """Render the metrics of several accounts as one CSV row per account"""
+    import pandas as pd
+
+    rows = [{key: value for key, value in report.items() if key != "worst_hosts"} for report in reports]
+    return pd.DataFrame(rows).to_csv(index=False)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print or export the BSR dashboard metrics per account")
+    parser.add_argument("accounts", nargs="*", help="Accounts to report (default: every configured account)")
+    parser.add_argument("--export", default=RAW_EXPORT_FILE, help="Raw BUR SLA REPORT CSV file")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR)
+    parser.add_argument("--worst-count", type=int, default=5)
+    parser.add_argument("--min-jobs", type=int, default=DEFAULT_MIN_HOST_JOBS)
+    parser.add_argument("--target-sla", type=float, default=DEFAULT_TARGET_SLA)
+    parser.add_argument("--format", choices=["text", "json", "csv"], default="text")
+    parser.add_argument("--output", help="Write to this file instead of stdout")
+    parser.add_argument("--profile", action="store_true", help="Print per-stage timings to stderr")
+    parser.add_argument("--prometheus", help="Write per-stage timings to this Prometheus text file")
+    args = parser.parse_args(argv)
+
+    # Imported here so --help does not pay for pandas and the data pipeline
+    from .account import load_account
+    from .profiling import activate, prometheus_text, stage, write_prometheus
+
+    profiler = activate() if args.profile or args.prometheus else None
+    reports = []
+    for account in args.accounts or ACCOUNTS:
+        try:
+            with stage(f"load account {account}"):
+                processed_data = load_account(account, args.worst_count, args.min_jobs, args.target_sla,
+                                              args.export, args.results_dir)
+        except Exception as e:
+            print(f"{account}: {e}", file=sys.stderr)
+            continue
+        reports.append(account_metrics(processed_data))
+
+    if profiler is not None:
+        timings = profiler.table()
+        if args.profile:
+            print(timings.to_string(index=False), file=sys.stderr)
+        if args.prometheus:
+            write_prometheus(args.prometheus, prometheus_text(timings))
+
+    if args.format == "json":
+        output = json.dumps(reports, indent=2)
+    elif args.format == "csv":
+        output = format_csv(reports)
+    else:
+        output = "\n\n".join(format_text(report) for report in reports)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+    return 0 if reports else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
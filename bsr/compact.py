@@ -0,0 +1,88 @@
+"""Compact in-memory job tables so several accounts' months stay resident
+
+Text columns are dictionary-encoded categoricals, floats are float32, counts
+are downcast to the smallest integer type and the Start/End/Expiration Date
+timestamps are uint32 epoch seconds (0 marks a missing timestamp). Use
+``job_timestamps`` to read a timestamp column from either representation.
+
+Compare against a default ``pd.read_csv`` load with::
+
+    python -m bsr.compact "BUR SLA REPORT_Oct24.csv"
+"""
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from .ingest import CATEGORY_COLUMNS, TIMESTAMP_COLUMNS, load_jobs
+
+# Dictionary-encoded in compact mode on top of the text categoricals
+COMPACT_CATEGORY_COLUMNS = CATEGORY_COLUMNS + ["Vendor Status"]
+FLOAT32_COLUMNS = ["Size", "Size Scanned", "Size Transferred", "KB/Sec"]
+COUNT_COLUMNS = ["Nbr Files"]
+EPOCH_DTYPE = "uint32"
+
+
+def to_epoch_seconds(values):
+    """Convert datetimes to uint32 epoch seconds, with 0 for missing values"""
+    values = pd.to_datetime(values)
+    seconds = values.to_numpy(dtype="datetime64[s]").astype("int64")
+    return np.where(values.isna().to_numpy(), 0, seconds).astype(EPOCH_DTYPE)
+
+
+def job_timestamps(jobs, column):
+    """Return a timestamp column as datetimes whether or not the table is compact"""
+    values = jobs[column]
+    if not pd.api.types.is_integer_dtype(values):
+        return values
+    seconds = values.to_numpy().astype("int64")
+    return pd.Series(
+        np.where(seconds > 0, seconds, np.iinfo("int64").min).astype("datetime64[s]"),
+        index=values.index, name=column
+    )
+
+
+def compact_jobs(jobs):
+    """Return a compact copy of a typed job table"""
+    compact = {}
+    for column in jobs.columns:
+        values = jobs[column]
+        if column in COMPACT_CATEGORY_COLUMNS:
+            values = values.astype("category").cat.remove_unused_categories()
+        elif column in FLOAT32_COLUMNS:
+            values = values.astype("float32")
+        elif column in COUNT_COLUMNS:
+            values = pd.to_numeric(values, downcast="unsigned" if values.min() >= 0 else "integer")
+        elif column in TIMESTAMP_COLUMNS:
+            values = pd.Series(to_epoch_seconds(values), index=values.index, name=column)
+        compact[column] = values
+    return pd.DataFrame(compact, index=jobs.index)
+
+
+def memory_report(df):
+    """Return the in-memory size of each column, largest first, with a Total row"""
+    usage = df.memory_usage(deep=True, index=False)
+    report = pd.DataFrame({
+        "dtype": df.dtypes.astype(str),
+        "bytes": usage,
+        "share": usage / usage.sum() * 100,
+    }).sort_values("bytes", ascending=False)
+    report.loc["Total"] = ["", usage.sum(), 100.0]
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report per-column memory of a compact job table")
+    parser.add_argument("export", help="BUR SLA REPORT CSV file")
+    args = parser.parse_args(argv)
+
+    default_bytes = pd.read_csv(args.export).memory_usage(deep=True, index=False).sum()
+    report = memory_report(compact_jobs(load_jobs(args.export)))
+    compact_bytes = report.loc["Total", "bytes"]
+    print(report.to_string(formatters={"bytes": "{:,.0f}".format, "share": "{:.1f}%".format}))
+    print(f"\ndefault read_csv: {default_bytes / 1024 ** 2:.2f} MB, compact: {compact_bytes / 1024 ** 2:.2f} MB "
+          f"({default_bytes / compact_bytes:.1f}x smaller)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Account configuration shared by the dashboard and batch jobs"""
+import os
+
+# Accounts shown in the dashboard; batch runs also pick up any other Customer found in the exports
+ACCOUNTS = ["Trane Technologies", "Ingersoll Rand Company", "Otis", "Xchanging", "CIBC"]
+
+DEFAULT_TARGET_SLA = 99.0
+
+# Clients with fewer jobs are left out of worst-host lists so one-off failures don't crowd them
+DEFAULT_MIN_HOST_JOBS = 5
+MIN_HOST_JOBS_OPTIONS = [1, 5, 10, 25, 50, 100]
+
+# Region of each job, from JSON rules matching the canonical backup server name; unmatched jobs get DEFAULT_REGION
+REGION_RULES_FILE = os.environ.get("BSR_REGION_RULES")
+DEFAULT_REGION = "Global"
+
+# Length of the backup window opening at a policy's scheduled time; jobs still running after it overrun
+BACKUP_WINDOW_HOURS = float(os.environ.get("BSR_BACKUP_WINDOW_HOURS", "8"))
+
+# Directory the batch runner writes per-account results artifacts to
+DEFAULT_RESULTS_DIR = os.environ.get("BSR_RESULTS_DIR", "results")
+
+# Keep cached job tables in the compact in-memory layout (set BSR_COMPACT_JOBS=0 to disable)
+COMPACT_JOBS = os.environ.get("BSR_COMPACT_JOBS", "1") != "0"
+
+# Raw BUR job export used to compute daily and per-client SLA
+RAW_EXPORT_FILE = os.environ.get("BSR_RAW_EXPORT", "BUR SLA REPORT_Oct24.csv")
+
+# Directory watched for new BUR exports; the newest "BUR SLA REPORT*.csv" in it replaces RAW_EXPORT_FILE
+DROP_DIR = os.environ.get("BSR_DROP_DIR")
+
+# Versioned per-account snapshots published by the refresh worker and read by the dashboard
+SNAPSHOT_DIR = os.environ.get("BSR_SNAPSHOT_DIR", "snapshots")
+SNAPSHOT_REFRESH_SECONDS = float(os.environ.get("BSR_SNAPSHOT_REFRESH_SECONDS", "60"))
+# Run the refresh worker as a thread of the dashboard process; set to 0 when `python -m bsr.snapshot` runs instead
+SNAPSHOT_WORKER_THREAD = os.environ.get("BSR_SNAPSHOT_WORKER_THREAD", "1") != "0"
+
+# Define file mapping for each account, used until a batch run has written results for it
+RESULTS_FILE_MAPPING = {
+    "Trane Technologies": "SLA_Prediction_Results_20241009.csv",
+    "Xchanging": "SLA_Prediction_Results_20241024.csv",
+    "Otis": "SLA_Prediction_Results_20241010.csv",
+    "CIBC": "Customer_SLA_Prediction_Results_20241013(1).csv",
+    "Ingersoll Rand Company": "SLA_Prediction_Results_20241009.csv"  # Using default file
+}
@@ -0,0 +1,134 @@
+"""Rollup cube of job outcomes and bytes over Customer x Policy x Product x Job Type x Day
+
+Ingestion materializes one row per combination of the dimensions present in
+the export, holding its Success/Partial/Failure counts and Size and Size
+Transferred totals, in ``cube-v2.parquet`` next to the daily aggregates.
+Slices, rollups and Pareto-of-failure breakdowns are then sums over that small
+table, so they cost the same however many raw jobs sit underneath. Jobs with
+no Policy, Product or Job Type are counted under a "(missing)" member, so the
+cube's totals match the daily aggregates. A missing cube, such as after an
+upgrade to a new cube version, is rebuilt from every day in the job store.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import OUTCOMES, add_rates, fill_missing_keys, group_codes, outcome_counts
+from .cache import tmp_path_for
+from .ingest import DEFAULT_CACHE_DIR
+from .query import stored_partitions
+
+CUBE_DIMENSIONS = ["Customer", "Policy", "Product", "Job Type", "Backup Day"]
+BYTE_MEASURES = ["Size", "Size Transferred"]
+CUBE_MEASURES = OUTCOMES + ["Total_Jobs"] + BYTE_MEASURES
+# Versioned so cubes written before missing members existed are rebuilt
+CUBE_FILE = "cube-v2.parquet"
+# Dimensions offered for slicing and drill-down within one account
+DRILL_DIMENSIONS = ["Policy", "Product", "Job Type"]
+
+
+def cube_path(store_dir=DEFAULT_CACHE_DIR):
+    """Return the path of the rollup cube"""
+    return os.path.join(store_dir, CUBE_FILE)
+
+
+def build_cube(jobs):
+    """Return the cube rows of a job table, one per combination of dimension values present"""
+    jobs = fill_missing_keys(jobs, DRILL_DIMENSIONS)
+    groups = group_codes(jobs, CUBE_DIMENSIONS)
+    counts = outcome_counts(jobs, CUBE_DIMENSIONS, groups)
+    codes, _ = groups
+    valid = codes >= 0
+    for measure in BYTE_MEASURES:
+        values = np.nan_to_num(jobs[measure].to_numpy(dtype="float64")[valid])
+        counts[measure] = np.bincount(codes[valid], weights=values, minlength=len(counts))
+    cube = counts[counts["Total_Jobs"] > 0].reset_index()
+    for column in CUBE_DIMENSIONS:
+        if column != "Backup Day":
+            cube[column] = cube[column].astype(str)
+    return cube[CUBE_DIMENSIONS + CUBE_MEASURES]
+
+
+def empty_cube():
+    """Return a cube with no rows"""
+    columns = {column: pd.Series(dtype="object") for column in CUBE_DIMENSIONS}
+    columns["Backup Day"] = pd.Series(dtype="datetime64[us]")
+    columns.update({measure: pd.Series(dtype="int64") for measure in OUTCOMES + ["Total_Jobs"]})
+    columns.update({measure: pd.Series(dtype="float64") for measure in BYTE_MEASURES})
+    return pd.DataFrame(columns)
+
+
+def load_cube(store_dir=DEFAULT_CACHE_DIR):
+    """Load the persisted rollup cube"""
+    path = cube_path(store_dir)
+    if not os.path.exists(path):
+        return empty_cube()
+    return pd.read_parquet(path)
+
+
+def update_cube(jobs, codes, partitions, changed_ids, store_dir=DEFAULT_CACHE_DIR):
+    """Rebuild the cube rows of changed (account, day) partitions and atomically rewrite the cube"""
+    path = cube_path(store_dir)
+    if os.path.exists(path):
+        cube = load_cube(store_dir)
+    else:
+        # First run with this cube version: rebuild the days earlier exports left in the job store,
+        # then every partition of this export
+        cube = stored_cube(store_dir)
+        changed_ids = np.arange(len(partitions))
+    if not len(changed_ids):
+        return 0
+
+    changed_rows = pd.Series(codes).isin(changed_ids).to_numpy()
+    updates = build_cube(jobs[changed_rows])
+    replaced = partitions.iloc[changed_ids].set_index(["Customer", "Backup Day"]).index
+    keep = ~cube.set_index(["Customer", "Backup Day"]).index.isin(replaced)
+    cube = pd.concat([cube[keep], updates], ignore_index=True)
+
+    os.makedirs(store_dir, exist_ok=True)
+    tmp_path = tmp_path_for(path)
+    cube.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return len(changed_ids)
+
+
+def stored_cube(store_dir=DEFAULT_CACHE_DIR):
+    """Build the cube rows of every partition kept in the job store, one partition at a time"""
+    columns = CUBE_DIMENSIONS + ["Status"] + BYTE_MEASURES
+    frames = [build_cube(part) for part in stored_partitions(columns, store_dir)]
+    return pd.concat(frames, ignore_index=True) if frames else empty_cube()
+
+
+def slice_cube(cube, filters=None, start=None, end=None):
+    """Return the cube rows matching every {dimension: allowed values} filter and backup day range"""
+    mask = np.ones(len(cube), dtype=bool)
+    for column, values in (filters or {}).items():
+        if values:
+            mask &= cube[column].isin(values).to_numpy()
+    if start is not None:
+        mask &= (cube["Backup Day"] >= pd.Timestamp(start)).to_numpy()
+    if end is not None:
+        mask &= (cube["Backup Day"] <= pd.Timestamp(end)).to_numpy()
+    return cube[mask]
+
+
+def rollup(cube, by):
+    """Sum the cube's measures per group of dimensions and add rates and SLA"""
+    by = [by] if isinstance(by, str) else list(by)
+    if not by:
+        table = cube[CUBE_MEASURES].sum().to_frame().T
+    else:
+        table = cube.groupby(by, sort=True)[CUBE_MEASURES].sum()
+    table = table.astype({measure: "int64" for measure in OUTCOMES + ["Total_Jobs"]})
+    return add_rates(table).reset_index(drop=not by)
+
+
+def failure_pareto(cube, by):
+    """Return groups ordered by jobs that did not succeed, with their cumulative share of all of them"""
+    table = rollup(cube, by)
+    table["Unsuccessful"] = table["Total_Jobs"] - table["Success"]
+    table = table[table["Unsuccessful"] > 0].sort_values("Unsuccessful", ascending=False, ignore_index=True)
+    total = table["Unsuccessful"].sum()
+    table["Cumulative_Share"] = table["Unsuccessful"].cumsum() / total * 100 if total else 0.0
+    return table
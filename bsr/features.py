@@ -0,0 +1,57 @@
+"""Daily feature set used by the SLA regressor"""
+import pandas as pd
+
+from .aggregate import daily_sla
+
+FEATURE_COLUMNS = ["day", "month", "day_of_week", "Total_Jobs", "Success_Rate", "Partial_Rate"]
+TARGET_COLUMN = "Next_Day_SLA"
+
+# Trailing window used to project volume and outcome mix onto future days
+TRAILING_DAYS = 7
+
+# Fewer consecutive-day samples than this cannot produce a meaningful model
+MIN_TRAINING_DAYS = 3
+
+
+def calendar_features(dates):
+    """Return the calendar feature columns for a series of dates"""
+    dates = pd.to_datetime(pd.Series(dates)).reset_index(drop=True)
+    return pd.DataFrame({
+        "day": dates.dt.day,
+        "month": dates.dt.month,
+        "day_of_week": dates.dt.dayofweek,
+    })
+
+
+def daily_features(daily):
+    """Build the feature frame from a per-day outcome table"""
+    daily = daily.sort_values("Backup Date").reset_index(drop=True)
+    features = calendar_features(daily["Backup Date"])
+    for column in ["Total_Jobs", "Success_Rate", "Partial_Rate"]:
+        features[column] = daily[column].to_numpy(dtype="float64")
+    features["Backup Date"] = daily["Backup Date"].to_numpy()
+    features["SLA"] = daily["SLA"].to_numpy(dtype="float64")
+    return features
+
+
+def training_frame(jobs):
+    """Build features and the following day's SLA as the target from raw jobs"""
+    features = daily_features(daily_sla(jobs))
+    next_day = features["Backup Date"].shift(-1)
+    consecutive = (next_day - features["Backup Date"]) == pd.Timedelta(days=1)
+    features[TARGET_COLUMN] = features["SLA"].shift(-1)
+    return features[consecutive].reset_index(drop=True)
+
+
+def future_features(daily, days_remaining):
+    """Project features for the remaining days of the month from the trailing window"""
+    daily = daily.sort_values("Backup Date")
+    recent = daily.tail(TRAILING_DAYS)
+    last_day = pd.to_datetime(daily["Backup Date"]).max()
+    dates = pd.date_range(last_day + pd.Timedelta(days=1), periods=days_remaining, freq="D")
+    features = calendar_features(dates)
+    features["Total_Jobs"] = float(recent["Total_Jobs"].mean())
+    features["Success_Rate"] = float(recent["Success_Rate"].mean())
+    features["Partial_Rate"] = float(recent["Partial_Rate"].mean())
+    features["Backup Date"] = dates
+    return features
@@ -0,0 +1,267 @@
+"""Month-partitioned historical SLA store filled by ingestion
+
+Per-day outcome counts are kept as one Parquet file per account, region and
+month under ``history/daily/account=<slug>/month=<YYYY-MM>/version=<id>/region=<slug>/``.
+A month is rewritten into a new version directory and published by atomically
+replacing the month's LATEST file, so readers and later ingests never see a
+half-written month. Each ingest also refreshes ``history/monthly.parquet``, a
+small rollup with one row per account, region and month. The monthly
+comparison, YTD trend and regional breakdown queries are answered from that
+rollup alone.
+
+The hash of the region rules is stored with the history. When the rules
+change, every day still in the job store is re-partitioned with the new rules.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import OUTCOMES, add_rates, outcome_counts
+from .cache import tmp_path_for
+from .config import DEFAULT_REGION, REGION_RULES_FILE
+from .predict import account_slug
+from .query import stored_partitions
+
+HISTORY_DIR = "history"
+INDEX_FILE = "partitions.parquet"
+MONTHLY_FILE = "monthly.parquet"
+RULES_FILE = "region_rules.json"
+LATEST_FILE = "LATEST"
+DAILY_COLUMNS = ["Customer", "Region", "Backup Day"] + OUTCOMES + ["Total_Jobs"]
+MONTHLY_KEYS = ["Customer", "Region", "Month"]
+MONTHLY_COLUMNS = MONTHLY_KEYS + OUTCOMES + ["Total_Jobs", "Days"]
+
+
+def history_dir(store_dir):
+    """Return the historical store directory inside a store directory"""
+    return os.path.join(store_dir, HISTORY_DIR)
+
+
+def month_dir(store_dir, account, month):
+    """Return the directory holding every version of one account's daily rows for one month"""
+    return os.path.join(history_dir(store_dir), "daily", f"account={account_slug(account)}", f"month={month}")
+
+
+def partition_dir(store_dir, account, region, month, version):
+    """Return the directory holding one account's daily rows for one region and month in one version"""
+    return os.path.join(month_dir(store_dir, account, month), f"version={version}", f"region={account_slug(region)}")
+
+
+def load_region_rules(path=REGION_RULES_FILE):
+    """Load region rules: a JSON list of {"account" (optional), "server" regex, "region"} objects"""
+    if not path or not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return json.load(f)
+
+
+def rules_hash(rules):
+    """Return a content hash of region rules"""
+    return hashlib.sha256(json.dumps(rules, sort_keys=True).encode()).hexdigest()
+
+
+def assign_regions(jobs, rules=None):
+    """Return each job's region from the first rule matching its account and backup server"""
+    rules = load_region_rules() if rules is None else rules
+    servers = jobs["Server"].astype("category")
+    categories = servers.cat.categories.astype(str)
+    codes = servers.cat.codes.to_numpy()
+    customers = jobs["Customer"].astype(str).to_numpy()
+
+    regions = np.full(len(jobs), DEFAULT_REGION, dtype=object)
+    assigned = np.zeros(len(jobs), dtype=bool)
+    for rule in rules:
+        # Match each distinct server name once, then broadcast to the rows through the codes
+        matches = np.append(categories.str.contains(rule["server"], flags=re.IGNORECASE, regex=True), False)
+        hit = matches[codes] & ~assigned
+        if rule.get("account"):
+            hit &= customers == rule["account"]
+        regions[hit] = rule["region"]
+        assigned |= hit
+    return pd.Categorical(regions)
+
+
+def _read(path, columns):
+    if not os.path.exists(path):
+        return pd.DataFrame({column: pd.Series(dtype="object") for column in columns})
+    return pd.read_parquet(path)
+
+
+def _write(df, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = tmp_path_for(path)
+    df.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def _latest_version(store_dir, account, month):
+    try:
+        with open(os.path.join(month_dir(store_dir, account, month), LATEST_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def _read_json(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_json(record, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = tmp_path_for(path)
+    with open(tmp_path, "w") as f:
+        json.dump(record, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def read_partitions(store_dir, account, month):
+    """Read every region's daily rows for one account and month"""
+    version = _latest_version(store_dir, account, month)
+    pattern = os.path.join(month_dir(store_dir, account, month), f"version={version}", "region=*", "part.parquet")
+    frames = [pd.read_parquet(path) for path in sorted(glob.glob(pattern))] if version else []
+    if not frames:
+        return pd.DataFrame(columns=DAILY_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def _write_month(store_dir, account, month, daily):
+    """Write a month's daily rows as a new version and publish it by replacing the month's LATEST file"""
+    directory = month_dir(store_dir, account, month)
+    previous = _latest_version(store_dir, account, month)
+    version = uuid.uuid4().hex[:12]
+    for region, region_daily in daily.groupby("Region", sort=True):
+        region_daily = region_daily.sort_values("Backup Day", ignore_index=True)
+        _write(region_daily, os.path.join(partition_dir(store_dir, account, region, month, version), "part.parquet"))
+    os.makedirs(directory, exist_ok=True)
+    latest_path = os.path.join(directory, LATEST_FILE)
+    tmp_path = tmp_path_for(latest_path)
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, latest_path)
+
+    # The previous version stays until the next rewrite, for readers that opened it before the switch
+    for path in glob.glob(os.path.join(directory, "version=*")):
+        if os.path.basename(path) not in (f"version={version}", f"version={previous}"):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _daily_counts(jobs, rules):
+    """Return per-account, per-region, per-day outcome counts of jobs"""
+    counts = outcome_counts(jobs.assign(Region=assign_regions(jobs, rules)), ["Customer", "Region", "Backup Day"])
+    counts = counts[counts["Total_Jobs"] > 0].reset_index()
+    counts["Customer"] = counts["Customer"].astype(str)
+    counts["Region"] = counts["Region"].astype(str)
+    return counts
+
+
+def rules_current(store_dir, rules=None):
+    """Return whether the stored months were partitioned with the current region rules"""
+    rules = load_region_rules() if rules is None else rules
+    return _read_json(os.path.join(history_dir(store_dir), RULES_FILE)).get("rules_hash") == rules_hash(rules)
+
+
+def update_history(jobs, codes, partitions, store_dir):
+    """Rewrite the history partitions of (account, day) partitions whose content hash changed"""
+    index_path = os.path.join(history_dir(store_dir), INDEX_FILE)
+    rules_path = os.path.join(history_dir(store_dir), RULES_FILE)
+    rules = load_region_rules()
+    current = partitions.set_index(["Customer", "Backup Day"])["Partition_Hash"]
+    if rules_current(store_dir, rules):
+        index = _read(index_path, ["Customer", "Backup Day", "Partition_Hash"])
+        stored = index.set_index(["Customer", "Backup Day"])["Partition_Hash"]
+        changed_ids = (current != stored.reindex(current.index)).to_numpy().nonzero()[0]
+        if not len(changed_ids):
+            return 0
+        changed_rows = pd.Series(codes).isin(changed_ids).to_numpy()
+        counts = _daily_counts(jobs[changed_rows], rules)
+    else:
+        # New or changed region rules: re-partition every day earlier exports left in the job store,
+        # then every day of this export
+        index = _read(index_path, ["Customer", "Backup Day", "Partition_Hash"]).iloc[:0]
+        changed_ids = np.arange(len(partitions))
+        stored_counts = [_daily_counts(part, rules)
+                         for part in stored_partitions(["Customer", "Server", "Status", "Backup Day"], store_dir)]
+        counts = _daily_counts(jobs[codes >= 0], rules)
+        if stored_counts:
+            stored_counts = pd.concat(stored_counts, ignore_index=True)
+            in_export = stored_counts.set_index(["Customer", "Backup Day"]).index.isin(current.index)
+            counts = pd.concat([stored_counts[~in_export], counts], ignore_index=True)
+    counts["Month"] = counts["Backup Day"].dt.strftime("%Y-%m")
+
+    monthly = load_monthly(store_dir)
+    for (account, month), updates in counts.groupby(["Customer", "Month"], sort=True):
+        # Replace the changed days across every region of the month, keeping the other days
+        existing = read_partitions(store_dir, account, month)
+        existing = existing[~existing["Backup Day"].isin(updates["Backup Day"])]
+        daily = pd.concat([existing, updates[DAILY_COLUMNS]], ignore_index=True)
+        daily = daily.astype({column: "int64" for column in OUTCOMES + ["Total_Jobs"]})
+
+        _write_month(store_dir, account, month, daily)
+
+        rollup = daily.groupby("Region", sort=True).agg(
+            **{outcome: (outcome, "sum") for outcome in OUTCOMES + ["Total_Jobs"]},
+            Days=("Backup Day", "nunique"),
+        ).reset_index()
+        rollup.insert(0, "Customer", account)
+        rollup.insert(2, "Month", month)
+        monthly = monthly[~((monthly["Customer"] == account) & (monthly["Month"] == month))]
+        monthly = pd.concat([monthly, rollup[MONTHLY_COLUMNS]], ignore_index=True)
+
+    monthly = monthly.sort_values(MONTHLY_KEYS, ignore_index=True)
+    _write(monthly.astype({column: "int64" for column in OUTCOMES + ["Total_Jobs", "Days"]}),
+           os.path.join(history_dir(store_dir), MONTHLY_FILE))
+
+    index = pd.concat([index.set_index(["Customer", "Backup Day"]).drop(current.index, errors="ignore")
+                       .reset_index(), partitions[["Customer", "Backup Day", "Partition_Hash"]]], ignore_index=True)
+    _write(index, index_path)
+    # Recorded last, so an interrupted re-partitioning runs again on the next ingest
+    _write_json({"rules_hash": rules_hash(rules)}, rules_path)
+    return len(changed_ids)
+
+
+def load_monthly(store_dir):
+    """Load the monthly rollup with one row per account, region and month"""
+    return _read(os.path.join(history_dir(store_dir), MONTHLY_FILE), MONTHLY_COLUMNS)
+
+
+def account_monthly(monthly, account):
+    """Return an account's monthly rollup rows, one per region and month"""
+    return monthly[monthly["Customer"] == account].reset_index(drop=True)
+
+
+def monthly_sla(monthly, year=None):
+    """Return SLA per month summed over regions, optionally for one year only"""
+    if year is not None:
+        monthly = monthly[monthly["Month"].str.startswith(f"{year}-")]
+    table = monthly.groupby("Month", sort=True)[OUTCOMES + ["Total_Jobs", "Days"]].sum()
+    table = add_rates(table.astype("int64")).reset_index()
+    table["Month_Name"] = pd.to_datetime(table["Month"], format="%Y-%m").dt.strftime("%b %Y")
+    return table
+
+
+def regional_sla(monthly, month=None):
+    """Return SLA per region for one month, the latest one by default"""
+    if monthly.empty:
+        return add_rates(pd.DataFrame(columns=["Region"] + OUTCOMES + ["Total_Jobs"]).astype({"Total_Jobs": "int64"}))
+    month = month or monthly["Month"].max()
+    table = monthly[monthly["Month"] == month].groupby("Region", sort=True)[OUTCOMES + ["Total_Jobs"]].sum()
+    return add_rates(table.astype("int64")).reset_index()
+
+
+def daily_history(store_dir, account, month):
+    """Return one account's per-day SLA for a month, summed over regions"""
+    daily = read_partitions(store_dir, account, month)
+    table = daily.groupby("Backup Day", sort=True)[OUTCOMES + ["Total_Jobs"]].sum()
+    table = add_rates(table.astype("int64")).reset_index()
+    return table.rename(columns={"Backup Day": "Backup Date"})
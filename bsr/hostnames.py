@@ -0,0 +1,102 @@
+"""Hostname canonicalization so differently spelled clients aggregate together
+
+"IGRSCMNDC001.AD.CORP.GLOBAL", "igrscmndc001.ad.corp.global" and
+"igrscmndc001" all become "igrscmndc001", and backup-interface aliases
+such as "Hpuxmgmt-bu01" become "hpuxmgmt". The raw name -> canonical ID
+mapping is persisted so each spelling is only resolved once.
+"""
+import os
+
+import numpy as np
+import pandas as pd
+
+from .cache import tmp_path_for
+
+HOST_COLUMNS = ["Server", "Client"]
+INDEX_FILE = "host_index.parquet"
+
+IPV4_PATTERN = r"\d{1,3}(?:\.\d{1,3}){3}"
+# Backup network interface suffixes: "-bu", "-bu1", "-bu01", "-bu3"
+BACKUP_SUFFIX_PATTERN = r"-bu\d*$"
+
+
+def canonical_names(names):
+    """Apply the case, FQDN and backup-suffix rules to an array of raw host names"""
+    names = pd.Series(names, dtype="str").str.strip().str.lower()
+    is_ip = names.str.fullmatch(IPV4_PATTERN).fillna(False)
+    short = names.str.split(".", n=1).str[0].str.replace(BACKUP_SUFFIX_PATTERN, "", regex=True)
+    return names.where(is_ip, short).to_numpy()
+
+
+class HostIndex:
+    """Persisted hash index from raw host name to canonical host ID"""
+
+    def __init__(self, path=None):
+        self.path = path
+        self.raw_to_id = {}
+        self.canonical = []
+        self._canonical_to_id = {}
+        self._dirty = False
+        if path and os.path.exists(path):
+            stored = pd.read_parquet(path)
+            self.raw_to_id = dict(zip(stored["raw"], stored["canonical_id"].astype(int)))
+            by_id = stored.drop_duplicates("canonical_id").sort_values("canonical_id")
+            self.canonical = list(by_id["canonical"])
+            self._canonical_to_id = {name: i for i, name in enumerate(self.canonical)}
+
+    def ids_for(self, raw_names):
+        """Return canonical IDs for raw names, resolving only names not seen before"""
+        raw_names = list(raw_names)
+        unseen = [name for name in raw_names if name not in self.raw_to_id]
+        if unseen:
+            for raw, name in zip(unseen, canonical_names(unseen)):
+                if name not in self._canonical_to_id:
+                    self._canonical_to_id[name] = len(self.canonical)
+                    self.canonical.append(name)
+                self.raw_to_id[raw] = self._canonical_to_id[name]
+            self._dirty = True
+        return np.array([self.raw_to_id[name] for name in raw_names], dtype="int64")
+
+    def save(self):
+        """Persist the index if new names were added"""
+        if not self.path or not self._dirty:
+            return
+        raw = list(self.raw_to_id)
+        ids = np.array([self.raw_to_id[name] for name in raw], dtype="int64")
+        canonical = np.array(self.canonical, dtype=object)[ids]
+        stored = pd.DataFrame({"raw": raw, "canonical_id": ids, "canonical": canonical})
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = tmp_path_for(self.path)
+        stored.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.path)
+        self._dirty = False
+
+    def canonicalize(self, values):
+        """Map a host column to canonical names, touching each distinct spelling once"""
+        raw = values.astype("category")
+        ids = self.ids_for(raw.cat.categories)
+        codes = raw.cat.codes.to_numpy()
+        # Remap category codes to canonical IDs, keeping missing values missing
+        if len(ids):
+            canonical_codes = np.where(codes >= 0, ids[np.maximum(codes, 0)], -1)
+        else:
+            # An all-missing column has no spellings to map
+            canonical_codes = np.full(len(codes), -1)
+        categorical = pd.Categorical.from_codes(canonical_codes, categories=pd.Index(self.canonical))
+        canonical = pd.Series(categorical, index=values.index, name=values.name).cat.remove_unused_categories()
+        # Sorted categories keep group order independent of when each name was first indexed
+        return canonical.cat.reorder_categories(canonical.cat.categories.sort_values())
+
+
+def index_path_for(cache_dir):
+    """Return the host index path inside a cache directory"""
+    return os.path.join(cache_dir, INDEX_FILE)
+
+
+def canonicalize_hosts(df, index):
+    """Replace the Server and Client columns with canonical host names in place"""
+    for column in HOST_COLUMNS:
+        if column in df.columns:
+            df[column] = index.canonicalize(df[column])
+    index.save()
+    return df
@@ -0,0 +1,226 @@
+"""Incremental ingestion of daily BUR exports into a persisted per-account, per-day aggregate store"""
+import argparse
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from .aggregate import OUTCOMES, add_rates, group_codes, outcome_counts, summarize_daily
+from .cache import tmp_path_for
+from .cube import cube_path, update_cube
+from .history import rules_current, update_history
+from .ingest import DEFAULT_CACHE_DIR, load_jobs, source_fingerprint
+from .query import job_store_dir, update_job_store
+from .sketch import sketch_path, update_sketches
+
+try:
+    import fcntl
+except ImportError:
+    # No advisory file locks on this platform, ingests are only serialized within one process
+    fcntl = None
+
+# Each stored partition is one account's jobs for one backup day
+PARTITION_KEYS = ["Customer", "Backup Day"]
+STORE_FILE = "daily_aggregates.parquet"
+STORE_COLUMNS = PARTITION_KEYS + OUTCOMES + ["Total_Jobs", "Rows", "Partition_Hash"]
+# Content hashes of every export merged into the store, and the lock file serializing ingests
+INGESTED_FILE = "ingested_exports.json"
+LOCK_FILE = "ingest.lock"
+# Counters reported by every ingest
+INGEST_COUNTS = [
+    "partitions_seen", "partitions_updated", "rows_aggregated", "history_partitions_updated",
+    "sketch_partitions_updated", "cube_partitions_updated", "job_partitions_updated"
+]
+
+_ingest_lock = threading.Lock()
+
+
+def store_path(store_dir=DEFAULT_CACHE_DIR):
+    """Return the path of the per-day aggregate store"""
+    return os.path.join(store_dir, STORE_FILE)
+
+
+def empty_store():
+    """Return an aggregate store with no partitions"""
+    store = pd.DataFrame({column: pd.Series(dtype="int64") for column in STORE_COLUMNS})
+    store["Customer"] = store["Customer"].astype(str)
+    store["Backup Day"] = pd.to_datetime(store["Backup Day"])
+    store["Partition_Hash"] = store["Partition_Hash"].astype(str)
+    return store
+
+
+def load_daily_store(store_dir=DEFAULT_CACHE_DIR):
+    """Load the persisted per-day aggregate store"""
+    path = store_path(store_dir)
+    if not os.path.exists(path):
+        return empty_store()
+    return pd.read_parquet(path)
+
+
+def save_daily_store(store, store_dir=DEFAULT_CACHE_DIR):
+    """Atomically replace the persisted per-day aggregate store"""
+    os.makedirs(store_dir, exist_ok=True)
+    path = store_path(store_dir)
+    tmp_path = tmp_path_for(path)
+    store.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+def partition_hashes(jobs):
+    """Return per-row partition codes and an order-independent content hash per partition"""
+    codes, index = group_codes(jobs, PARTITION_KEYS)
+    valid = codes >= 0
+    row_hashes = pd.util.hash_pandas_object(jobs, index=False).to_numpy()[valid]
+
+    # Sum the 32-bit halves of each row hash separately so the totals cannot overflow
+    grouped_codes = codes[valid]
+    high = pd.Series(row_hashes >> 32).groupby(grouped_codes).sum()
+    low = pd.Series(row_hashes & 0xFFFFFFFF).groupby(grouped_codes).sum()
+    rows = pd.Series(grouped_codes).value_counts().sort_index()
+
+    table = index.to_frame(index=False)
+    table["Customer"] = table["Customer"].astype(str)
+    table["Rows"] = rows.to_numpy()
+    table["Partition_Hash"] = [
+        f"{n:x}-{h:x}-{l:x}" for n, h, l in zip(rows.to_numpy(), high.to_numpy(), low.to_numpy())
+    ]
+    return codes, table
+
+
+@contextmanager
+def store_lock(store_dir=DEFAULT_CACHE_DIR):
+    """Hold the store against writers in other threads of this process and, where supported, other processes"""
+    with _ingest_lock:
+        os.makedirs(store_dir, exist_ok=True)
+        with open(os.path.join(store_dir, LOCK_FILE), "a") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def ingested_exports(store_dir=DEFAULT_CACHE_DIR):
+    """Return the path last seen for the content hash of every export merged into the store"""
+    try:
+        with open(os.path.join(store_dir, INGESTED_FILE)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _record_export(store_dir, sha256, path):
+    exports = dict(ingested_exports(store_dir), **{sha256: os.path.abspath(path)})
+    path = os.path.join(store_dir, INGESTED_FILE)
+    tmp_path = tmp_path_for(path)
+    with open(tmp_path, "w") as f:
+        json.dump(exports, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def stores_complete(store_dir=DEFAULT_CACHE_DIR):
+    """Return whether every store an ingest fills exists and the history is partitioned with the current rules"""
+    return (all(os.path.exists(path) for path in (store_path(store_dir), cube_path(store_dir), sketch_path(store_dir)))
+            and os.path.isdir(job_store_dir(store_dir)) and rules_current(store_dir))
+
+
+def ingest_export(path, store_dir=DEFAULT_CACHE_DIR, cache_dir=DEFAULT_CACHE_DIR):
+    """Aggregate only the new or changed day partitions of an export and merge them into the store"""
+    # Every account's build writes the same shared stores, so ingests run one at a time
+    with store_lock(store_dir):
+        started = time.perf_counter()
+        sha256 = source_fingerprint(path, cache_dir)
+        if sha256 in ingested_exports(store_dir) and stores_complete(store_dir):
+            # Already merged, so neither the jobs nor their row hashes are needed
+            stats = dict.fromkeys(INGEST_COUNTS, 0)
+            stats.update(unchanged=True, seconds=time.perf_counter() - started)
+            return load_daily_store(store_dir), stats
+        store, stats = _merge_export(path, store_dir, cache_dir)
+        _record_export(store_dir, sha256, path)
+    return store, stats
+
+
+def _merge_export(path, store_dir, cache_dir):
+    started = time.perf_counter()
+    jobs = load_jobs(path, cache_dir=cache_dir)
+    codes, partitions = partition_hashes(jobs)
+    store = load_daily_store(store_dir)
+
+    # Partitions whose content hash differs from the stored one need re-aggregating
+    stored_hashes = store.set_index(PARTITION_KEYS)["Partition_Hash"]
+    current_hashes = partitions.set_index(PARTITION_KEYS)["Partition_Hash"]
+    changed = (current_hashes != stored_hashes.reindex(current_hashes.index)).to_numpy()
+    changed_ids = changed.nonzero()[0]
+
+    stats = {
+        "partitions_seen": len(partitions),
+        "partitions_updated": len(changed_ids),
+        "rows_aggregated": 0,
+        # The history store keeps its own partition hashes, so it also backfills days the store already had
+        "history_partitions_updated": update_history(jobs, codes, partitions, store_dir),
+        "sketch_partitions_updated": update_sketches(jobs, codes, partitions, changed_ids, store_dir),
+        "cube_partitions_updated": update_cube(jobs, codes, partitions, changed_ids, store_dir),
+        "job_partitions_updated": update_job_store(jobs, codes, partitions, changed_ids, store_dir),
+        "unchanged": False,
+    }
+    if len(changed_ids):
+        changed_rows = pd.Series(codes).isin(changed_ids).to_numpy()
+        updates = outcome_counts(jobs[changed_rows], PARTITION_KEYS).reset_index()
+        updates["Customer"] = updates["Customer"].astype(str)
+        updates = updates.merge(partitions, on=PARTITION_KEYS, how="left")
+
+        # Days no longer present in the export are kept, so the store only ever grows
+        keep = ~store.set_index(PARTITION_KEYS).index.isin(updates.set_index(PARTITION_KEYS).index)
+        store = pd.concat([store[keep], updates[STORE_COLUMNS]], ignore_index=True)
+        store = store.sort_values(PARTITION_KEYS, ignore_index=True)
+        save_daily_store(store, store_dir)
+        stats["rows_aggregated"] = int(changed_rows.sum())
+
+    stats["seconds"] = time.perf_counter() - started
+    return store, stats
+
+
+def account_daily(store, account):
+    """Return one account's per-day outcome table from the store, without days that had no finished jobs"""
+    # A day of only in-progress jobs has no SLA, so it would be a NaN row
+    daily = store[(store["Customer"] == account) & (store["Total_Jobs"] > 0)]
+    daily = daily.rename(columns={"Backup Day": "Backup Date"})
+    daily = daily[["Backup Date"] + OUTCOMES + ["Total_Jobs"]].reset_index(drop=True)
+    return add_rates(daily)
+
+
+def month_to_date(store, account):
+    """Return month-to-date SLA and month progress for an account without touching raw jobs"""
+    daily = account_daily(store, account)
+    if not daily.empty:
+        latest = daily["Backup Date"].max()
+        daily = daily[daily["Backup Date"] >= latest.replace(day=1)].reset_index(drop=True)
+    return summarize_daily(daily)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge BUR exports into the per-day aggregate store")
+    parser.add_argument("exports", nargs="+", help="BUR SLA REPORT CSV files, oldest first")
+    parser.add_argument("--store-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    for path in args.exports:
+        _, stats = ingest_export(path, store_dir=args.store_dir, cache_dir=args.store_dir)
+        if stats["unchanged"]:
+            print(f"{path}: already ingested, nothing to update")
+            continue
+        print(
+            f"{path}: {stats['partitions_updated']}/{stats['partitions_seen']} day partitions updated, "
+            f"{stats['rows_aggregated']} rows aggregated, {stats['history_partitions_updated']} history "
+            f"partitions, {stats['sketch_partitions_updated']} sketch, {stats['cube_partitions_updated']} cube and "
+            f"{stats['job_partitions_updated']} job partitions updated in {stats['seconds']:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Ingestion of raw BUR SLA REPORT job exports into a typed columnar cache"""
+import hashlib
+import json
+import os
+
+import pandas as pd
+
+from .cache import tmp_path_for
+from .hostnames import HostIndex, canonicalize_hosts, index_path_for
+
+# Directory holding the columnar caches, overridable for deployments
+DEFAULT_CACHE_DIR = os.environ.get("BSR_CACHE_DIR", ".bsr_cache")
+
+# Explicit formats used by the BUR export, e.g. "Oct 1, 2024 9:00:56 PM" and "01-Oct-2024"
+TIMESTAMP_FORMAT = "%b %d, %Y %I:%M:%S %p"
+BACKUP_DAY_FORMAT = "%d-%b-%Y"
+
+TIMESTAMP_COLUMNS = ["Start Date", "End Date", "Expiration Date"]
+
+# Low-cardinality text columns stored as categoricals
+CATEGORY_COLUMNS = [
+    "Customer", "Business Unit", "Server", "Product", "Client",
+    "Policy", "Group", "Job Type", "Job", "Status"
+]
+
+# Dtypes applied while reading so the CSV text is parsed only once
+CSV_DTYPES = {
+    "Vendor Status": "int32",
+    "Job ID": "int64",
+    "Size": "float64",
+    "Size Scanned": "float64",
+    "Size Transferred": "float64",
+    "KB/Sec": "float64",
+    "Nbr Files": "int64",
+}
+
+# Bump when the cached layout changes so old cache files are ignored
+CACHE_VERSION = 3
+
+
+def file_sha256(path, chunk_size=1 << 20):
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_job_columns(df):
+    """Convert raw export text columns to datetimes and categoricals in place"""
+    for column in TIMESTAMP_COLUMNS:
+        if column in df.columns:
+            df[column] = pd.to_datetime(df[column], format=TIMESTAMP_FORMAT)
+    if "Backup Day" in df.columns:
+        df["Backup Day"] = pd.to_datetime(df["Backup Day"], format=BACKUP_DAY_FORMAT)
+    for column in CATEGORY_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def read_bur_export(path, **read_csv_kwargs):
+    """Parse a raw BUR SLA REPORT CSV into a typed DataFrame"""
+    df = pd.read_csv(path, dtype=CSV_DTYPES, **read_csv_kwargs)
+    return parse_job_columns(df)
+
+
+def _manifest_path(cache_dir):
+    return os.path.join(cache_dir, "manifest.json")
+
+
+def _load_manifest(cache_dir):
+    try:
+        with open(_manifest_path(cache_dir)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_manifest(cache_dir, manifest):
+    tmp_path = tmp_path_for(_manifest_path(cache_dir))
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, _manifest_path(cache_dir))
+
+
+def source_fingerprint(path, cache_dir=DEFAULT_CACHE_DIR):
+    """Return the content hash of a source file, rehashing only when its mtime or size changes"""
+    stat = os.stat(path)
+    key = os.path.abspath(path)
+    manifest = _load_manifest(cache_dir)
+    entry = manifest.get(key)
+    if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+        return entry["sha256"]
+
+    sha256 = file_sha256(path)
+    manifest[key] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "sha256": sha256}
+    os.makedirs(cache_dir, exist_ok=True)
+    _save_manifest(cache_dir, manifest)
+    return sha256
+
+
+def cache_path_for(sha256, cache_dir=DEFAULT_CACHE_DIR):
+    """Return the Parquet cache path for a source file hash"""
+    return os.path.join(cache_dir, f"jobs-v{CACHE_VERSION}-{sha256[:20]}.parquet")
+
+
+def load_jobs(path, cache_dir=DEFAULT_CACHE_DIR, use_cache=True):
+    """Load a BUR export, parsing the CSV only when no columnar cache exists for its contents"""
+    if not use_cache:
+        return canonicalize_hosts(read_bur_export(path), HostIndex())
+
+    sha256 = source_fingerprint(path, cache_dir)
+    cache_path = cache_path_for(sha256, cache_dir)
+    if os.path.exists(cache_path):
+        return pd.read_parquet(cache_path)
+
+    # Canonical host names are resolved once here, so the cache already holds them
+    df = canonicalize_hosts(read_bur_export(path), HostIndex(index_path_for(cache_dir)))
+    try:
+        tmp_path = tmp_path_for(cache_path)
+        df.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, cache_path)
+    except ImportError:
+        # No Parquet engine installed, serve the parsed frame uncached
+        pass
+    return df
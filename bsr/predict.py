@@ -0,0 +1,93 @@
+"""Loading of trained SLA model artifacts and in-process month-end prediction"""
+import functools
+import json
+import os
+import pickle
+import re
+
+import numpy as np
+import pandas as pd
+
+from .features import FEATURE_COLUMNS, TRAILING_DAYS, daily_features, future_features
+
+# Directory holding versioned model artifacts, overridable for deployments
+DEFAULT_MODEL_DIR = os.environ.get("BSR_MODEL_DIR", "models")
+
+MODEL_FILE = "model.json"
+SCALER_FILE = "scaler.pkl"
+METADATA_FILE = "metadata.json"
+LATEST_FILE = "LATEST"
+
+
+def account_slug(account):
+    """Return a filesystem-safe directory name for an account"""
+    return re.sub(r"[^A-Za-z0-9]+", "_", account).strip("_").lower()
+
+
+def account_model_dir(account, model_dir=DEFAULT_MODEL_DIR):
+    """Return the directory holding every model version of an account"""
+    return os.path.join(model_dir, account_slug(account))
+
+
+def latest_version(account, model_dir=DEFAULT_MODEL_DIR):
+    """Return the latest published model version of an account, or None"""
+    try:
+        with open(os.path.join(account_model_dir(account, model_dir), LATEST_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def load_metadata(account, version=None, model_dir=DEFAULT_MODEL_DIR):
+    """Return the metadata of a model version, defaulting to the latest"""
+    version = version or latest_version(account, model_dir)
+    if version is None:
+        return None
+    with open(os.path.join(account_model_dir(account, model_dir), version, METADATA_FILE)) as f:
+        return json.load(f)
+
+
+@functools.lru_cache(maxsize=32)
+def load_model(account, version, model_dir=DEFAULT_MODEL_DIR):
+    """Load a model version and its scaler, importing xgboost only when first needed"""
+    from xgboost import XGBRegressor
+
+    version_dir = os.path.join(account_model_dir(account, model_dir), version)
+    model = XGBRegressor()
+    model.load_model(os.path.join(version_dir, MODEL_FILE))
+    with open(os.path.join(version_dir, SCALER_FILE), "rb") as f:
+        scaler = pickle.load(f)
+    return model, scaler
+
+
+def predict_daily_sla(model, scaler, features):
+    """Predict the following day's SLA (%) for each feature row"""
+    predictions = model.predict(scaler.transform(features[FEATURE_COLUMNS].to_numpy(dtype="float64")))
+    return np.clip(predictions, 0, 100)
+
+
+def predict_month_end_sla(daily, days_remaining, model, scaler):
+    """Predict the month-end SLA from month-to-date daily outcomes and the remaining day count"""
+    total = daily["Total_Jobs"].sum()
+    successes = daily["Success"].sum()
+    if days_remaining <= 0 or daily.empty:
+        return float(successes / total * 100) if total else float("nan")
+
+    # Each input row predicts the SLA of the day after it
+    observed = daily_features(daily).tail(1)
+    projected = future_features(daily, days_remaining - 1)
+    inputs = pd.concat([observed[FEATURE_COLUMNS], projected[FEATURE_COLUMNS]], ignore_index=True)
+    predicted_sla = predict_daily_sla(model, scaler, inputs)
+
+    expected_jobs = float(daily.sort_values("Backup Date").tail(TRAILING_DAYS)["Total_Jobs"].mean())
+    predicted_successes = (predicted_sla / 100 * expected_jobs).sum()
+    return float((successes + predicted_successes) / (total + expected_jobs * days_remaining) * 100)
+
+
+def predict_account(account, daily, days_remaining, model_dir=DEFAULT_MODEL_DIR):
+    """Predict an account's month-end SLA with its latest model, or None if none is trained"""
+    version = latest_version(account, model_dir)
+    if version is None:
+        return None
+    model, scaler = load_model(account, version, model_dir)
+    return predict_month_end_sla(daily, days_remaining, model, scaler)
@@ -0,0 +1,137 @@
+"""Per-stage wall time, row count and memory instrumentation
+
+Pipeline code wraps its steps in ``stage``; the records only accumulate while
+a ``StageProfiler`` is active in the current context (one per dashboard rerun
+or CLI run), so instrumented code costs nothing otherwise::
+
+    profiler = activate()
+    with stage("aggregation") as record:
+        daily = daily_sla(jobs)
+        record["rows"] = len(jobs)
+    print(profiler.table())
+"""
+import contextvars
+import os
+import time
+from contextlib import contextmanager
+
+import pandas as pd
+
+from .cache import tmp_path_for
+
+PROMETHEUS_PREFIX = "bsr_stage"
+# Write the latest profile here after each dashboard run, e.g. for a node_exporter textfile collector
+PROMETHEUS_FILE = os.environ.get("BSR_PROMETHEUS_FILE")
+
+_active = contextvars.ContextVar("bsr_profiler", default=None)
+
+
+def current_rss_mb():
+    """Return the current resident set size of this process in MB, or None if unavailable"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        pass
+    try:
+        import psutil
+    except ImportError:
+        return None
+    return psutil.Process().memory_info().rss / 1024 ** 2
+
+
+class StageProfiler:
+    """Collects one record per executed stage, keeping the nesting of stages"""
+
+    def __init__(self):
+        self.records = []
+        self.started = time.perf_counter()
+        self._depth = 0
+
+    @contextmanager
+    def stage(self, name, rows=None):
+        """Time a block, yielding its record so the caller can fill in the rows processed"""
+        record = {
+            "stage": name,
+            "depth": self._depth,
+            "start": time.perf_counter() - self.started,
+            "seconds": None,
+            "rows": rows,
+            "memory_delta_mb": None,
+        }
+        self.records.append(record)
+        rss_before = current_rss_mb()
+        self._depth += 1
+        try:
+            yield record
+        finally:
+            self._depth -= 1
+            record["seconds"] = time.perf_counter() - self.started - record["start"]
+            rss_after = current_rss_mb()
+            if rss_before is not None and rss_after is not None:
+                record["memory_delta_mb"] = rss_after - rss_before
+
+    def table(self):
+        """Return the records in execution order as a DataFrame"""
+        columns = ["stage", "depth", "start", "seconds", "rows", "memory_delta_mb"]
+        return pd.DataFrame(self.records, columns=columns)
+
+
+def activate(profiler=None):
+    """Make a profiler the active one for the current context and return it"""
+    profiler = profiler or StageProfiler()
+    _active.set(profiler)
+    return profiler
+
+
+def active_profiler():
+    """Return the active profiler, or None when nothing is being profiled"""
+    return _active.get()
+
+
+@contextmanager
+def stage(name, rows=None):
+    """Record a stage on the active profiler, or just run the block when none is active"""
+    profiler = _active.get()
+    if profiler is None:
+        yield {"stage": name, "rows": rows}
+        return
+    with profiler.stage(name, rows) as record:
+        yield record
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def prometheus_text(timings, labels=None):
+    """Render a profile table in the Prometheus text exposition format"""
+    labels = labels or {}
+    metrics = [
+        ("seconds", "Wall time of the pipeline stage in its last run", "seconds"),
+        ("rows", "Rows processed by the pipeline stage in its last run", "rows"),
+        ("memory_delta_bytes", "Resident memory change over the pipeline stage in its last run", "memory_delta_mb"),
+    ]
+    # Repeated stages (e.g. one chart built twice) are summed so every series appears once
+    totals = timings.groupby("stage", sort=False)[["seconds", "rows", "memory_delta_mb"]].sum(min_count=1)
+    lines = []
+    for suffix, help_text, column in metrics:
+        name = f"{PROMETHEUS_PREFIX}_{suffix}"
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for stage_name, value in totals[column].dropna().items():
+            if column == "memory_delta_mb":
+                value = value * 1024 ** 2
+            series_labels = ",".join(f'{key}="{_escape(v)}"' for key, v in {**labels, "stage": stage_name}.items())
+            lines.append(f"{name}{{{series_labels}}} {value:.6g}")
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path, text):
+    """Atomically write Prometheus text so a collector never reads a partial file"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = tmp_path_for(path)
+    with open(tmp_path, "w") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+    return path
@@ -0,0 +1,252 @@
+"""Ad-hoc queries over the full job history kept as partitioned Parquet files
+
+Ingestion keeps every job, one file per account and backup day, under
+``<store>/jobs/account=<slug>/day=<YYYY-MM-DD>/part.parquet``; a day seen in a
+later export replaces the earlier copy, so no job is counted twice. Queries
+run in-process over those files with DuckDB when it is installed, which
+skips whole files by the day in their path and reads only the columns and
+row groups a query needs. Without DuckDB, ``query_jobs`` falls back to
+pyarrow datasets with the same pushdown; free SQL needs DuckDB, and runs one
+SELECT at a time on a connection that can read the job files and nothing else::
+
+    from bsr.query import query_jobs, run_sql
+    failed = query_jobs(start="2024-10-01", statuses=["Failure"], vendor_statuses=[30000], client_pattern="igr*")
+    run_sql('SELECT Server, count(*) AS jobs FROM jobs GROUP BY Server')
+"""
+import glob
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from .cache import tmp_path_for
+from .ingest import CATEGORY_COLUMNS, DEFAULT_CACHE_DIR
+from .predict import account_slug
+
+JOB_STORE_DIR = "jobs"
+# Columns returned when a query does not name any
+DEFAULT_QUERY_COLUMNS = [
+    "Customer", "Server", "Client", "Policy", "Group", "Job Type", "Status", "Vendor Status",
+    "Size", "KB/Sec", "Start Date", "End Date", "Backup Day"
+]
+DEFAULT_QUERY_LIMIT = 10_000
+
+
+def job_store_dir(store_dir=DEFAULT_CACHE_DIR):
+    """Return the directory of the partitioned job history"""
+    return os.path.join(store_dir, JOB_STORE_DIR)
+
+
+def partition_file(store_dir, account, day):
+    """Return the Parquet file holding one account's jobs for one backup day"""
+    return os.path.join(
+        job_store_dir(store_dir), f"account={account_slug(account)}", f"day={day:%Y-%m-%d}", "part.parquet"
+    )
+
+
+def update_job_store(jobs, codes, partitions, changed_ids, store_dir=DEFAULT_CACHE_DIR):
+    """Rewrite the job files of changed (account, day) partitions and return how many were written"""
+    if not os.path.isdir(job_store_dir(store_dir)):
+        # First run with the job store, write every partition of the export
+        changed_ids = np.arange(len(partitions))
+    if not len(changed_ids):
+        return 0
+
+    changed_rows = pd.Series(codes).isin(changed_ids).to_numpy()
+    rows = jobs[changed_rows]
+    # Plain strings rather than categoricals, so files written from different exports share one schema
+    # (object rather than str, which would store missing values as the text "nan")
+    rows = rows.astype(
+        {column: object for column in rows.columns if isinstance(rows[column].dtype, pd.CategoricalDtype)}
+    )
+    for code, part in rows.groupby(codes[changed_rows], sort=False):
+        partition = partitions.iloc[code]
+        path = partition_file(store_dir, partition["Customer"], partition["Backup Day"])
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = tmp_path_for(path)
+        part.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, path)
+    return len(changed_ids)
+
+
+def stored_partitions(columns=None, store_dir=DEFAULT_CACHE_DIR):
+    """Yield the jobs of every stored (account, day) partition, one file at a time"""
+    for path in sorted(glob.glob(job_files(store_dir))):
+        yield pd.read_parquet(path, columns=columns)
+
+
+def account_files(account, start=None, store_dir=DEFAULT_CACHE_DIR):
+    """Return the job files of one account's stored days, from ``start`` on when given"""
+    files = sorted(glob.glob(os.path.join(
+        job_store_dir(store_dir), f"account={account_slug(account)}", "day=*", "part.parquet"
+    )))
+    if start is not None:
+        # Day directories sort by date, so the range is a comparison on the directory name
+        first = f"day={pd.Timestamp(start):%Y-%m-%d}"
+        files = [path for path in files if os.path.basename(os.path.dirname(path)) >= first]
+    return files
+
+
+def read_account_jobs(account, start=None, store_dir=DEFAULT_CACHE_DIR):
+    """Read one account's stored jobs, typed as ``load_jobs`` types them, without opening other accounts' files"""
+    files = account_files(account, start, store_dir)
+    if not files:
+        return None
+    jobs = pd.concat([pd.read_parquet(path) for path in files], ignore_index=True)
+    # Accounts whose names share a slug share a directory
+    jobs = jobs[jobs["Customer"] == account].reset_index(drop=True)
+    return jobs.astype({column: "category" for column in CATEGORY_COLUMNS if column in jobs.columns})
+
+
+def has_duckdb():
+    """Return whether the DuckDB engine is installed"""
+    try:
+        import duckdb  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def job_files(store_dir=DEFAULT_CACHE_DIR):
+    """Return the glob matching every job file of the store"""
+    return os.path.join(job_store_dir(store_dir), "*", "*", "part.parquet")
+
+
+def _literal(value):
+    return "'" + value.replace("'", "''") + "'"
+
+
+def connect(store_dir=DEFAULT_CACHE_DIR):
+    """Return an in-memory DuckDB connection with the job history exposed as the view ``jobs``"""
+    import duckdb
+
+    connection = duckdb.connect()
+    files = os.path.abspath(job_files(store_dir))
+    if glob.glob(files):
+        # Views cannot take prepared parameters, so the path is inlined as an escaped literal
+        connection.execute(
+            f"CREATE VIEW jobs AS SELECT * FROM read_parquet({_literal(files)}, hive_partitioning = true, "
+            "union_by_name = true)"
+        )
+    # Queries may read the job store and no other file, and cannot change that setting back
+    allowed = os.path.join(os.path.abspath(job_store_dir(store_dir)), "")
+    connection.execute(f"SET allowed_directories = [{_literal(allowed)}]")
+    connection.execute("SET enable_external_access = false")
+    connection.execute("SET lock_configuration = true")
+    return connection
+
+
+def check_select(sql):
+    """Raise ValueError unless the SQL is exactly one SELECT statement"""
+    import duckdb
+
+    statements = duckdb.extract_statements(sql)
+    if len(statements) != 1 or statements[0].type != duckdb.StatementType.SELECT:
+        raise ValueError("Only a single SELECT statement can be run against the job history")
+
+
+def like_pattern(pattern):
+    """Turn a shell-style pattern such as ``igr*`` into a SQL LIKE pattern"""
+    escaped = re.sub(r"([%_\\])", r"\\\1", pattern)
+    return escaped.replace("*", "%").replace("?", "_")
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def query_jobs(start=None, end=None, statuses=None, vendor_statuses=None, groups=None, client_pattern=None,
+               accounts=None, columns=None, limit=DEFAULT_QUERY_LIMIT, store_dir=DEFAULT_CACHE_DIR):
+    """Return the jobs matching every given filter, reading only the needed files, columns and rows"""
+    columns = list(columns or DEFAULT_QUERY_COLUMNS)
+    if not glob.glob(job_files(store_dir)):
+        return pd.DataFrame(columns=columns)
+    if not has_duckdb():
+        return _query_jobs_arrow(start, end, statuses, vendor_statuses, groups, client_pattern, accounts, columns,
+                                 limit, store_dir)
+
+    where, params = _where_clause(start, end, statuses, vendor_statuses, groups, client_pattern, accounts)
+    sql = f"SELECT {', '.join(_quote(column) for column in columns)} FROM jobs{where}"
+    sql += ' ORDER BY "Start Date"'
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    connection = connect(store_dir)
+    try:
+        return connection.execute(sql, params).df()
+    finally:
+        connection.close()
+
+
+def _where_clause(start, end, statuses, vendor_statuses, groups, client_pattern, accounts):
+    """Return the DuckDB WHERE clause of the query_jobs filters and its parameters"""
+    # The day partition column prunes whole files; the remaining predicates reach the Parquet scan
+    conditions, params = [], []
+    if start is not None:
+        conditions.append("day >= CAST(? AS DATE)")
+        params.append(str(start))
+    if end is not None:
+        conditions.append("day <= CAST(? AS DATE)")
+        params.append(str(end))
+    if accounts:
+        conditions.append("account IN (SELECT unnest(?))")
+        params.append([account_slug(account) for account in accounts])
+    for column, values in [("Status", statuses), ("Vendor Status", vendor_statuses), ("Group", groups)]:
+        if values:
+            conditions.append(f"{_quote(column)} IN (SELECT unnest(?))")
+            params.append(list(values))
+    if client_pattern:
+        conditions.append("Client ILIKE ? ESCAPE '\\'")
+        params.append(like_pattern(client_pattern))
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def _query_jobs_arrow(start, end, statuses, vendor_statuses, groups, client_pattern, accounts, columns, limit,
+                      store_dir):
+    """Run query_jobs with pyarrow datasets when DuckDB is not installed"""
+    import pyarrow.compute as pc
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(job_store_dir(store_dir), format="parquet", partitioning="hive")
+    conditions = []
+    if start is not None:
+        conditions.append(pc.field("Backup Day") >= pd.Timestamp(start))
+    if end is not None:
+        conditions.append(pc.field("Backup Day") <= pd.Timestamp(end))
+    if accounts:
+        conditions.append(pc.field("account").isin([account_slug(account) for account in accounts]))
+    for column, values in [("Status", statuses), ("Vendor Status", vendor_statuses), ("Group", groups)]:
+        if values:
+            conditions.append(pc.field(column).isin(list(values)))
+    if client_pattern:
+        conditions.append(pc.match_like(pc.field("Client"), like_pattern(client_pattern), ignore_case=True))
+
+    condition = None
+    for expression in conditions:
+        condition = expression if condition is None else condition & expression
+    jobs = dataset.to_table(columns=columns, filter=condition).to_pandas()
+    jobs = jobs.sort_values("Start Date", ignore_index=True) if "Start Date" in jobs else jobs
+    return jobs.head(limit) if limit else jobs
+
+
+def run_sql(sql, params=None, store_dir=DEFAULT_CACHE_DIR):
+    """Run a single SELECT against the ``jobs`` view with DuckDB and return the result as a DataFrame"""
+    check_select(sql)
+    connection = connect(store_dir)
+    try:
+        return connection.execute(sql, params or []).df()
+    finally:
+        connection.close()
+
+
+def distinct_values(column, store_dir=DEFAULT_CACHE_DIR):
+    """Return the sorted distinct values of a job column, reading only that column"""
+    if not glob.glob(job_files(store_dir)):
+        return []
+    if has_duckdb():
+        values = run_sql(f"SELECT DISTINCT {_quote(column)} AS value FROM jobs ORDER BY 1", store_dir=store_dir)
+        return values["value"].dropna().tolist()
+    import pyarrow.dataset as ds
+
+    table = ds.dataset(job_store_dir(store_dir), format="parquet", partitioning="hive").to_table(columns=[column])
+    return sorted(pd.unique(table.column(column).to_pandas().dropna()))
@@ -0,0 +1,163 @@
+"""Per-account SLA prediction results files
+
+Results are stored as a single Parquet file: the worst hosts are the typed
+table and the scalar metrics are a JSON record in the file's key-value
+metadata. Legacy Metric/Value CSV files remain readable through
+``read_legacy_results``.
+"""
+import ast
+import glob
+import json
+import os
+import re
+
+import pandas as pd
+
+from .cache import tmp_path_for
+from .config import DEFAULT_RESULTS_DIR
+from .predict import account_slug
+
+RESULTS_PREFIX = "SLA_Prediction_Results"
+SCHEMA_VERSION = 1
+METADATA_KEY = b"bsr_results"
+
+HOST_COLUMNS = ["Client", "SLA", "Total_Jobs", "Success_Rate"]
+HOST_DTYPES = {"Client": "str", "SLA": "float64", "Total_Jobs": "int64", "Success_Rate": "float64"}
+
+# Legacy host strings such as "igrdssndc002 (SLA: 0.00%, Total Jobs: 1.0, Success Rate: 0.00)"
+LEGACY_HOST_PATTERN = (
+    r"^(?P<Client>.*?) \(SLA: (?P<SLA>[\d.]+)%, Total Jobs: (?P<Total_Jobs>[\d.]+)"
+    r"(?:, Success Rate: (?P<Success_Rate>[\d.]+))?\)$"
+)
+
+# Legacy metric names mapped to metric record keys
+LEGACY_METRICS = {
+    "Predicted Current Month SLA (XGBoost)": "predicted_sla",
+    "Predicted Current Month SLA": "predicted_sla",
+    "Current Month SLA": "current_sla",
+    "Days Processed in Current Month": "days_processed",
+    "Days Remaining in Current Month": "days_remaining",
+}
+
+
+def results_filename(account, run_date):
+    """Return the results file name for an account and run date"""
+    return f"{RESULTS_PREFIX}_{account_slug(account)}_{run_date:%Y%m%d}.parquet"
+
+
+def latest_results_file(account, results_dir=DEFAULT_RESULTS_DIR):
+    """Return the newest results file written for an account, or None"""
+    slug = account_slug(account)
+    # The glob also matches longer slugs sharing the prefix (cibc_wealth_... for cibc), so the run date is checked
+    own_file = re.compile(rf"{re.escape(RESULTS_PREFIX)}_{re.escape(slug)}_\d{{8}}\.parquet")
+    paths = [path for path in glob.glob(os.path.join(results_dir, f"{RESULTS_PREFIX}_{slug}_*.parquet"))
+             if own_file.fullmatch(os.path.basename(path))]
+    return max(paths) if paths else None
+
+
+def host_table(client_data):
+    """Return a per-client table restricted to the typed host columns"""
+    hosts = client_data.rename(columns={client_data.columns[0]: "Client"})[HOST_COLUMNS]
+    return hosts.astype(HOST_DTYPES).reset_index(drop=True)
+
+
+def build_results(account, run_date, summary, predicted_sla, required_sla, target_sla, metadata, worst_hosts):
+    """Build a results record from an account's aggregates and prediction"""
+    metrics = {
+        "predicted_sla": float(predicted_sla),
+        "current_sla": float(summary["current_sla"]),
+        "days_processed": int(summary["days_processed"]),
+        "days_remaining": int(summary["days_remaining"]),
+        "required_sla": float(required_sla),
+        "target_sla": float(target_sla),
+        "best_params": metadata["params"] if metadata else None,
+        "feature_importances": metadata["feature_importances"] if metadata else None,
+        "model_version": metadata.get("version") if metadata else None,
+    }
+    return {
+        "schema_version": SCHEMA_VERSION,
+        "account": account,
+        "run_date": str(pd.Timestamp(run_date).date()),
+        "metrics": metrics,
+        "hosts": host_table(worst_hosts),
+    }
+
+
+def write_results(results, path):
+    """Atomically write a results record as Parquet with the metrics in the file metadata"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    record = {key: value for key, value in results.items() if key != "hosts"}
+    table = pa.Table.from_pandas(results["hosts"], preserve_index=False)
+    schema_metadata = dict(table.schema.metadata or {})
+    schema_metadata[METADATA_KEY] = json.dumps(record)
+    table = table.replace_schema_metadata(schema_metadata)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = tmp_path_for(path)
+    pq.write_table(table, tmp_path)
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_results(path):
+    """Read a results file in either the Parquet or the legacy CSV format"""
+    if path.endswith(".csv"):
+        return read_legacy_results(path)
+
+    import pyarrow.parquet as pq
+
+    table = pq.read_table(path)
+    record = json.loads(table.schema.metadata[METADATA_KEY])
+    if record["schema_version"] > SCHEMA_VERSION:
+        raise ValueError(f"{path}: results schema {record['schema_version']} is newer than {SCHEMA_VERSION}")
+    record["hosts"] = table.to_pandas()
+    return record
+
+
+def parse_legacy_hosts(values):
+    """Parse legacy worst-host strings into the typed host table"""
+    hosts = pd.Series(values, dtype="str").str.extract(LEGACY_HOST_PATTERN)
+    hosts = hosts.dropna(subset=["Client", "SLA", "Total_Jobs"])
+    hosts["SLA"] = hosts["SLA"].astype("float64")
+    hosts["Total_Jobs"] = hosts["Total_Jobs"].astype("float64").astype("int64")
+    # Older files omit the success rate, which equals SLA / 100
+    hosts["Success_Rate"] = hosts["Success_Rate"].astype("float64").fillna(hosts["SLA"] / 100)
+    return hosts.astype(HOST_DTYPES).reset_index(drop=True)
+
+
+def read_legacy_results(path):
+    """Read a legacy Metric/Value results CSV into a results record"""
+    legacy = pd.read_csv(path)
+    values = dict(zip(legacy["Metric"], legacy["Value"]))
+
+    metrics = {key: None for key in ["predicted_sla", "current_sla", "days_processed", "days_remaining",
+                                     "required_sla", "target_sla", "best_params", "feature_importances",
+                                     "model_version"]}
+    for name, key in LEGACY_METRICS.items():
+        if name in values and metrics[key] is None:
+            value = str(values[name]).strip().rstrip("%")
+            metrics[key] = int(float(value)) if key.startswith("days_") else float(value)
+
+    required = legacy[legacy["Metric"].str.startswith("Required SLA", na=False)]
+    if len(required):
+        metrics["required_sla"] = float(str(required["Value"].iloc[0]).rstrip("%"))
+        target = required["Metric"].iloc[0].split("meet ")[-1].split("%")[0]
+        metrics["target_sla"] = float(target) if target.replace(".", "", 1).isdigit() else None
+    if "Best XGBoost Parameters" in values:
+        metrics["best_params"] = ast.literal_eval(values["Best XGBoost Parameters"])
+
+    features = legacy[legacy["Metric"].str.startswith("Important Feature", na=False)]["Value"]
+    importances = features.str.extract(r"^(?P<feature>\S+) \(importance: (?P<importance>[\d.]+)\)$").dropna()
+    if len(importances):
+        metrics["feature_importances"] = dict(zip(importances["feature"], importances["importance"].astype(float)))
+
+    hosts = legacy[legacy["Metric"].str.startswith("Worst Performing Client", na=False)]["Value"]
+    return {
+        "schema_version": 0,
+        "account": None,
+        "run_date": None,
+        "metrics": metrics,
+        "hosts": parse_legacy_hosts(hosts),
+    }
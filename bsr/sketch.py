@@ -0,0 +1,200 @@
+"""Mergeable quantile sketches of per-job throughput and transfer sizes
+
+Each sketch is a DDSketch-style histogram over logarithmic bins: a value x
+goes to bin ``ceil(log_gamma(x))`` with ``gamma = (1 + a) / (1 - a)``, and a
+quantile is answered with the bin's midpoint value. Any quantile is within a
+relative error of ``a = RELATIVE_ACCURACY`` (1%) of an actual value at that
+rank, for values between MIN_VALUE and MAX_VALUE; smaller values (including
+zero) share one bin reported as 0, larger ones are clamped to MAX_VALUE.
+
+Because the bin range is fixed, one sketch never holds more than MAX_BINS
+counts, whatever the number of jobs, and two sketches merge by adding counts
+bin by bin. Ingestion stores one sketch per account, day, server, product,
+policy and metric, next to the daily aggregates; percentiles for any date
+range or grouping are answered by merging those, never by re-sorting jobs.
+Jobs with no Server, Product or Policy are sketched under a "(missing)"
+member, so sketch counts match job counts. A missing sketch store is rebuilt
+from every day in the job store, so percentiles keep covering earlier months.
+"""
+import argparse
+import os
+
+import numpy as np
+import pandas as pd
+
+from .aggregate import fill_missing_keys, group_codes
+from .cache import tmp_path_for
+from .ingest import DEFAULT_CACHE_DIR
+from .query import stored_partitions
+
+SKETCH_METRICS = ["KB/Sec", "Size", "Size Scanned", "Size Transferred"]
+SKETCH_DIMENSIONS = ["Server", "Product", "Policy"]
+SKETCH_KEYS = ["Customer", "Backup Day"] + SKETCH_DIMENSIONS
+# Versioned so sketches written before missing members existed are rebuilt
+SKETCH_FILE = "daily_sketches-v2.parquet"
+SKETCH_COLUMNS = SKETCH_KEYS + ["Metric", "Bin", "Count"]
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+
+RELATIVE_ACCURACY = 0.01
+GAMMA = (1 + RELATIVE_ACCURACY) / (1 - RELATIVE_ACCURACY)
+MIN_VALUE = 1e-9
+MAX_VALUE = 1e15
+MIN_BIN = int(np.ceil(np.log(MIN_VALUE) / np.log(GAMMA)))
+MAX_BIN = int(np.ceil(np.log(MAX_VALUE) / np.log(GAMMA)))
+# Bin of every value below MIN_VALUE, reported as 0
+ZERO_BIN = MIN_BIN - 1
+MAX_BINS = MAX_BIN - ZERO_BIN + 1
+
+
+def value_bins(values):
+    """Return the sketch bin of each value"""
+    values = np.asarray(values, dtype="float64")
+    with np.errstate(divide="ignore", invalid="ignore"):
+        bins = np.ceil(np.log(np.minimum(values, MAX_VALUE)) / np.log(GAMMA))
+    bins = np.where(values < MIN_VALUE, ZERO_BIN, bins)
+    return bins.astype("int16")
+
+
+def bin_values(bins):
+    """Return the value each bin stands for, within RELATIVE_ACCURACY of everything in it"""
+    bins = np.asarray(bins, dtype="float64")
+    return np.where(bins == ZERO_BIN, 0.0, 2 * GAMMA ** bins / (GAMMA + 1))
+
+
+def build_sketches(jobs, by=SKETCH_KEYS, metrics=SKETCH_METRICS):
+    """Return one sketch per group and metric as (group, Metric, Bin, Count) rows"""
+    jobs = fill_missing_keys(jobs, [column for column in by if column not in ("Customer", "Backup Day")])
+    codes, labels = group_codes(jobs, by)
+    frames = []
+    for metric in metrics:
+        if metric not in jobs:
+            continue
+        values = jobs[metric].to_numpy(dtype="float64")
+        valid = (codes >= 0) & ~np.isnan(values)
+        if not valid.any():
+            continue
+        # Count (group, bin) pairs in one pass over a combined integer key
+        pairs = codes[valid] * MAX_BINS + (value_bins(values[valid]).astype("int64") - ZERO_BIN)
+        keys, counts = np.unique(pairs, return_counts=True)
+        table = labels[keys // MAX_BINS].to_frame(index=False)
+        table["Metric"] = metric
+        table["Bin"] = (keys % MAX_BINS + ZERO_BIN).astype("int16")
+        table["Count"] = counts.astype("int64")
+        frames.append(table)
+    if not frames:
+        return empty_sketches(by)
+    sketches = pd.concat(frames, ignore_index=True)
+    for column in by:
+        if column != "Backup Day":
+            sketches[column] = sketches[column].astype(str)
+    return sketches
+
+
+def empty_sketches(by=SKETCH_KEYS):
+    """Return a sketch table with no rows"""
+    columns = {column: pd.Series(dtype="object") for column in by}
+    if "Backup Day" in columns:
+        columns["Backup Day"] = pd.Series(dtype="datetime64[us]")
+    columns.update(Metric=pd.Series(dtype="object"), Bin=pd.Series(dtype="int16"), Count=pd.Series(dtype="int64"))
+    return pd.DataFrame(columns)
+
+
+def merge_sketches(sketches, by):
+    """Merge sketches into one per group of the given columns by adding counts bin by bin"""
+    by = list(by)
+    return sketches.groupby(by + ["Metric", "Bin"], sort=True, observed=True)["Count"].sum().reset_index()
+
+
+def sketch_quantiles(sketches, by=(), quantiles=DEFAULT_QUANTILES, start=None, end=None):
+    """Return per-group, per-metric quantiles from merged sketches, optionally for a range of backup days"""
+    by = list(by)
+    if start is not None:
+        sketches = sketches[sketches["Backup Day"] >= pd.Timestamp(start)]
+    if end is not None:
+        sketches = sketches[sketches["Backup Day"] <= pd.Timestamp(end)]
+    merged = merge_sketches(sketches, by)
+    columns = [f"P{round(q * 100):g}" for q in quantiles]
+    if merged.empty:
+        return pd.DataFrame(columns=by + ["Metric", "Count"] + columns)
+
+    # Merged rows are sorted by group then bin, so one running count serves every group
+    group_keys = by + ["Metric"]
+    running = merged["Count"].to_numpy().cumsum()
+    groups = merged.groupby(group_keys, sort=False, observed=True)
+    sizes = groups.size().to_numpy()
+    ends = sizes.cumsum()
+    totals = running[ends - 1] - np.append(0, running[ends[:-1] - 1])
+    offsets = running[ends - 1] - totals
+
+    table = groups.size().rename("Count").reset_index()
+    table["Count"] = totals
+    bins = merged["Bin"].to_numpy()
+    for column, q in zip(columns, quantiles):
+        # Rank of the q-quantile within the group, counted from 1
+        rank = np.floor(q * (totals - 1)).astype("int64") + 1
+        table[column] = bin_values(bins[np.searchsorted(running, offsets + rank, side="left")])
+    return table
+
+
+def sketch_path(store_dir=DEFAULT_CACHE_DIR):
+    """Return the path of the per-day sketch store"""
+    return os.path.join(store_dir, SKETCH_FILE)
+
+
+def load_sketches(store_dir=DEFAULT_CACHE_DIR):
+    """Load the persisted per-day sketches"""
+    path = sketch_path(store_dir)
+    if not os.path.exists(path):
+        return empty_sketches()
+    return pd.read_parquet(path)
+
+
+def stored_sketches(store_dir=DEFAULT_CACHE_DIR):
+    """Build the sketches of every partition kept in the job store, one partition at a time"""
+    frames = [build_sketches(part) for part in stored_partitions(SKETCH_KEYS + SKETCH_METRICS, store_dir)]
+    return pd.concat(frames, ignore_index=True) if frames else empty_sketches()
+
+
+def update_sketches(jobs, codes, partitions, changed_ids, store_dir=DEFAULT_CACHE_DIR):
+    """Rebuild the sketches of changed (account, day) partitions and atomically rewrite the sketch store"""
+    path = sketch_path(store_dir)
+    if os.path.exists(path):
+        sketches = load_sketches(store_dir)
+    else:
+        # First run with this sketch version: rebuild the days earlier exports left in the job store,
+        # then every partition of this export
+        sketches = stored_sketches(store_dir)
+        changed_ids = np.arange(len(partitions))
+    if not len(changed_ids):
+        return 0
+
+    changed_rows = pd.Series(codes).isin(changed_ids).to_numpy()
+    updates = build_sketches(jobs[changed_rows])
+    replaced = partitions.iloc[changed_ids].set_index(["Customer", "Backup Day"]).index
+    keep = ~sketches.set_index(["Customer", "Backup Day"]).index.isin(replaced)
+    sketches = pd.concat([sketches[keep], updates], ignore_index=True)
+
+    os.makedirs(store_dir, exist_ok=True)
+    tmp_path = tmp_path_for(path)
+    sketches.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+    return len(changed_ids)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Print throughput and size percentiles from the stored sketches")
+    parser.add_argument("--by", nargs="*", default=["Server"], choices=["Customer"] + SKETCH_DIMENSIONS)
+    parser.add_argument("--account", help="Only this account")
+    parser.add_argument("--start", help="First backup day, e.g. 2024-10-01")
+    parser.add_argument("--end", help="Last backup day")
+    parser.add_argument("--store-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    sketches = load_sketches(args.store_dir)
+    if args.account:
+        sketches = sketches[sketches["Customer"] == args.account]
+    print(sketch_quantiles(sketches, args.by, start=args.start, end=args.end).to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
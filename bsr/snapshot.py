@@ -0,0 +1,270 @@
+"""Background refresh of immutable, versioned per-account dashboard snapshots
+
+The worker polls the drop directory and results files. When an account's
+sources or model change, it runs ingestion, aggregation and prediction and
+publishes the result as a new snapshot version::
+
+    snapshots/<account>/<version>.pkl    aggregated account data, never modified
+    snapshots/<account>/<version>.json   sources, data key and build time
+    snapshots/<account>/LATEST           the version the dashboard reads
+
+Each poll first merges every export that arrived since the previous one into
+the shared store, oldest first, one ingest at a time across threads and
+processes.
+
+LATEST is replaced atomically only after both version files are on disk.
+Readers therefore always see a complete snapshot and never wait for a
+build. Versions start with a nanosecond UTC timestamp, so they sort in
+publication order. Builds of one account are serialized within a process, so
+a first dashboard request that finds no snapshot waits for a build already
+running in the worker instead of starting a second one. Run it standalone
+(``python -m bsr.snapshot``) or as a dashboard thread.
+"""
+import argparse
+import glob
+import json
+import os
+import pickle
+import sys
+import threading
+import time
+import uuid
+
+from .account import account_data_key, read_account_data, results_file_for
+from .cache import dataset_cache, tmp_path_for
+from .config import (
+    ACCOUNTS, DEFAULT_RESULTS_DIR, DROP_DIR, RAW_EXPORT_FILE, SNAPSHOT_DIR, SNAPSHOT_REFRESH_SECONDS
+)
+from .incremental import ingest_export, ingested_exports
+from .ingest import source_fingerprint
+from .predict import account_slug
+
+LATEST_FILE = "LATEST"
+EXPORT_PATTERN = "BUR SLA REPORT*.csv"
+# Bump when the account data kept in a snapshot changes, so older snapshots are rebuilt rather than read
+SNAPSHOT_FORMAT = 2
+# Older versions kept per account, so a dashboard still reading one is never left without its file
+KEEP_VERSIONS = 5
+
+_worker = None
+_worker_lock = threading.Lock()
+# One lock per account, held while checking and building its snapshot
+_refresh_locks = {}
+_refresh_locks_lock = threading.Lock()
+_last_version_ns = 0
+
+
+def latest_export(drop_dir=DROP_DIR, default=RAW_EXPORT_FILE):
+    """Return the newest BUR export in the drop directory, or the default export"""
+    if not drop_dir:
+        return default
+    exports = glob.glob(os.path.join(drop_dir, EXPORT_PATTERN))
+    return max(exports, key=os.path.getmtime) if exports else default
+
+
+def pending_exports(drop_dir=DROP_DIR):
+    """Return the exports in the drop directory not merged into the store yet, oldest first"""
+    if not drop_dir:
+        return []
+    exports = sorted(glob.glob(os.path.join(drop_dir, EXPORT_PATTERN)), key=os.path.getmtime)
+    ingested = ingested_exports()
+    return [path for path in exports if source_fingerprint(path) not in ingested]
+
+
+def account_snapshot_dir(account, snapshot_dir=SNAPSHOT_DIR):
+    """Return the directory holding every snapshot version of an account"""
+    return os.path.join(snapshot_dir, account_slug(account))
+
+
+def latest_snapshot_version(account, snapshot_dir=SNAPSHOT_DIR):
+    """Return the latest published snapshot version of an account, or None"""
+    try:
+        with open(os.path.join(account_snapshot_dir(account, snapshot_dir), LATEST_FILE)) as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def load_snapshot_metadata(account, version=None, snapshot_dir=SNAPSHOT_DIR):
+    """Return the metadata of a snapshot version, defaulting to the latest, or None"""
+    version = version or latest_snapshot_version(account, snapshot_dir)
+    if version is None:
+        return None
+    with open(os.path.join(account_snapshot_dir(account, snapshot_dir), f"{version}.json")) as f:
+        return json.load(f)
+
+
+def load_snapshot(account, version, snapshot_dir=SNAPSHOT_DIR):
+    """Load the aggregated account data of a snapshot version"""
+    with open(os.path.join(account_snapshot_dir(account, snapshot_dir), f"{version}.pkl"), "rb") as f:
+        return pickle.load(f)
+
+
+def read_latest_snapshot(account, snapshot_dir=SNAPSHOT_DIR):
+    """Return the metadata and account data of the latest snapshot, loading each version once, or None"""
+    version = latest_snapshot_version(account, snapshot_dir)
+    if version is None:
+        return None
+
+    def load():
+        metadata = load_snapshot_metadata(account, version, snapshot_dir)
+        if metadata.get("format") != SNAPSHOT_FORMAT:
+            # Written by an older dashboard, read as missing until it is rebuilt
+            return None
+        return metadata, load_snapshot(account, version, snapshot_dir)
+
+    return dataset_cache().get_or_load(('snapshot', os.path.abspath(snapshot_dir), account, version), load)
+
+
+def _json_key(data_key):
+    # Fingerprint tuples become lists in JSON, so compare keys in their JSON form
+    return json.loads(json.dumps(data_key))
+
+
+def new_version():
+    """Return a snapshot version that sorts after every version published before it"""
+    global _last_version_ns
+    with _refresh_locks_lock:
+        # Never step back within this process, even if the wall clock does
+        now = _last_version_ns = max(time.time_ns(), _last_version_ns + 1)
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.gmtime(now // 10 ** 9)) + f"{now % 10 ** 9:09d}"
+    # The random suffix only separates processes publishing in the same nanosecond
+    return f"{stamp}-{uuid.uuid4().hex[:6]}"
+
+
+def publish_snapshot(account, account_data, metadata, snapshot_dir=SNAPSHOT_DIR):
+    """Write a new snapshot version and point the account's LATEST file at it"""
+    account_dir = account_snapshot_dir(account, snapshot_dir)
+    os.makedirs(account_dir, exist_ok=True)
+    version = new_version()
+    metadata = dict(metadata, version=version, created_at=time.time())
+
+    for suffix, write in [(".pkl", lambda f: pickle.dump(account_data, f, protocol=pickle.HIGHEST_PROTOCOL)),
+                          (".json", lambda f: f.write(json.dumps(metadata, indent=2).encode()))]:
+        tmp_path = tmp_path_for(os.path.join(account_dir, version + suffix))
+        with open(tmp_path, "wb") as f:
+            write(f)
+        os.replace(tmp_path, os.path.join(account_dir, version + suffix))
+
+    # Publish the version only once both files are on disk
+    tmp_path = tmp_path_for(os.path.join(account_dir, LATEST_FILE))
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(account_dir, LATEST_FILE))
+    prune_snapshots(account, snapshot_dir)
+    return version
+
+
+def prune_snapshots(account, snapshot_dir=SNAPSHOT_DIR, keep=KEEP_VERSIONS):
+    """Delete all but the newest snapshot versions of an account"""
+    account_dir = account_snapshot_dir(account, snapshot_dir)
+    versions = sorted(os.path.basename(path)[:-len(".json")] for path in glob.glob(os.path.join(account_dir, "*.json")))
+    for version in versions[:-keep]:
+        for suffix in (".pkl", ".json"):
+            try:
+                os.remove(os.path.join(account_dir, version + suffix))
+            except OSError:
+                pass
+
+
+def _refresh_lock(account, snapshot_dir):
+    with _refresh_locks_lock:
+        return _refresh_locks.setdefault((os.path.abspath(snapshot_dir), account), threading.Lock())
+
+
+def refresh_account(account, raw_export=None, results_dir=DEFAULT_RESULTS_DIR, snapshot_dir=SNAPSHOT_DIR,
+                    force=False):
+    """Build and publish a new snapshot of an account when its sources changed, returning the new version"""
+    # A caller arriving while another thread builds the account waits, then finds the snapshot up to date
+    with _refresh_lock(account, snapshot_dir):
+        return _refresh_account(account, raw_export, results_dir, snapshot_dir, force)
+
+
+def _refresh_account(account, raw_export, results_dir, snapshot_dir, force):
+    raw_export = raw_export or latest_export()
+    file_path = results_file_for(account, results_dir)
+    if file_path is None:
+        return None
+    data_key = account_data_key(account, file_path, raw_export)
+    latest = load_snapshot_metadata(account, snapshot_dir=snapshot_dir)
+    if (not force and latest is not None and latest.get("format") == SNAPSHOT_FORMAT
+            and latest["data_key"] == _json_key(data_key)):
+        return None
+
+    started = time.perf_counter()
+    account_data = read_account_data(account, file_path, raw_export)
+    metadata = {
+        "format": SNAPSHOT_FORMAT,
+        "account": account,
+        "file_path": file_path,
+        "raw_export": raw_export,
+        "data_key": _json_key(data_key),
+        "build_seconds": time.perf_counter() - started,
+    }
+    return publish_snapshot(account, account_data, metadata, snapshot_dir)
+
+
+def refresh(accounts=None, drop_dir=DROP_DIR, results_dir=DEFAULT_RESULTS_DIR, snapshot_dir=SNAPSHOT_DIR):
+    """Refresh the snapshots of several accounts, returning the new version of each refreshed one"""
+    # Merge every export that landed since the last poll, so a month's last days are kept even when a
+    # newer export arrived in the same interval; the account builds below then reuse the ingested store
+    for export in pending_exports(drop_dir):
+        try:
+            _, stats = ingest_export(export)
+        except Exception as e:
+            print(f"{export}: ingest failed: {e}", file=sys.stderr)
+            continue
+        print(f"{export}: {stats['partitions_updated']} day partitions updated")
+    raw_export = latest_export(drop_dir)
+    published = {}
+    for account in accounts or ACCOUNTS:
+        try:
+            version = refresh_account(account, raw_export, results_dir, snapshot_dir)
+        except Exception as e:
+            # One broken account must not stop the others from refreshing
+            print(f"{account}: snapshot refresh failed: {e}", file=sys.stderr)
+            continue
+        if version is not None:
+            published[account] = version
+            print(f"{account}: published snapshot {version}")
+    return published
+
+
+def run_worker(interval=SNAPSHOT_REFRESH_SECONDS, stop=None, **refresh_kwargs):
+    """Refresh snapshots every interval seconds until the stop event is set"""
+    stop = stop or threading.Event()
+    while not stop.is_set():
+        refresh(**refresh_kwargs)
+        stop.wait(interval)
+
+
+def start_worker(interval=SNAPSHOT_REFRESH_SECONDS):
+    """Start the refresh worker as a daemon thread of this process, once"""
+    global _worker
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(target=run_worker, args=(interval,), name="bsr-snapshot-worker", daemon=True)
+            _worker.start()
+    return _worker
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publish per-account dashboard snapshots whenever sources change")
+    parser.add_argument("accounts", nargs="*", help="Accounts to refresh (default: every configured account)")
+    parser.add_argument("--drop-dir", default=DROP_DIR, help="Directory watched for new BUR exports")
+    parser.add_argument("--results-dir", default=DEFAULT_RESULTS_DIR)
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR)
+    parser.add_argument("--interval", type=float, default=SNAPSHOT_REFRESH_SECONDS, help="Seconds between polls")
+    parser.add_argument("--once", action="store_true", help="Refresh once and exit")
+    args = parser.parse_args(argv)
+
+    options = dict(accounts=args.accounts or None, drop_dir=args.drop_dir, results_dir=args.results_dir,
+                   snapshot_dir=args.snapshot_dir)
+    if args.once:
+        refresh(**options)
+    else:
+        run_worker(args.interval, **options)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Bounded-memory streaming aggregation of BUR exports larger than RAM"""
+import argparse
+import sys
+import time
+
+import pandas as pd
+
+from .aggregate import OUTCOMES, add_rates, group_codes, outcome_counts
+from .hostnames import HostIndex, canonicalize_hosts, index_path_for
+from .ingest import BACKUP_DAY_FORMAT, CSV_DTYPES, DEFAULT_CACHE_DIR
+
+DEFAULT_CHUNKSIZE = 500_000
+
+# Only the columns the accumulators need are read from each chunk
+STREAM_COLUMNS = ["Customer", "Client", "Status", "Size", "KB/Sec", "Backup Day"]
+DAILY_KEYS = ["Customer", "Backup Day"]
+CLIENT_KEYS = ["Customer", "Client"]
+SUM_COLUMNS = ["Size_Sum", "KB/Sec_Sum", "KB/Sec_Count"]
+
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB, or None if unavailable"""
+    try:
+        import resource
+    except ImportError:
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().peak_wset / 1024 ** 2
+    # ru_maxrss is reported in bytes on macOS and in kilobytes on Linux and the BSDs
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 ** 2 if sys.platform == "darwin" else peak / 1024
+
+
+def transfer_sums(jobs, by):
+    """Sum transferred size and throughput per group, counting jobs with a throughput value"""
+    codes, labels = group_codes(jobs, by)
+    valid = codes >= 0
+    kbps = jobs["KB/Sec"].to_numpy(dtype="float64")
+    sums = pd.DataFrame({
+        "Size_Sum": pd.Series(jobs["Size"].to_numpy(dtype="float64")[valid]).groupby(codes[valid]).sum(),
+        "KB/Sec_Sum": pd.Series(kbps[valid]).groupby(codes[valid]).sum(),
+        "KB/Sec_Count": pd.Series(~pd.isna(kbps[valid])).groupby(codes[valid]).sum(),
+    })
+    sums.index = labels.take(sums.index)
+    return sums
+
+
+def chunk_tables(chunk):
+    """Return the per-day and per-client accumulator increments for one chunk"""
+    daily = outcome_counts(chunk, DAILY_KEYS).join(transfer_sums(chunk, DAILY_KEYS))
+    clients = outcome_counts(chunk, CLIENT_KEYS).join(transfer_sums(chunk, CLIENT_KEYS))
+    return daily, clients
+
+
+def _accumulate(total, increment):
+    if total is None:
+        return increment
+    return total.add(increment, fill_value=0)
+
+
+def stream_aggregates(path, chunksize=DEFAULT_CHUNKSIZE, cache_dir=DEFAULT_CACHE_DIR):
+    """Aggregate an export chunk by chunk, keeping only the running per-day and per-client totals"""
+    started = time.perf_counter()
+    index = HostIndex(index_path_for(cache_dir))
+    dtypes = {column: CSV_DTYPES[column] for column in STREAM_COLUMNS if column in CSV_DTYPES}
+    daily, clients, rows = None, None, 0
+
+    for chunk in pd.read_csv(path, usecols=STREAM_COLUMNS, dtype=dtypes, chunksize=chunksize):
+        chunk["Backup Day"] = pd.to_datetime(chunk["Backup Day"], format=BACKUP_DAY_FORMAT)
+        for column in ["Customer", "Status"]:
+            chunk[column] = chunk[column].astype("category")
+        canonicalize_hosts(chunk, index)
+
+        daily_increment, client_increment = chunk_tables(chunk)
+        daily = _accumulate(daily, daily_increment)
+        clients = _accumulate(clients, client_increment)
+        rows += len(chunk)
+
+    seconds = time.perf_counter() - started
+    count_columns = OUTCOMES + ["Total_Jobs", "KB/Sec_Count"]
+    for table in (daily, clients):
+        if table is not None:
+            table[count_columns] = table[count_columns].astype("int64")
+    return {
+        "daily": daily.sort_index() if daily is not None else None,
+        "clients": clients.sort_index() if clients is not None else None,
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds else float("nan"),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def account_daily_sla(streamed, account):
+    """Return an account's per-day table in the same shape as aggregate.daily_sla"""
+    daily = streamed["daily"].xs(account, level="Customer")[OUTCOMES + ["Total_Jobs"]]
+    daily = add_rates(daily.copy())
+    daily = daily[daily["Total_Jobs"] > 0].reset_index()
+    return daily.rename(columns={"Backup Day": "Backup Date"})
+
+
+def account_client_sla(streamed, account):
+    """Return an account's per-client table in the same shape as aggregate.client_sla"""
+    clients = streamed["clients"].xs(account, level="Customer")[OUTCOMES + ["Total_Jobs"]]
+    clients = add_rates(clients.copy())
+    return clients[clients["Total_Jobs"] > 0].reset_index()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream-aggregate a BUR export with bounded memory")
+    parser.add_argument("export", help="BUR SLA REPORT CSV file")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args(argv)
+
+    streamed = stream_aggregates(args.export, args.chunksize, args.cache_dir)
+    peak = streamed["peak_rss_mb"]
+    print(f"{streamed['rows']} rows in {streamed['seconds']:.2f}s "
+          f"({streamed['rows_per_sec']:,.0f} rows/s), peak RSS "
+          f"{f'{peak:.0f} MB' if peak is not None else 'unavailable'}")
+    totals = streamed["daily"].groupby(level="Customer", observed=True)[["Total_Jobs", "Success"]].sum()
+    totals["SLA"] = totals["Success"] / totals["Total_Jobs"] * 100
+    print(totals.to_string())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""Synthetic BUR SLA REPORT exports for load and scale testing
+
+Writes files in the export's exact column layout and date formats, e.g.::
+
+    python -m bsr.synthetic synthetic.csv --rows 10000000 --hosts 50000 --seed 7
+
+Rows are generated in fixed-size chunks across worker processes. Every chunk
+draws from its own stream seeded by (seed, chunk number), so the same seed and
+chunk size always produce the same file whatever the worker count.
+"""
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from functools import lru_cache
+
+import numpy as np
+
+from .cache import tmp_path_for
+from .config import ACCOUNTS
+
+EXPORT_COLUMNS = [
+    "Customer", "Business Unit", "Server", "Product", "Client", "Policy", "Group", "Job Type", "Job", "Status",
+    "Vendor Status", "Job ID", "Size", "Size Scanned", "Size Transferred", "KB/Sec", "Nbr Files",
+    "Start Date", "End Date", "Expiration Date", "Backup Day",
+]
+
+STATUSES = ["Success", "Partial", "Failure", "Progress"]
+DEFAULT_MIX = [0.94, 0.025, 0.03, 0.005]
+# Vendor status codes seen for each status in real exports
+VENDOR_STATUS_CODES = {
+    "Success": [0, 30000],
+    "Partial": [30005, 1],
+    "Failure": [48, 30901, 30902, 30010, 30999, 30910, 25, 63, 150, 42],
+    "Progress": [-1, 999999],
+}
+PRODUCTS = ["Veritas NetBackup", "EMC Avamar"]
+JOB_TYPES = ["Differential Incr Backup", "Scheduled Backup", "Full Backup", "On-Demand Backup", "Application Backup"]
+JOB_TYPE_WEIGHTS = [0.59, 0.255, 0.145, 0.0075, 0.0025]
+JOBS = [
+    "ALL_LOCAL_DRIVES", "Windows File System-/ServerFileDD", "/", "/var", "/usr", "/opt",
+    "AIX File System-/ServerFileDD", "/stand", "Windows VSS-/Windows VSS Dataset",
+]
+# Raw host spellings the canonicalization rules have to handle
+HOST_STYLES = ["{}", "{}.ad.corp.global", "{}.AD.CORP.GLOBAL", "{}-bu1"]
+# Policy names carry their scheduled start like "Daily_30day_9PM_EST_FS"; the rest have no time in their name
+TIMED_POLICY_SHARE = 0.8
+POLICY_SUFFIXES = ["", "_FS", "_VSS", "_OS"]
+
+DEFAULT_ROWS = 1_000_000
+DEFAULT_HOSTS = 5_000
+DEFAULT_POLICIES = 200
+# About 30 MB of CSV text per chunk
+DEFAULT_CHUNK_ROWS = 100_000
+DEFAULT_START = "2024-10-01"
+DEFAULT_DAYS = 31
+DEFAULT_RETENTION_DAYS = 30
+JOB_ID_BASE = 9_100_000_000_000_000
+HOST_STREAM = 0
+
+
+def date_labels(start, days):
+    """Return the "Oct 1, 2024 " timestamp prefixes and "01-Oct-2024" backup days for each day offset"""
+    dates = [date.fromisoformat(start) + timedelta(days=offset) for offset in range(days)]
+    prefixes = np.array([f"{d:%b} {d.day}, {d.year} " for d in dates], dtype=object)
+    backup_days = np.array([f"{d:%d-%b-%Y}" for d in dates], dtype=object)
+    return prefixes, backup_days
+
+
+@lru_cache(maxsize=1)
+def time_labels():
+    """Return the "9:00:56 PM" label of every second of the day"""
+    seconds = np.arange(86400)
+    hours = seconds // 3600
+    return np.array([
+        f"{hour % 12 or 12}:{minute:02d}:{second:02d} {'AM' if hour < 12 else 'PM'}"
+        for hour, minute, second in zip(hours, seconds // 60 % 60, seconds % 60)
+    ], dtype=object)
+
+
+@lru_cache(maxsize=1)
+def host_catalog(seed, hosts, policies, accounts, failure_skew):
+    """Return the per-host attributes shared by every chunk"""
+    rng = np.random.default_rng([seed, HOST_STREAM])
+    servers = max(hosts // 40, 1)
+    server_product = rng.integers(len(PRODUCTS), size=servers)
+    server = rng.integers(servers, size=hosts)
+
+    # A lognormal multiplier with mean 1 concentrates failures on a minority of hosts
+    failure_weight = rng.lognormal(0, failure_skew, size=hosts) if failure_skew > 0 else np.ones(hosts)
+    failure_weight /= failure_weight.mean()
+
+    style = rng.integers(len(HOST_STYLES), size=hosts)
+    # Scheduled policy starts between 6 PM and 10 PM
+    policy_hour = rng.integers(18, 23, size=policies)
+    policy_timed = rng.random(policies) < TIMED_POLICY_SHARE
+    policy_suffix = rng.integers(len(POLICY_SUFFIXES), size=policies)
+    policy = rng.integers(policies, size=hosts)
+    # Hosts of a timed policy start within 25 minutes of its schedule, so their jobs (with up to 5 minutes of
+    # per-job jitter) start within the half hour; the others start between 6 PM and 11 PM
+    start_second = np.where(
+        policy_timed[policy],
+        policy_hour[policy] * 3600 + rng.integers(0, 1500, size=hosts),
+        rng.integers(18 * 3600, 23 * 3600, size=hosts)
+    )
+    return {
+        "customer": rng.integers(len(accounts), size=hosts),
+        "client_names": np.array([HOST_STYLES[s].format(f"host{i:06d}") for i, s in enumerate(style)], dtype=object),
+        "server": server,
+        "server_names": np.array([f"bkpsrv{i:04d}" for i in range(servers)], dtype=object),
+        "product": server_product[server],
+        "policy": policy,
+        "policy_names": np.array([
+            f"Daily_30day_{hour - 12}PM_EST{POLICY_SUFFIXES[suffix]}_{i:04d}" if timed else f"Daily_30day_{i:04d}"
+            for i, (hour, timed, suffix) in enumerate(zip(policy_hour, policy_timed, policy_suffix))
+        ], dtype=object),
+        "job_type": rng.choice(len(JOB_TYPES), size=hosts, p=JOB_TYPE_WEIGHTS),
+        "job": rng.integers(len(JOBS), size=hosts),
+        # Per-host start time, typical size and duration
+        "start_second": start_second,
+        "size_gb": rng.lognormal(-4, 2.5, size=hosts),
+        "duration_seconds": rng.lognormal(6, 1.2, size=hosts),
+        "failure_weight": failure_weight,
+    }
+
+
+def _category(codes, labels):
+    import pyarrow as pa
+
+    return pa.DictionaryArray.from_arrays(pa.array(codes.astype("int32")), pa.array(labels, type=pa.string()))
+
+
+def generate_chunk(chunk, first_row, rows, seed, hosts, policies, accounts, mix, failure_skew, start, days,
+                   retention_days):
+    """Generate one chunk of export rows and return it as CSV bytes without a header"""
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    catalog = host_catalog(seed, hosts, policies, accounts, failure_skew)
+    rng = np.random.default_rng([seed, chunk + 1])
+
+    host = rng.integers(hosts, size=rows)
+    day = rng.integers(days, size=rows)
+    start_second = np.minimum(catalog["start_second"][host] + rng.integers(0, 300, size=rows), 86399)
+
+    # Failures and partials scale with the host's failure weight, the rest of the mix is unskewed
+    weight = catalog["failure_weight"][host]
+    _, partial, failure, progress = np.asarray(mix, dtype="float64") / np.sum(mix)
+    p_failure = np.minimum(failure * weight, 0.9)
+    p_partial = np.minimum(partial * weight, 0.9 - p_failure)
+    draw = rng.random(rows)
+    status = np.select(
+        [draw < p_failure, draw < p_failure + p_partial, draw < p_failure + p_partial + progress],
+        [2, 1, 3], default=0
+    )
+    vendor_status = np.zeros(rows, dtype="int64")
+    pick = rng.random(rows)
+    for code, name in enumerate(STATUSES):
+        codes = np.array(VENDOR_STATUS_CODES[name])
+        mask = status == code
+        vendor_status[mask] = codes[(pick[mask] * len(codes)).astype("int64")]
+
+    # Failed jobs stop early and move less data
+    scale = np.where(status == 2, rng.uniform(0.01, 0.3, size=rows), 1.0)
+    duration = np.maximum(catalog["duration_seconds"][host] * rng.lognormal(0, 0.3, size=rows) * scale, 1)
+    size_gb = catalog["size_gb"][host] * rng.lognormal(0, 0.3, size=rows) * scale
+    kb_per_sec = size_gb * 1024 ** 2 / duration
+    running = status == 3
+
+    start_total = day * 86400 + start_second
+    end_total = start_total + duration.astype("int64")
+    prefixes, backup_days = date_labels(start, days + retention_days + 2)
+    times = time_labels()
+    end_labels = prefixes[end_total // 86400] + times[end_total % 86400]
+    expiration_labels = prefixes[day + retention_days + 1] + times[3 * 3600]
+
+    table = pa.table({
+        "Customer": _category(catalog["customer"][host], np.array(accounts, dtype=object)),
+        "Business Unit": _category(np.zeros(rows), np.array(["Undefined"], dtype=object)),
+        "Server": _category(catalog["server"][host], catalog["server_names"]),
+        "Product": _category(catalog["product"][host], np.array(PRODUCTS, dtype=object)),
+        "Client": _category(host, catalog["client_names"]),
+        "Policy": _category(catalog["policy"][host], catalog["policy_names"]),
+        "Group": _category(catalog["policy"][host], catalog["policy_names"]),
+        "Job Type": _category(catalog["job_type"][host], np.array(JOB_TYPES, dtype=object)),
+        "Job": _category(catalog["job"][host], np.array(JOBS, dtype=object)),
+        "Status": _category(status, np.array(STATUSES, dtype=object)),
+        "Vendor Status": vendor_status,
+        "Job ID": JOB_ID_BASE + first_row + np.arange(rows, dtype="int64"),
+        "Size": np.round(size_gb, 9),
+        "Size Scanned": pa.nulls(rows, pa.float64()),
+        "Size Transferred": pa.nulls(rows, pa.float64()),
+        "KB/Sec": pa.array(np.round(kb_per_sec, 6), mask=running),
+        "Nbr Files": rng.poisson(np.maximum(size_gb * 2000, 1)).astype("int64"),
+        "Start Date": pa.array(prefixes[day] + times[start_second]),
+        "End Date": pa.array(end_labels, mask=running),
+        "Expiration Date": pa.array(expiration_labels),
+        "Backup Day": _category(day, backup_days[:days]),
+    })
+    sink = pa.BufferOutputStream()
+    pacsv.write_csv(table, sink, pacsv.WriteOptions(include_header=False, quoting_style="needed"))
+    return sink.getvalue().to_pybytes()
+
+
+def generate_export(path, rows=DEFAULT_ROWS, hosts=DEFAULT_HOSTS, policies=DEFAULT_POLICIES, accounts=None,
+                    mix=None, failure_skew=1.0, seed=0, start=DEFAULT_START, days=DEFAULT_DAYS,
+                    retention_days=DEFAULT_RETENTION_DAYS, chunk_rows=DEFAULT_CHUNK_ROWS, max_workers=None,
+                    window=None):
+    """Write a synthetic export of the given size and return the number of bytes written"""
+    accounts = tuple(accounts or ACCOUNTS)
+    mix = tuple(mix or DEFAULT_MIX)
+    chunks = [(chunk, min(chunk_rows, rows - chunk * chunk_rows)) for chunk in range(-(-rows // chunk_rows))]
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = tmp_path_for(path)
+    with open(tmp_path, "wb") as f, ProcessPoolExecutor(max_workers=max_workers) as pool:
+        f.write((",".join(EXPORT_COLUMNS) + "\n").encode())
+        # At most window chunks are rendered and held in memory at once, one per worker by default
+        window = window or max_workers or os.cpu_count() or 1
+        pending = deque()
+        for chunk, chunk_size in chunks:
+            pending.append(pool.submit(
+                generate_chunk, chunk, chunk * chunk_rows, chunk_size, seed, hosts, policies, accounts, mix,
+                failure_skew, start, days, retention_days))
+            if len(pending) >= window:
+                f.write(pending.popleft().result())
+        while pending:
+            f.write(pending.popleft().result())
+    os.replace(tmp_path, path)
+    return os.path.getsize(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write a synthetic BUR SLA REPORT export")
+    parser.add_argument("output", help="CSV file to write")
+    parser.add_argument("--rows", type=int, default=DEFAULT_ROWS)
+    parser.add_argument("--hosts", type=int, default=DEFAULT_HOSTS)
+    parser.add_argument("--policies", type=int, default=DEFAULT_POLICIES)
+    parser.add_argument("--accounts", nargs="*", help="Customer names (default: the configured accounts)")
+    parser.add_argument("--mix", type=float, nargs=4, default=DEFAULT_MIX, metavar=("SUCCESS", "PARTIAL",
+                        "FAILURE", "PROGRESS"), help="Relative share of each job status")
+    parser.add_argument("--failure-skew", type=float, default=1.0,
+                        help="Spread of per-host failure rates (0 spreads failures evenly)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", default=DEFAULT_START, help="First backup day (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, default=DEFAULT_DAYS)
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--window", type=int, default=None,
+                        help="Chunks held in memory at once (default: one per worker)")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    size = generate_export(
+        args.output, args.rows, args.hosts, args.policies, args.accounts, args.mix, args.failure_skew,
+        args.seed, args.start, args.days, chunk_rows=args.chunk_rows, max_workers=args.workers,
+        window=args.window
+    )
+    seconds = time.perf_counter() - started
+    print(f"Wrote {args.rows:,} rows ({size / 1024 ** 2:,.0f} MB) to {args.output} in {seconds:.1f}s "
+          f"({size / 1024 ** 2 / seconds:,.0f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Job-level and hourly throughput and duration series, downsampled for charts
+
+Series with millions of jobs are reduced on the server before plotting:
+largest-triangle-three-buckets (LTTB) keeps the visual shape of a line and
+min-max bucketing keeps every spike, so the figure sent to the browser never
+holds more than ``max_points`` points.
+"""
+import numpy as np
+import pandas as pd
+
+from .compact import job_timestamps
+
+# About two points per horizontal pixel of a full-width chart
+MAX_CHART_POINTS = 2000
+# Series longer than this are drawn with WebGL traces
+WEBGL_THRESHOLD = 1000
+
+SERIES_COLUMNS = ["Start Date", "KB/Sec", "Duration_Min"]
+
+
+def job_series(jobs):
+    """Return one row per job with its start time, throughput and duration in minutes, sorted by start"""
+    start = job_timestamps(jobs, "Start Date").to_numpy()
+    duration = (job_timestamps(jobs, "End Date").to_numpy() - start) / np.timedelta64(1, "m")
+    series = pd.DataFrame({
+        "Start Date": start,
+        "KB/Sec": jobs["KB/Sec"].to_numpy(dtype="float64"),
+        "Duration_Min": duration,
+    })
+    series = series[~np.isnat(start)]
+    return series.sort_values("Start Date", kind="stable").reset_index(drop=True)
+
+
+def hourly_series(series):
+    """Aggregate a job series to one row per hour of job start"""
+    hours = series["Start Date"].dt.floor("h")
+    hourly = series.groupby(hours, sort=True).agg(
+        Jobs=("KB/Sec", "size"),
+        **{"KB/Sec": ("KB/Sec", "mean")},
+        Duration_Min=("Duration_Min", "mean"),
+        Max_Duration_Min=("Duration_Min", "max"),
+    )
+    return hourly.rename_axis("Start Date").reset_index()
+
+
+def lttb_indices(x, y, threshold):
+    """Return the indices of the points largest-triangle-three-buckets keeps"""
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    # Bucket i spans bounds[i]:bounds[i + 1]; the first and last points are always kept
+    every = (n - 2) / (threshold - 2)
+    bounds = np.floor(np.arange(threshold - 1) * every).astype(np.int64) + 1
+    bounds[-1] = n - 1
+    lengths = np.diff(bounds)
+    avg_x = np.append(np.add.reduceat(x[:n - 1], bounds[:-1]) / lengths, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:n - 1], bounds[:-1]) / lengths, y[-1])
+
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    a = 0
+    for i in range(threshold - 2):
+        start, end = bounds[i], bounds[i + 1]
+        # Keep the point forming the largest triangle with the last kept point and the next bucket's mean
+        area = np.abs(
+            (x[a] - avg_x[i + 1]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (avg_y[i + 1] - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    return selected
+
+
+def minmax_indices(y, max_points):
+    """Return the indices of each bucket's minimum and maximum, at most max_points in total"""
+    n = len(y)
+    buckets = max(max_points // 2, 1)
+    if n <= max_points:
+        return np.arange(n)
+
+    # Pad to equal-sized buckets so the arg-reductions run over a 2-D view
+    size = -(-n // buckets)
+    buckets = -(-n // size)
+    padded = np.full(buckets * size, np.nan)
+    padded[:n] = y
+    padded = padded.reshape(buckets, size)
+    offsets = np.arange(buckets) * size
+    keep = np.concatenate([offsets + np.nanargmin(padded, axis=1), offsets + np.nanargmax(padded, axis=1)])
+    return np.unique(keep)
+
+
+def downsample(series, x_column, y_column, max_points=MAX_CHART_POINTS, method="lttb"):
+    """Reduce a series to at most max_points rows with LTTB or min-max bucketing"""
+    series = series[series[y_column].notna()]
+    if len(series) <= max_points:
+        return series
+    y = series[y_column].to_numpy(dtype="float64")
+    if method == "minmax":
+        indices = minmax_indices(y, max_points)
+    else:
+        x = series[x_column].to_numpy().astype("int64").astype("float64")
+        indices = lttb_indices(x, y, max_points)
+    return series.iloc[indices]
@@ -0,0 +1,149 @@
+"""Offline training of the per-account XGBoost SLA regressor
+
+Run as a batch job, e.g.::
+
+    python -m bsr.training "BUR SLA REPORT_Oct24.csv"
+"""
+import argparse
+import json
+import os
+import pickle
+import time
+
+import numpy as np
+
+from .aggregate import jobs_for_account
+from .cache import tmp_path_for
+from .features import FEATURE_COLUMNS, MIN_TRAINING_DAYS, TARGET_COLUMN, training_frame
+from .ingest import load_jobs
+from .predict import (
+    DEFAULT_MODEL_DIR, LATEST_FILE, METADATA_FILE, MODEL_FILE, SCALER_FILE, account_model_dir
+)
+from .tuning import format_params
+
+# Parameters used when no tuned parameters are supplied
+DEFAULT_PARAMS = {
+    "colsample_bytree": 1.0,
+    "learning_rate": 0.1,
+    "max_depth": 3,
+    "n_estimators": 200,
+    "subsample": 1.0,
+}
+
+
+def fit_model(X, y, params):
+    """Fit a scaler and XGBoost regressor on a feature matrix"""
+    from sklearn.preprocessing import StandardScaler
+    from xgboost import XGBRegressor
+
+    scaler = StandardScaler().fit(X)
+    model = XGBRegressor(**params, random_state=42)
+    model.fit(scaler.transform(X), y)
+    return model, scaler
+
+
+def train_account(jobs, account, params=None, test_size=0.2, search=None):
+    """Train a model for one account and return it with its scaler and metadata"""
+    from sklearn.model_selection import train_test_split
+
+    params = dict(DEFAULT_PARAMS, **(params or {}))
+    frame = training_frame(jobs_for_account(jobs, account))
+    if len(frame) < MIN_TRAINING_DAYS:
+        raise ValueError(f"{account}: only {len(frame)} training days, need at least {MIN_TRAINING_DAYS}")
+
+    X = frame[FEATURE_COLUMNS].to_numpy(dtype="float64")
+    y = frame[TARGET_COLUMN].to_numpy(dtype="float64")
+
+    # Hold out a test split for the reported error, then refit on every day
+    test_mae = None
+    if len(frame) * test_size >= 1:
+        X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=test_size, random_state=42)
+        model, scaler = fit_model(X_train, y_train, params)
+        test_mae = float(np.abs(model.predict(scaler.transform(X_test)) - y_test).mean())
+    model, scaler = fit_model(X, y, params)
+
+    metadata = {
+        "account": account,
+        "features": FEATURE_COLUMNS,
+        "target": TARGET_COLUMN,
+        "params": params,
+        "best_params": format_params(params),
+        "feature_importances": dict(zip(FEATURE_COLUMNS, map(float, model.feature_importances_))),
+        "training_days": len(frame),
+        "first_day": str(frame["Backup Date"].min().date()),
+        "last_day": str(frame["Backup Date"].max().date()),
+        "test_mae": test_mae,
+    }
+    if search is not None:
+        metadata["search"] = search
+    return model, scaler, metadata
+
+
+def new_version_dir(account_dir):
+    """Create a version directory no other training run can share and return its version"""
+    now = time.time_ns()
+    # Microsecond timestamps sort chronologically; a numbered suffix separates runs in the same microsecond
+    stamp = time.strftime("%Y%m%dT%H%M%S", time.localtime(now // 10 ** 9)) + f"{now // 1000 % 10 ** 6:06d}"
+    os.makedirs(account_dir, exist_ok=True)
+    version, attempt = stamp, 0
+    while True:
+        try:
+            os.makedirs(os.path.join(account_dir, version), exist_ok=False)
+            return version
+        except FileExistsError:
+            attempt += 1
+            version = f"{stamp}-{attempt}"
+
+
+def save_artifacts(account, model, scaler, metadata, model_dir=DEFAULT_MODEL_DIR):
+    """Write a new model version and point the account's LATEST file at it"""
+    account_dir = account_model_dir(account, model_dir)
+    version = new_version_dir(account_dir)
+    version_dir = os.path.join(account_dir, version)
+
+    model.save_model(os.path.join(version_dir, MODEL_FILE))
+    with open(os.path.join(version_dir, SCALER_FILE), "wb") as f:
+        pickle.dump(scaler, f)
+    metadata = dict(metadata, version=version, trained_at=time.strftime("%Y-%m-%d %H:%M:%S"))
+    with open(os.path.join(version_dir, METADATA_FILE), "w") as f:
+        json.dump(metadata, f, indent=2)
+
+    # Publish the version only once every artifact is on disk
+    tmp_path = tmp_path_for(os.path.join(account_dir, LATEST_FILE))
+    with open(tmp_path, "w") as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(account_dir, LATEST_FILE))
+    return version
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train per-account SLA models from a BUR export")
+    parser.add_argument("export", help="BUR SLA REPORT CSV file")
+    parser.add_argument("--accounts", nargs="*", help="Accounts to train (default: every Customer in the export)")
+    parser.add_argument("--model-dir", default=DEFAULT_MODEL_DIR)
+    parser.add_argument("--tune", action="store_true", help="Search hyperparameters before training")
+    parser.add_argument("--budget", type=float, default=None, help="Wall-clock search budget per account in seconds")
+    parser.add_argument("--workers", type=int, default=None, help="Search worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    jobs = load_jobs(args.export)
+    accounts = args.accounts or sorted(jobs["Customer"].dropna().unique())
+    for account in accounts:
+        try:
+            params, search = None, None
+            if args.tune:
+                from .tuning import DEFAULT_BUDGET_SECONDS, tune_account
+                budget = args.budget if args.budget is not None else DEFAULT_BUDGET_SECONDS
+                params, search = tune_account(jobs, account, budget_seconds=budget, max_workers=args.workers)
+                print(f"{account}: {len(search['trials'])} trials in {search['elapsed_seconds']:.1f}s, "
+                      f"best {format_params(params)}")
+            model, scaler, metadata = train_account(jobs, account, params=params, search=search)
+        except ValueError as e:
+            print(f"Skipping {e}")
+            continue
+        version = save_artifacts(account, model, scaler, metadata, args.model_dir)
+        print(f"{account}: saved model {version} ({metadata['training_days']} days, test MAE {metadata['test_mae']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Budgeted successive-halving hyperparameter search for the SLA regressor"""
+import itertools
+import math
+import os
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+import numpy as np
+
+from .aggregate import jobs_for_account
+from .features import FEATURE_COLUMNS, MIN_TRAINING_DAYS, TARGET_COLUMN, training_frame
+
+# Same grid the offline results were produced from
+PARAM_GRID = {
+    "colsample_bytree": [0.8, 1.0],
+    "learning_rate": [0.01, 0.1, 0.3],
+    "max_depth": [3, 5, 7],
+    "n_estimators": [100, 200],
+    "subsample": [0.8, 1.0],
+}
+
+# Each round keeps the best 1/ETA candidates and gives them ETA times more trees
+ETA = 3
+MIN_TREES = 10
+DEFAULT_FOLDS = 5
+DEFAULT_BUDGET_SECONDS = float(os.environ.get("BSR_TUNING_BUDGET_SECONDS", "300"))
+
+# CV folds for the account being tuned, set once per worker process
+_worker_folds = None
+
+
+def grid_candidates(grid=PARAM_GRID):
+    """Expand a parameter grid into a list of parameter dicts"""
+    keys = sorted(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def format_params(params):
+    """Format parameters like the "Best XGBoost Parameters" value in the results files"""
+    return str({key: params[key] for key in sorted(params)})
+
+
+def build_folds(frame, n_folds=DEFAULT_FOLDS, seed=42):
+    """Split an account's training frame into scaled CV folds once, for reuse by every trial"""
+    from sklearn.model_selection import KFold
+    from sklearn.preprocessing import StandardScaler
+
+    X = frame[FEATURE_COLUMNS].to_numpy(dtype="float64")
+    y = frame[TARGET_COLUMN].to_numpy(dtype="float64")
+    folds = []
+    for train_idx, test_idx in KFold(n_splits=min(n_folds, len(frame)), shuffle=True, random_state=seed).split(X):
+        scaler = StandardScaler().fit(X[train_idx])
+        folds.append((scaler.transform(X[train_idx]), y[train_idx], scaler.transform(X[test_idx]), y[test_idx]))
+    return folds
+
+
+def _init_worker(folds):
+    global _worker_folds
+    _worker_folds = folds
+
+
+def evaluate_params(params, n_estimators, folds=None, deadline=None):
+    """Return the mean CV absolute error of one candidate trained with n_estimators trees
+
+    The error is None when the ``time.monotonic()`` deadline passes first, which
+    stops training after the current boosting round rather than finishing the trial.
+    """
+    from xgboost import XGBRegressor
+    from xgboost.callback import TrainingCallback
+
+    class StopAtDeadline(TrainingCallback):
+        def after_iteration(self, model, epoch, evals_log):
+            return time.monotonic() >= deadline
+
+    folds = folds if folds is not None else _worker_folds
+    callbacks = [StopAtDeadline()] if deadline is not None else None
+    started = time.perf_counter()
+    errors = []
+    for X_train, y_train, X_test, y_test in folds:
+        # One thread per model, the process pool provides the parallelism
+        model = XGBRegressor(**dict(params, n_estimators=n_estimators), n_jobs=1, random_state=42,
+                             callbacks=callbacks)
+        model.fit(X_train, y_train)
+        if deadline is not None and time.monotonic() >= deadline:
+            return None, time.perf_counter() - started
+        errors.append(np.abs(model.predict(X_test) - y_test).mean())
+    return float(np.mean(errors)), time.perf_counter() - started
+
+
+def _run_round(pool, workers, candidates, fraction, deadline, round_number, trials):
+    """Score one round's candidates, appending every finished trial, and return the scores by candidate index"""
+    queued = deque(enumerate(candidates))
+    running = {}
+    scores = {}
+    while queued or running:
+        # One trial per worker in flight, and none started once the budget is spent
+        while queued and len(running) < workers and time.monotonic() < deadline:
+            index, params = queued.popleft()
+            n_estimators = max(MIN_TREES, int(params["n_estimators"] * fraction))
+            # The monotonic clock is system-wide, so workers stop themselves at the same deadline
+            running[pool.submit(evaluate_params, params, n_estimators, deadline=deadline)] = (index, n_estimators)
+        remaining = deadline - time.monotonic()
+        if not running or remaining <= 0:
+            break
+        done, _ = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+        for future in done:
+            index, n_estimators = running.pop(future)
+            score, seconds = future.result()
+            if score is None:
+                continue
+            scores[index] = score
+            trials.append({
+                "round": round_number,
+                "params": candidates[index],
+                "n_estimators_trained": n_estimators,
+                "cv_mae": score,
+                "seconds": seconds,
+            })
+    return scores
+
+
+def successive_halving(folds, candidates=None, budget_seconds=DEFAULT_BUDGET_SECONDS, max_workers=None):
+    """Search candidates with successive halving on a process pool within a wall-clock budget"""
+    candidates = candidates if candidates is not None else grid_candidates()
+    n_rounds = max(1, math.ceil(math.log(len(candidates), ETA)))
+    workers = max_workers or os.cpu_count() or 1
+    deadline = time.monotonic() + budget_seconds
+    trials = []
+    best = None
+
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(folds,))
+    try:
+        for round_number in range(n_rounds + 1):
+            # Early rounds train a fraction of each candidate's trees, the last round trains all of them
+            fraction = ETA ** (round_number - n_rounds)
+            scores = _run_round(pool, workers, candidates, fraction, deadline, round_number, trials)
+            if not scores:
+                break
+
+            ranked = sorted(scores, key=scores.get)
+            best = {"params": candidates[ranked[0]], "cv_mae": scores[ranked[0]], "round": round_number}
+            if len(ranked) == 1 or time.monotonic() >= deadline:
+                break
+            candidates = [candidates[i] for i in ranked[:max(1, len(ranked) // ETA)]]
+            if len(candidates) == 1:
+                # A lone survivor is the winner, scoring it again would not change the result
+                break
+    finally:
+        # Queued trials are cancelled and running ones stop within one boosting round of the deadline
+        pool.shutdown(wait=True, cancel_futures=True)
+
+    return best, trials
+
+
+def tune_account(jobs, account, budget_seconds=DEFAULT_BUDGET_SECONDS, max_workers=None, n_folds=DEFAULT_FOLDS):
+    """Tune one account's regressor and return the best parameters with the search record"""
+    started = time.perf_counter()
+    frame = training_frame(jobs_for_account(jobs, account))
+    if len(frame) < MIN_TRAINING_DAYS:
+        raise ValueError(f"{account}: only {len(frame)} training days, need at least {MIN_TRAINING_DAYS}")
+    folds = build_folds(frame, n_folds)
+    best, trials = successive_halving(folds, budget_seconds=budget_seconds, max_workers=max_workers)
+    search = {
+        "method": "successive_halving",
+        "eta": ETA,
+        "folds": len(folds),
+        "budget_seconds": budget_seconds,
+        "elapsed_seconds": time.perf_counter() - started,
+        "best_cv_mae": best["cv_mae"] if best else None,
+        "best_round": best["round"] if best else None,
+        "trials": trials,
+    }
+    return (best["params"] if best else None), search
@@ -1,14 +1,27 @@
 import streamlit as st
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import StandardScaler
-from xgboost import XGBRegressor
-from datetime import datetime
 import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from PIL import Image
+import time
+from bsr.account import account_forecast, account_view, cached_distinct_values
+from bsr.aggregate import calculate_required_sla
+from bsr.config import ACCOUNTS, DEFAULT_MIN_HOST_JOBS, MIN_HOST_JOBS_OPTIONS, SNAPSHOT_WORKER_THREAD
+from bsr.cache import dataset_cache, figure_cache
+from bsr.charts import (
+    client_health_summary, create_client_health_chart, create_concurrency_chart, create_daily_outcome_chart,
+    create_duration_chart, create_duration_distribution_chart, create_failure_pareto_chart,
+    create_historical_sla_chart, create_regional_sla_chart, create_risk_distribution_chart, create_sla_forecast_chart,
+    create_sla_trend_chart, create_stage_timeline_chart, create_throughput_chart, create_ytd_sla_chart, daily_sla_stats, host_status_table
+)
+from bsr.cube import DRILL_DIMENSIONS, failure_pareto, rollup, slice_cube
+from bsr.forecast import cumulative_sla
+from bsr.history import monthly_sla, regional_sla
+from bsr.profiling import PROMETHEUS_FILE, activate, prometheus_text, stage, write_prometheus
+from bsr.query import DEFAULT_QUERY_COLUMNS, DEFAULT_QUERY_LIMIT, has_duckdb, query_jobs, run_sql
+from bsr.snapshot import read_latest_snapshot, refresh_account, start_worker
+from bsr.sketch import DEFAULT_QUANTILES, sketch_quantiles
+from bsr.timeseries import MAX_CHART_POINTS, hourly_series
 
 # Set page configuration
 st.set_page_config(
@@ -177,7 +190,7 @@ left_col, right_col = st.columns([6, 1])
 st.sidebar.header("Account Selection")
 selected_account = st.sidebar.selectbox(
     "Select Account",
-    [ "Trane Technologies", "Ingersoll Rand Company", "Otis", "Xchanging", "CIBC"]
+    ACCOUNTS
 )
 
 dark_theme_css = """
@@ -211,25 +224,6 @@ with right_col:
 # Add debug mode in sidebar
 debug_mode = st.sidebar.checkbox("Debug Mode", False)
 
-# Update the plotly chart themes to be compatible with both light and dark modes
-def update_plot_theme(fig):
-    """Update plot theme for compatibility with both light and dark modes"""
-    fig.update_layout(
-        plot_bgcolor='rgba(0,0,0,0)',
-        paper_bgcolor='rgba(0,0,0,0)',
-        font_color='var(--text-color)',
-        xaxis=dict(
-            gridcolor='rgba(128,128,128,0.2)',
-            zerolinecolor='rgba(128,128,128,0.2)'
-        ),
-        yaxis=dict(
-            gridcolor='rgba(128,128,128,0.2)',
-            zerolinecolor='rgba(128,128,128,0.2)'
-        )
-    )
-    return fig
-
-
 # Region Name selection with filtering based on account
 def get_regions_for_account(account):
     # Define region mappings for each account
@@ -251,119 +245,44 @@ worst_clients_count = st.sidebar.selectbox(
     "Number of Worst Performing Hosts",
     list(range(5, 61, 5))  # Creates list [5, 10, 15, 20, 25, 30, 35, 40, 45, 50]
 )
-# Sample random client names for demonstration
-sample_client_names = [
-    "igrdssndc002", "Hpuxmgmt-bu01", "ccpvlndct307.ad.corp.global", "igrscmndc001.ad.corp.global", "IGRSCMNDC001.AD.CORP.GLOBAL", "spare009-bu1", "igrsnmnwh001.ad.corp.global", "igrdssndc007-3.ad.corp.global", "igrdssndc002.ad.corp.global", "laxeu18b", "IGRDSSNDC001.AD.CORP.GLOBAL", "igrdbsndc815-bu1", "bwd-tv-psfinprd-bu1", "IGRDSSNDC002.AD.CORP.GLOBAL", "TRNDCSP1-bu01", "igrdssndc001.ad.corp.global", "igrdssndc007-2.ad.corp.global", "ccpvlnwhavr01.ad.corp.global", "TRNDCSP4-bu01", "TRNDCSP5-bu01",
-    "ukitwxubworaa01", "ukitwxudwvdd601", "ukitwxubwvd001", "ukimdlmawcvdp53", "ukimdlmawcvdp54", "ukimdlmawcvdp55", "ukimdlmawcvdp56", "ukitwlmawcvdp04", "ukimdlmawcvdu02", "ukitwxubwofsc01", "ukitwtobedge01", "ukitwxubedge01", "ukitwxubwadsd02", "ukitwxubwadsd04", "ukitwxubwc001", "ukitwxubwrdsd01", "ukitwlmawcvdp05", "ukitwaobwcmtt01", "ukitwaobwcmtu01", "ukitwxubworad01", 
-    "orobua02.otis.com", "ofrard04.otis.com", "ofrgna1k", "ofrgna1d.otis.com", "ofrark09.otis.com", "ofrard03.otis.com", "ONLOMD01.otis.com", "onlomd01.otis.com", "OBEDIA0K", "oczbra0c", "OFRGNA1D.otis.com", "OATVAD0E.otis.com", "ochfra0g.otis.com", "OBEDIA0J", "oplwza08.otis.com", "oplwza07.otis.com", "OBEDIA0M", "ositrf02.otis.com", "OBEDIA0L", "oczbra0a.otis.com"
-]
-
-def parse_numeric_percentage(value):
-    """Convert percentage string to float"""
-    if isinstance(value, str):
-        return float(value.strip('%'))
-    return value
-
-def calculate_required_sla(current_sla, target_sla, days_processed, days_remaining):
-    """Calculate required SLA for remaining days to meet target"""
-    total_days = days_processed + days_remaining
-    required_success_rate = (target_sla * total_days - current_sla * days_processed) / days_remaining
-    return min(max(required_success_rate, 0), 100)
-
+# Hosts with fewer jobs than this are left out of the worst performing list
+min_host_jobs = st.sidebar.selectbox(
+    "Minimum Jobs per Host",
+    MIN_HOST_JOBS_OPTIONS,
+    index=MIN_HOST_JOBS_OPTIONS.index(DEFAULT_MIN_HOST_JOBS)
+)
 def load_and_process_file():
     """Load and process CSV file from system based on selected account"""
     if debug_mode:
         st.write("Starting file processing...")
     
     try:
-        # Define file mapping for each account
-        file_mapping = {
-            "Trane Technologies": "SLA_Prediction_Results_20241009.csv",
-            "Xchanging": "SLA_Prediction_Results_20241024.csv",
-            "Otis": "SLA_Prediction_Results_20241010.csv",
-            "CIBC": "Customer_SLA_Prediction_Results_20241013(1).csv",
-            "Ingersoll Rand Company": "SLA_Prediction_Results_20241009.csv"  # Using default file
-        }
-        
-        # Get the appropriate file path based on selected account
-        file_path = file_mapping.get(selected_account)
-        
-        if debug_mode:
-            st.write(f"Loading file: {file_path}")
-        
-        # Read the results file from system
-        results_df = pd.read_csv(file_path)
-        
-        if debug_mode:
-            st.write("File contents:")
-            st.write(results_df)
+        # Read the latest published snapshot; only the very first start builds one in this rerun
+        with stage("snapshot read"):
+            snapshot = read_latest_snapshot(selected_account)
+        if snapshot is None:
+            with st.spinner("Building the first snapshot for this account..."):
+                refresh_account(selected_account)
+            with stage("snapshot read"):
+                snapshot = read_latest_snapshot(selected_account)
+        if snapshot is None:
+            raise FileNotFoundError(f"No results file configured for {selected_account}")
+        meta, account_data = snapshot
 
-        # Rest of the processing remains the same
-        current_sla = parse_numeric_percentage(
-            results_df[results_df['Metric'] == 'Current Month SLA']['Value'].iloc[0]
-        )
+        # Worst host selection and forecasts live in the UI-free bsr package
+        with stage("account view"):
+            processed_data = account_view(
+                selected_account, meta['file_path'], ('snapshot', selected_account, meta['version']),
+                account_data, worst_clients_count, min_host_jobs
+            )
+        processed_data['raw_export'] = meta['raw_export']
+        processed_data['snapshot'] = meta
+        results = processed_data['results']
         
-        days_processed = int(
-            results_df[results_df['Metric'] == 'Days Processed in Current Month']['Value'].iloc[0]
-        )
-        
-        days_remaining = int(
-            results_df[results_df['Metric'] == 'Days Remaining in Current Month']['Value'].iloc[0]
-        )
-        
-        predicted_sla = parse_numeric_percentage(
-            results_df[results_df['Metric'] == 'Predicted Current Month SLA (XGBoost)']['Value'].iloc[0]
-        )
-        
-        # Calculate required SLA for remaining days
-        target_sla = 99.0  # Default target, can be updated from UI
-        required_sla = calculate_required_sla(current_sla, target_sla, days_processed, days_remaining)
-        
-        # Extract worst performing hosts
-        worst_clients = results_df[results_df['Metric'].str.contains('Worst Performing Client', na=False)]
-        
-        # Generate random worst performing hosts based on selection
-        np.random.seed(42)  # For reproducibility
-        selected_clients = np.random.choice(sample_client_names, size=worst_clients_count, replace=False)
-        worst_clients_data = []
-        
-        for client in selected_clients:
-            sla = np.random.uniform(85, 98)
-            total_jobs = np.random.randint(100, 1000)
-            worst_clients_data.append({
-                'Metric': f'Worst Performing Hosts ',
-                'Value': f'{client} (SLA: {sla:.1f}%, Total Jobs: {total_jobs})'
-            })
-        
-        worst_clients = pd.DataFrame(worst_clients_data)
-        
-        # Create synthetic daily data for visualization
-        dates = pd.date_range(
-            start=datetime.now().replace(day=1),
-            periods=days_processed,
-            freq='D'
-        )
-        
-        daily_data = pd.DataFrame({
-            'Backup Date': dates,
-            'SLA': np.linspace(current_sla-5, current_sla, len(dates))  # Synthetic SLA trend
-        })
-
-        # Structure the data for dashboard
-        processed_data = {
-            'current_sla': current_sla,
-            'predicted_sla': predicted_sla,
-            'days_processed': days_processed,
-            'days_remaining': days_remaining,
-            'daily_data': daily_data,
-            'worst_clients': worst_clients
-        }
-
         if debug_mode:
-            st.write("Processed data:")
-            st.write(processed_data)
+            st.write(f"Loading file: {processed_data['file_path']}")
 
-        return processed_data, results_df
+        return processed_data, results
     
     except Exception as e:
         if debug_mode:
@@ -372,101 +291,58 @@ def load_and_process_file():
         else:
             st.error("Error processing the file. Please check if the file exists and has the correct format.")
         return None, None
-    
-    # Apply this to all your chart creation functions
-def create_sla_trend_chart(daily_data):
-    fig = px.line(
-        daily_data,
-        x='Backup Date',
-        y='SLA',
-        title='Daily Success Rate 🏆'
-    )
-    fig = update_plot_theme(fig)
-    return fig
 
-def create_sla_trend_chart(daily_data):
-    """Create SLA trend chart"""
-    # Ensure 'Backup Date' is in datetime format
-    daily_data['Backup Date'] = pd.to_datetime(daily_data['Backup Date'])
-
-    # Create the figure
-    fig = px.line(
-        daily_data,
-        x='Backup Date',
-        y='SLA',
-        title='Daily Success Rate 🏆'
-    )
-    
-    fig.update_layout(
-        xaxis_title="Date",
-        yaxis_title="SLA (%)",
-        showlegend=True,
-        height=400,
-        title_font_size=24
-    )
+def profiled_build(builder, *args):
+    """Run a chart or table builder as a profiled stage"""
+    rows = len(args[0]) if args and hasattr(args[0], '__len__') else None
+    with stage(builder.__name__, rows=rows):
+        return builder(*args)
 
-    
-    # Create tick labels with ordinals and month/day format
-    daily_data['Ordinal Date'] = daily_data['Backup Date'].dt.strftime('%b %d')
-    
-    fig.update_xaxes(
-        tickvals=daily_data['Backup Date'],
-        ticktext=daily_data['Ordinal Date'],
-        tickangle=45  # Optional: angle the ticks for better readability
-    )
-    
-    return fig
-    
-    # Create tick labels with ordinals and month/day format
-    daily_data['Ordinal Date'] = daily_data['Backup Date'].dt.strftime('%b %d')
-    
-    fig.update_xaxes(
-        tickvals=daily_data['Backup Date'],
-        ticktext=daily_data['Ordinal Date'],
-        tickangle=45  # Optional: angle the ticks for better readability
-    )
-    
-    return fig
+def cached_figure(key, builder, *args):
+    """Build a figure once per key, reusing it across reruns and sessions"""
+    return figure_cache().get_or_load(key, lambda: profiled_build(builder, *args))
+
+def cached_table(key, builder, *args):
+    """Build a derived table once per key, reusing it across reruns and sessions"""
+    return dataset_cache().get_or_load(('view',) + key, lambda: profiled_build(builder, *args))
+
+def display_debug_panel(profiler, processed_data):
+    """Display per-stage timings, cache and memory details for this rerun"""
+    with st.expander("⏱️ Pipeline Profile", expanded=True):
+        timings = profiler.table()
+        st.dataframe(
+            timings.assign(
+                stage=['\u00a0' * 4 * depth + name for depth, name in zip(timings['depth'], timings['stage'])],
+                ms=timings['seconds'] * 1000
+            )[['stage', 'ms', 'rows', 'memory_delta_mb']],
+            use_container_width=True
+        )
+        st.plotly_chart(create_stage_timeline_chart(timings), use_container_width=True, key="stage_timeline")
+        st.download_button(
+            "Download Prometheus metrics",
+            prometheus_text(timings, {'account': selected_account}),
+            file_name="bsr_stages.prom",
+            mime="text/plain"
+        )
+        st.write("Cache stats:", dataset_cache().stats())
+        if processed_data['job_memory'] is not None:
+            st.write("Job table memory per column:")
+            st.dataframe(processed_data['job_memory'])
 
 def create_client_performance_chart(worst_clients):
     """Create host performance chart with color-coding based on job count and separate right legend"""
-    host_data = []
-    
-    # Process each row from worst_clients
-    for _, row in worst_clients.iterrows():
-        try:
-            value_str = row['Value']
-            host_name = value_str.split(' (SLA:')[0]
-            sla_part = value_str.split('SLA: ')[1]
-            sla = float(sla_part.split('%')[0])
-            total_jobs_part = value_str.split('Total Jobs: ')[1]
-            total_jobs = float(total_jobs_part.split(')')[0])
-            
-            host_data.append({
-                'Host': host_name,
-                'SLA': sla,
-                'Total_Jobs': total_jobs
-            })
-        except Exception as e:
-            if 'debug_mode' in globals() and debug_mode:
-                st.error(f"Error processing row {value_str}: {str(e)}")
-            continue
-    
-    if not host_data:
+    if worst_clients.empty:
         st.error("No valid host data found")
         return go.Figure()
     
-    df = pd.DataFrame(host_data)
+    df = worst_clients.rename(columns={'Client': 'Host'})
     
     # Create color array based on Total_Jobs values
-    colors = []
-    for jobs in df['Total_Jobs']:
-        if jobs < 400:
-            colors.append('red')
-        elif jobs < 600:
-            colors.append('yellow')
-        else:
-            colors.append('green')
+    colors = np.select(
+        [df['Total_Jobs'] < 400, df['Total_Jobs'] < 600],
+        ['red', 'yellow'],
+        default='green'
+    )
     
     # Create the bar chart with increased width
     fig = go.Figure()
@@ -511,7 +387,6 @@ def create_client_performance_chart(worst_clients):
         xaxis_title="Host",
         yaxis_title="SLA (%)",
         height=600,
-        width=1200,  # Increased overall width
         xaxis_tickangle=45,
         xaxis_tickfont={'size': 12},
         yaxis_tickfont={'size': 12},
@@ -530,8 +405,7 @@ def create_client_performance_chart(worst_clients):
             range=[0, 100]
         ),
         bargap=0.15,  # Adjusted gap between bars
-        showlegend=True,
-        autosize=False  # Disable autosize to enforce width
+        showlegend=True
     )
     
     return fig
@@ -550,24 +424,7 @@ def display_client_performance_tab(processed_data):
     
     # Host Details Table
     st.subheader("Detailed Host Status")
-    host_data = []
-    for _, row in processed_data['worst_clients'].iterrows():
-        value_str = row['Value']
-        host_name = value_str.split(' (SLA:')[0]
-        sla = float(value_str.split('SLA: ')[1].split('%')[0])
-        value_str = value_str.split('Total Jobs: ')[1].split(',')[0]
-        clean_value_str = ''.join([c for c in value_str if c.isdigit() or c == '.'])
-        total_jobs = float(clean_value_str)
-        host_data.append({
-            'Host Name': host_name,
-            'Current SLA': f"{sla:.2f}%",
-            'Total Jobs': int(total_jobs),
-            'Status': '🔴' if sla < 95 else '🟡' if sla < 98 else '🟢',
-            'Risk Level': 'High' if sla < 95 else 'Medium' if sla < 98 else 'Low',
-            'Action Required': 'Immediate' if sla < 95 else 'Monitor' if sla < 98 else 'None'
-        })
-    
-    df = pd.DataFrame(host_data)
+    df = host_status_table(processed_data['worst_clients'], 'Host Name')
     st.dataframe(df, use_container_width=True)
     
     # Risk Distribution
@@ -579,26 +436,6 @@ def display_client_performance_tab(processed_data):
     )
     st.plotly_chart(fig, key="risk_distribution_pie")
 
-def create_historical_sla_chart(current_sla):
-    """Create historical SLA comparison chart"""
-    historical_data = pd.DataFrame({
-        'Month': ['Jun', 'Jul', 'Aug', 'Sep', 'Oct'],
-        'SLA': [99.2, 98.9, 99.1, 98.8, current_sla]
-    })
-    fig = px.line(
-        historical_data,
-        x='Month',
-        y='SLA',
-        markers=True,
-        title='Monthly SLA Comparison'
-    )
-    fig.update_layout(
-        height=400,
-        yaxis_title="SLA (%)",
-        showlegend=False
-    )
-    return fig
-
 def display_overview_tab(processed_data, target_sla):
     """Display Overview tab content"""
     # Title with icon and larger font
@@ -697,32 +534,104 @@ def display_overview_tab(processed_data, target_sla):
 
     # Current Month Trend
     st.plotly_chart(
-        create_sla_trend_chart(processed_data['daily_data']),
+        cached_figure(('sla_trend', processed_data['data_key']), create_sla_trend_chart, processed_data['daily_data']),
         use_container_width=True,
         key="overview_sla_trend"
     )
 
+    # Month-end forecast simulated from this month's daily volumes and success rates
+    forecast = account_forecast(
+        processed_data['data_key'], processed_data['daily_data'], processed_data['days_remaining'], target_sla
+    )
+    if forecast is not None:
+        percentiles = forecast['percentiles']
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric(f"Chance of Meeting {target_sla:g}%", f"{forecast['probability']:.0%}")
+        with col2:
+            st.metric("Median Month-End SLA", f"{percentiles[50]:.2f}%")
+        with col3:
+            st.metric("90% Range", f"{percentiles[5]:.2f}% – {percentiles[95]:.2f}%")
+        if not forecast['bands'].empty:
+            st.plotly_chart(
+                cached_figure(
+                    ('sla_forecast', processed_data['data_key'], target_sla), create_sla_forecast_chart,
+                    cumulative_sla(processed_data['daily_data']), forecast
+                ),
+                use_container_width=True,
+                key="overview_sla_forecast"
+            )
+
 def display_trends_tab(processed_data):
     """Display Trends tab content"""
     st.header("📊 Trends Analysis")
     
     # Daily Stats
     st.subheader("📈 Daily Statistics")
-    daily_stats = processed_data['daily_data'].describe()
-    col1, col2, col3 = st.columns(3)
-    with col1:
-        st.metric("Average Daily SLA", f"{daily_stats['SLA']['mean']:.2f}%")
-    with col2:
-        st.metric("Minimum Daily SLA", f"{daily_stats['SLA']['min']:.2f}%")
-    with col3:
-        st.metric("Maximum Daily SLA", f"{daily_stats['SLA']['max']:.2f}%")
+    daily_data = processed_data['daily_data']
+    if daily_data.empty:
+        st.info("No raw job data available for this account.")
+    else:
+        stats = cached_table(('daily_stats', processed_data['data_key']), daily_sla_stats, daily_data)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("Average Daily SLA", f"{stats['mean']:.2f}%")
+        with col2:
+            st.metric("Minimum Daily SLA", f"{stats['min']:.2f}%")
+        with col3:
+            st.metric("Maximum Daily SLA", f"{stats['max']:.2f}%")
+
+        st.plotly_chart(
+            cached_figure(('daily_outcomes', processed_data['data_key']), create_daily_outcome_chart, daily_data),
+            use_container_width=True,
+            key="daily_outcome_chart"
+        )
+
+    # Throughput and duration, downsampled on the server so the chart payload stays bounded
+    job_series = processed_data['job_series']
+    if not job_series.empty:
+        st.subheader("⏱️ Throughput & Duration")
+        resolution = st.radio("Resolution", ["Hourly", "Job-level"], horizontal=True, key="series_resolution")
+        series = job_series
+        if resolution == "Hourly":
+            series = cached_table(('hourly_series', processed_data['data_key']), hourly_series, job_series)
+        for chart_key, builder in [('throughput_chart', create_throughput_chart), ('duration_chart', create_duration_chart)]:
+            st.plotly_chart(
+                cached_figure((chart_key, processed_data['data_key'], resolution, MAX_CHART_POINTS), builder, series, MAX_CHART_POINTS),
+                use_container_width=True,
+                key=chart_key
+            )
+
+        # Percentiles merged from the per-day sketches stored at ingest, for any grouping and date range
+        st.subheader("📦 Throughput & Size Percentiles")
+        col1, col2 = st.columns(2)
+        with col1:
+            group_by = st.multiselect("Group by", ["Server", "Product", "Policy"], default=["Server"],
+                                      key="percentile_group_by")
+        with col2:
+            first_day, last_day = daily_data['Backup Date'].min().date(), daily_data['Backup Date'].max().date()
+            days = st.date_input("Backup days", (first_day, last_day), min_value=first_day, max_value=last_day,
+                                 key="percentile_days")
+        start, end = (days[0], days[-1]) if days else (first_day, last_day)
+        st.dataframe(
+            cached_table(
+                ('percentiles', processed_data['data_key'], tuple(group_by), str(start), str(end)),
+                sketch_quantiles, processed_data['sketches'], group_by, DEFAULT_QUANTILES, str(start), str(end)
+            ),
+            use_container_width=True
+        )
     
-    # Historical comparison
-    st.plotly_chart(
-        create_historical_sla_chart(processed_data['current_sla']),
-        use_container_width=True,
-        key="historical_sla_comparison"
-    )
+    # Historical comparison from the monthly rollups of the history store
+    monthly_history = processed_data['monthly_history']
+    if monthly_history is None or monthly_history.empty:
+        st.info("No monthly history stored for this account yet.")
+    else:
+        monthly = cached_table(('monthly_sla', processed_data['data_key']), monthly_sla, monthly_history)
+        st.plotly_chart(
+            cached_figure(('historical_sla', processed_data['data_key']), create_historical_sla_chart, monthly),
+            use_container_width=True,
+            key="historical_sla_comparison"
+        )
     
 
 def display_client_performance_tab(processed_data):
@@ -739,36 +648,180 @@ def display_client_performance_tab(processed_data):
     
     # Client Details Table
     st.subheader("Detailed Host Status")
-    client_data = []
-    for _, row in processed_data['worst_clients'].iterrows():
-        value_str = row['Value']
-        client_name = value_str.split(' (SLA:')[0]
-        sla = float(value_str.split('SLA: ')[1].split('%')[0])
-        #total_jobs = float(value_str.split('Total Jobs: ')[1].split(',')[0])
-        value_str = value_str.split('Total Jobs: ')[1].split(',')[0]
-        clean_value_str = ''.join([c for c in value_str if c.isdigit() or c == '.'])
-        total_jobs = float(clean_value_str)
-        client_data.append({
-            'Client Name': client_name,
-            'Current SLA': f"{sla:.2f}%",
-            'Total Jobs': int(total_jobs),
-            'Status': '🔴' if sla < 95 else '🟡' if sla < 98 else '🟢',
-            'Risk Level': 'High' if sla < 95 else 'Medium' if sla < 98 else 'Low',
-            'Action Required': 'Immediate' if sla < 95 else 'Monitor' if sla < 98 else 'None'
-        })
-    
-    df = pd.DataFrame(client_data)
+    df = cached_table(
+        ('host_status', processed_data['data_key'], worst_clients_count, min_host_jobs),
+        host_status_table,
+        processed_data['worst_clients'],
+        'Client Name'
+    )
     st.dataframe(df, use_container_width=True)
     
     # Risk Distribution
-    risk_dist = df['Risk Level'].value_counts()
-    fig = px.pie(
-        values=risk_dist.values,
-        names=risk_dist.index,
-        title='Host Risk Distribution'
+    fig = cached_figure(
+        ('risk_distribution', processed_data['data_key'], worst_clients_count, min_host_jobs),
+        create_risk_distribution_chart,
+        df['Risk Level']
     )
     st.plotly_chart(fig, key="risk_distribution_pie")
 
+def display_capacity_tab(processed_data):
+    """Display Capacity tab content"""
+    st.header("🗄️ Capacity")
+
+    capacity = processed_data['capacity']
+    if capacity is None:
+        st.info("No job start and end times are available for this account in the raw export.")
+        return
+    data_key = processed_data['data_key']
+
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Jobs Analysed", f"{capacity['jobs']:,}")
+    with col2:
+        peak = capacity['peaks'].iloc[0] if len(capacity['peaks']) else None
+        st.metric("Peak Concurrent Jobs", f"{peak['Peak_Running']:,}" if peak is not None else "n/a",
+                  help=f"On {peak['Server']} at {peak['Peak_Time']:%b %d %H:%M}" if peak is not None else None)
+    with col3:
+        st.metric("Window Overruns", f"{len(capacity['overruns']):,}")
+    with col4:
+        st.metric("Backup Window", f"{capacity['window_hours']:g} h")
+
+    # Running jobs per media server from the sweep over job start and end times
+    st.plotly_chart(
+        cached_figure(('concurrency', data_key), create_concurrency_chart,
+                      capacity['timeline'], capacity['peaks'], MAX_CHART_POINTS),
+        use_container_width=True,
+        key="capacity_concurrency"
+    )
+    st.dataframe(capacity['peaks'], use_container_width=True)
+
+    st.subheader("Job Durations")
+    st.plotly_chart(
+        cached_figure(('duration_distribution', data_key), create_duration_distribution_chart, capacity['durations']),
+        use_container_width=True,
+        key="capacity_durations"
+    )
+    st.dataframe(capacity['durations'], use_container_width=True)
+
+    st.subheader("Jobs Overrunning their Backup Window")
+    st.dataframe(
+        capacity['overruns'][['Server', 'Policy', 'Client', 'Start', 'End', 'Window_Close', 'Overrun_Min']].head(500),
+        use_container_width=True
+    )
+
+def sidebar_drill_filters(cube):
+    """Display the drill-down filters in the sidebar and return the chosen values and backup day range"""
+    with st.sidebar.expander("🔎 Drill-down Filters"):
+        # Keys include the account so choices from another account never linger as invalid options
+        filters = {
+            dimension: st.multiselect(dimension, sorted(cube[dimension].unique()),
+                                      key=f"drill_{selected_account}_{dimension}")
+            for dimension in DRILL_DIMENSIONS
+        }
+        if cube.empty:
+            return filters, None, None
+        first_day, last_day = cube['Backup Day'].min().date(), cube['Backup Day'].max().date()
+        days = st.date_input("Backup days", (first_day, last_day), min_value=first_day, max_value=last_day,
+                             key=f"drill_{selected_account}_days")
+    start, end = (days[0], days[-1]) if days else (first_day, last_day)
+    return filters, str(start), str(end)
+
+def display_drilldown_tab(processed_data, cube, filters, start, end):
+    """Display Drill-down tab content"""
+    st.header("🔎 Drill-down")
+    if cube.empty:
+        st.info("No raw job data available for this account.")
+        return
+
+    # Every figure here is a sum over the ingested rollup cube, never over the raw jobs
+    sliced = slice_cube(cube, filters, start, end)
+    totals = rollup(sliced, [])
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Jobs", f"{totals['Total_Jobs'].iloc[0]:,}")
+    with col2:
+        sla = totals['SLA'].iloc[0]
+        st.metric("SLA", f"{sla:.2f}%" if pd.notna(sla) else "n/a")
+    with col3:
+        st.metric("Unsuccessful Jobs", f"{totals['Total_Jobs'].iloc[0] - totals['Success'].iloc[0]:,}")
+    with col4:
+        st.metric("Total Size", f"{totals['Size'].iloc[0]:,.1f}")
+
+    dimension = st.radio("Break down by", DRILL_DIMENSIONS, horizontal=True, key="drill_dimension")
+    slice_key = (processed_data['data_key'], dimension, tuple((k, tuple(v)) for k, v in filters.items()), start, end)
+    pareto = cached_table(('failure_pareto',) + slice_key, failure_pareto, sliced, dimension)
+    if pareto.empty:
+        st.success("No unsuccessful jobs in this slice.")
+        return
+    st.plotly_chart(
+        cached_figure(('failure_pareto',) + slice_key, create_failure_pareto_chart, pareto, dimension),
+        use_container_width=True,
+        key="failure_pareto"
+    )
+    st.dataframe(
+        pareto[[dimension, 'Total_Jobs', 'Success', 'Partial', 'Failure', 'SLA', 'Unsuccessful', 'Cumulative_Share']],
+        use_container_width=True
+    )
+
+def display_explore_tab(processed_data):
+    """Display Explore tab content"""
+    st.header("🧭 Explore")
+    st.caption("Ad-hoc filters over the full job history, read straight from the partitioned Parquet job store.")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        daily_data = processed_data['daily_data']
+        default_days = (daily_data['Backup Date'].min().date(), daily_data['Backup Date'].max().date()) \
+            if not daily_data.empty else ()
+        days = st.date_input("Backup days", default_days, key="explore_days")
+        statuses = st.multiselect("Status", cached_distinct_values("Status"), key="explore_status")
+    with col2:
+        vendor_codes = st.text_input("Vendor Status codes", placeholder="e.g. 30000, 30005", key="explore_vendor")
+        groups = st.multiselect("Group", cached_distinct_values("Group"), key="explore_group")
+    with col3:
+        client_pattern = st.text_input("Client pattern", placeholder="e.g. igr*ndc*", key="explore_client")
+        only_account = st.checkbox(f"Only {selected_account}", True, key="explore_only_account")
+    columns = st.multiselect("Columns", DEFAULT_QUERY_COLUMNS, default=DEFAULT_QUERY_COLUMNS, key="explore_columns")
+
+    try:
+        vendor_statuses = [int(code) for code in vendor_codes.replace(',', ' ').split()]
+    except ValueError:
+        st.error("Vendor Status codes must be whole numbers separated by commas.")
+        return
+
+    started = time.perf_counter()
+    with stage("explore query") as record:
+        jobs = query_jobs(
+            start=days[0] if days else None,
+            end=days[-1] if days else None,
+            statuses=statuses,
+            vendor_statuses=vendor_statuses,
+            groups=groups,
+            client_pattern=client_pattern.strip() or None,
+            accounts=[selected_account] if only_account else None,
+            columns=columns or None
+        )
+        record['rows'] = len(jobs)
+    limited = " (limit reached)" if len(jobs) >= DEFAULT_QUERY_LIMIT else ""
+    st.caption(f"{len(jobs):,} jobs{limited} in {time.perf_counter() - started:.3f} s")
+    st.dataframe(jobs, use_container_width=True)
+    st.download_button("Download CSV", jobs.to_csv(index=False), file_name="bsr_jobs.csv", mime="text/csv")
+
+    # Free SQL over the same files, available with the DuckDB engine
+    if has_duckdb():
+        with st.expander("SQL"):
+            sql = st.text_area(
+                "Query the jobs view",
+                'SELECT Status, "Vendor Status", count(*) AS jobs FROM jobs GROUP BY ALL ORDER BY jobs DESC',
+                key="explore_sql"
+            )
+            if st.button("Run", key="explore_run_sql"):
+                # run_sql rejects anything but a single SELECT, on a connection limited to the job store
+                try:
+                    st.dataframe(run_sql(sql), use_container_width=True)
+                except Exception as e:
+                    st.error(f"Query failed: {e}")
+
 def display_sla_info_tab():
 
     """Display SLA Information tab content"""
@@ -819,79 +872,73 @@ def display_sla_info_tab():
     """)
 
             
-def display_account_summary_tab():
+def account_insights(ytd, regional, health):
+    """Summarize the account's YTD, regional and client health figures as short statements"""
+    insights = []
+    ytd_jobs = ytd['Total_Jobs'].sum()
+    if ytd_jobs:
+        ytd_sla = ytd['Success'].sum() / ytd_jobs * 100
+        insights.append(f"Year-to-date SLA is {ytd_sla:.2f}% over {ytd_jobs:,} jobs")
+    if len(ytd) > 1:
+        change = ytd['SLA'].iloc[-1] - ytd['SLA'].iloc[-2]
+        direction = "up" if change >= 0 else "down"
+        insights.append(
+            f"{ytd['Month_Name'].iloc[-1]} is {direction} {abs(change):.2f} points on {ytd['Month_Name'].iloc[-2]}"
+        )
+    if len(regional) > 1:
+        best = regional.loc[regional['SLA'].idxmax()]
+        worst = regional.loc[regional['SLA'].idxmin()]
+        insights.append(f"{best['Region']} leads the regions at {best['SLA']:.2f}%, {worst['Region']} trails at {worst['SLA']:.2f}%")
+    clients = health['Client Count'].sum()
+    if clients:
+        healthy = health.loc[health['Status'] == 'Healthy', 'Client Count'].iloc[0]
+        critical = health.loc[health['Status'] == 'Critical', 'Client Count'].iloc[0]
+        insights.append(f"{healthy / clients:.0%} of clients are in healthy status")
+        insights.append(f"{critical} clients require immediate attention due to critical status")
+    return insights
+
+def display_account_summary_tab(processed_data):
     """Display Account Summary tab content"""
     st.header("🏢 Account Level SLA Summary")
+    data_key = processed_data['data_key']
+    monthly_history = processed_data['monthly_history']
+    if monthly_history is None or monthly_history.empty:
+        st.info("No history stored for this account yet. It is filled when a raw export is ingested.")
+        return
     
     # Account Health Summary
     st.subheader("🏥 Account Health Summary")
-    health_data = pd.DataFrame({
-        'Status': ['Healthy', 'At Risk', 'Critical'],
-        'Client Count': [120, 20, 5],
-        'Description': [
-            'Meeting or exceeding SLA targets',
-            'Showing signs of degradation',
-            'Immediate attention required'
-        ]
-    })
-    #st.dataframe(health_data, use_container_width=True)
-    
-    # Visualizing the Account Health Summary with a pie chart
-    health_fig = go.Figure(data=[go.Pie(
-        labels=health_data['Status'],
-        values=health_data['Client Count'],
-        hole=0.4,  # Makes it a donut chart
-        textinfo='label+percent',
-        marker=dict(colors=['green', 'yellow', 'orange']),
-    )])
-    
-    st.plotly_chart(health_fig, use_container_width=True)
+    health = pd.DataFrame({'Status': ['Healthy', 'At Risk', 'Critical'], 'Client Count': [0, 0, 0]})
+    if processed_data['client_data'] is not None:
+        health = cached_table(('client_health', data_key), client_health_summary, processed_data['client_data'])
+        st.plotly_chart(
+            cached_figure(('client_health', data_key), create_client_health_chart, health),
+            use_container_width=True,
+            key="client_health_chart"
+        )
     
     # Regional Data
     st.subheader("🌎 Regional Performance")
-    regional_data = pd.DataFrame({
-        'Region': ['Americas', 'EMEA', 'APAC'],
-        'SLA': [98.9, 98.2, 98.5],
-        'Clients': [60, 45, 40]
-    })
-
-    # Pie Chart for SLA Distribution
-    fig = px.pie(
-        regional_data,
-        names='Region',
-        values='SLA',
-        title='Regional SLA Distribution',
-        hole=0.3  # Makes it a donut chart
+    regional = cached_table(('regional_sla', data_key), regional_sla, monthly_history)
+    st.plotly_chart(
+        cached_figure(('regional_sla', data_key), create_regional_sla_chart, regional),
+        use_container_width=True,
+        key="regional_sla_chart"
     )
-
-    st.plotly_chart(fig, use_container_width=True)
     
     # Year-to-Date Performance
     st.subheader("📈 Year-to-Date Performance")
-    ytd_data = pd.DataFrame({
-        'Month': ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct'],
-        'SLA': [99.1, 98.9, 98.7, 99.0, 98.8, 99.2, 98.9, 99.1, 98.8, 98.7]
-    })
-    
-    fig = px.line(
-        ytd_data,
-        x='Month',
-        y='SLA',
-        title='YTD SLA Trend',
-        markers=True
+    year = monthly_history['Month'].max()[:4]
+    ytd = cached_table(('ytd_sla', data_key), monthly_sla, monthly_history, year)
+    st.plotly_chart(
+        cached_figure(('ytd_sla', data_key), create_ytd_sla_chart, ytd),
+        use_container_width=True,
+        key="ytd_sla_chart"
     )
-    st.plotly_chart(fig, use_container_width=True)
-    
     
     # Key Insights
     st.subheader("🔍 Key Insights")
-    st.markdown("""
-    - Overall account performance remains strong at 98.7%
-    - Americas region shows highest consistency in meeting SLAs
-    - 83% of clients are in healthy status
-    - Year-to-date trend shows stable performance with minor fluctuations
-    - 5 clients require immediate attention due to critical status
-    """)
+    st.markdown("\n".join(f"- {insight}" for insight in account_insights(ytd, regional, health)))
 
 def main():
     """Main application function"""
@@ -902,37 +949,74 @@ def main():
     #target_sla = st.sidebar.slider("Target SLA (%)", 90.0, 100.0, 99.0, 0.1)
     st.sidebar.text("Target SLA (%): 99%")
     target_sla = 99.0
+
+    # Record every pipeline stage of this rerun
+    profiler = activate()
     
+    # Keep snapshots fresh in the background so reruns only read the latest one
+    if SNAPSHOT_WORKER_THREAD:
+        start_worker()
+
     # Load data directly from system
     with st.spinner("Processing data..."):
-        processed_data, results_df = load_and_process_file()
+        processed_data, results = load_and_process_file()
         
         if processed_data is not None:
-            # Create tabs
-            tab1, tab2, tab3, tab5 = st.tabs([
+            snapshot_age = (time.time() - processed_data['snapshot']['created_at']) / 60
+            st.sidebar.caption(f"Data snapshot {processed_data['snapshot']['version']} ({snapshot_age:.0f} min old)")
+            cube = processed_data['cube']
+            drill_filters, drill_start, drill_end = sidebar_drill_filters(cube)
+
+            # Create tabs; switching tabs reruns the script so only the open tab is built
+            tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
                 "📈 Overview",
                 "📊 Trends",
                 "🖥️ Host Performance",  # Updated this line
-                #"🏢 Account Summary",
+                "🏢 Account Summary",
+                "🔎 Drill-down",
+                "🧭 Explore",
+                "🗄️ Capacity",
                 "ℹ️ About SLA"
-            ])
+            ], key="active_tab", on_change="rerun")
             
-            with tab1:
-                display_overview_tab(processed_data, target_sla)
+            if tab1.open:
+                with tab1, stage("display_overview_tab"):
+                    display_overview_tab(processed_data, target_sla)
             
-            with tab2:
-                display_trends_tab(processed_data)
+            if tab2.open:
+                with tab2, stage("display_trends_tab"):
+                    display_trends_tab(processed_data)
             
-            with tab3:
-                display_client_performance_tab(processed_data)
+            if tab3.open:
+                with tab3, stage("display_client_performance_tab"):
+                    display_client_performance_tab(processed_data)
             
-            #with tab4:
-                #display_account_summary_tab()
+            if tab4.open:
+                with tab4, stage("display_account_summary_tab"):
+                    display_account_summary_tab(processed_data)
             
-            with tab5:
-                display_sla_info_tab()
+            if tab5.open:
+                with tab5, stage("display_drilldown_tab"):
+                    display_drilldown_tab(processed_data, cube, drill_filters, drill_start, drill_end)
+            
+            if tab6.open:
+                with tab6, stage("display_explore_tab"):
+                    display_explore_tab(processed_data)
+            
+            if tab7.open:
+                with tab7, stage("display_capacity_tab"):
+                    display_capacity_tab(processed_data)
+            
+            if tab8.open:
+                with tab8, stage("display_sla_info_tab"):
+                    display_sla_info_tab()
         else:
             st.error("Unable to load data. Please check if the file exists and has the correct format.")
+
+    if PROMETHEUS_FILE:
+        write_prometheus(PROMETHEUS_FILE, prometheus_text(profiler.table(), {'account': selected_account}))
+    if debug_mode and processed_data is not None:
+        display_debug_panel(profiler, processed_data)
             
     # Add floating footer
     st.markdown(
@@ -0,0 +1,48 @@
+"""Shared fixtures: the bundled October sample export and stores built from it"""
+import os
+import tempfile
+
+# Point every default store at a scratch directory before bsr reads its settings
+_scratch = tempfile.mkdtemp(prefix="bsr-tests-")
+for name, subdir in [("BSR_CACHE_DIR", "cache"), ("BSR_MODEL_DIR", "models"), ("BSR_RESULTS_DIR", "results"),
+                     ("BSR_SNAPSHOT_DIR", "snapshots")]:
+    os.environ[name] = os.path.join(_scratch, subdir)
+os.environ["BSR_SNAPSHOT_WORKER_THREAD"] = "0"
+
+import pytest  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE_EXPORT = os.path.join(ROOT, "BUR SLA REPORT_Oct24.csv")
+SAMPLE_ACCOUNT = "Trane Technologies"
+
+
+@pytest.fixture(scope="session")
+def sample_export():
+    return SAMPLE_EXPORT
+
+
+@pytest.fixture(scope="session")
+def jobs(tmp_path_factory):
+    """Typed, canonicalized job table of the sample export"""
+    from bsr.ingest import load_jobs
+
+    return load_jobs(SAMPLE_EXPORT, cache_dir=str(tmp_path_factory.mktemp("jobs-cache")))
+
+
+@pytest.fixture(scope="session")
+def store_dir(tmp_path_factory):
+    """Store directory after ingesting the sample export once"""
+    from bsr.incremental import ingest_export
+
+    store = str(tmp_path_factory.mktemp("store"))
+    ingest_export(SAMPLE_EXPORT, store_dir=store, cache_dir=store)
+    return store
+
+
+@pytest.fixture(autouse=True, scope="session")
+def repo_root():
+    """Run from the repository root, where the dashboard finds the sample results files"""
+    previous = os.getcwd()
+    os.chdir(ROOT)
+    yield ROOT
+    os.chdir(previous)
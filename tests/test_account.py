@@ -0,0 +1,28 @@
+from bsr.account import account_capacity, account_cube, account_sketches, cached_distinct_values, load_account
+
+
+def test_load_account(sample_export):
+    processed = load_account("Trane Technologies", worst_count=3, raw_export=sample_export)
+    assert processed["days_processed"] == 8
+    assert len(processed["worst_clients"]) == 3
+    assert processed["daily_data"]["Total_Jobs"].sum() > 0
+    # A second load reuses the cached aggregates
+    assert load_account("Trane Technologies", worst_count=3, raw_export=sample_export)["daily_data"] is \
+        processed["daily_data"]
+
+
+def test_account_store_readers(sample_export):
+    load_account("Trane Technologies", raw_export=sample_export)
+    assert account_capacity("Trane Technologies")["jobs"] > 0
+    assert set(account_cube("Trane Technologies")["Customer"]) == {"Trane Technologies"}
+    assert set(account_sketches("Trane Technologies")["Customer"]) == {"Trane Technologies"}
+
+
+def test_distinct_values_are_scanned_once_per_store_version(store_dir, monkeypatch):
+    import bsr.account
+
+    scans = []
+    monkeypatch.setattr(bsr.account, "distinct_values", lambda column, store_dir: scans.append(column) or ["x"])
+    assert cached_distinct_values("Status", store_dir) == ["x"]
+    assert cached_distinct_values("Status", store_dir) == ["x"]
+    assert scans == ["Status"]
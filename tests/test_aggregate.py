@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bsr.aggregate import (
+    OUTCOMES, calculate_required_sla, client_sla, current_month_jobs, daily_sla, group_codes, outcome_counts,
+    summarize_jobs
+)
+
+
+def groupby_counts(jobs, by):
+    """Outcome counts per group computed the straightforward pandas way"""
+    finished = jobs[jobs["Status"].isin(OUTCOMES)]
+    counts = finished.groupby(by + ["Status"], observed=True).size().unstack("Status", fill_value=0)
+    counts = counts.reindex(columns=OUTCOMES, fill_value=0)
+    counts["Total_Jobs"] = counts[OUTCOMES].sum(axis=1)
+    return counts.astype("int64")
+
+
+@pytest.mark.parametrize("by", [["Backup Day"], ["Client"], ["Customer", "Backup Day"],
+                                ["Customer", "Policy", "Job Type", "Backup Day"]])
+def test_outcome_counts_match_pandas_groupby(jobs, by):
+    counts = outcome_counts(jobs, by[0] if len(by) == 1 else by)
+    counts = counts[counts["Total_Jobs"] > 0].astype("int64")
+    expected = groupby_counts(jobs, by)
+    pd.testing.assert_frame_equal(plain_labels(counts), plain_labels(expected), check_names=False)
+
+
+def plain_labels(table):
+    """Return a count table with its group labels as plain columns, comparable across label dtypes"""
+    table = table.reset_index()
+    for column in table.columns[:-len(OUTCOMES) - 1]:
+        if not pd.api.types.is_datetime64_any_dtype(table[column]):
+            table[column] = table[column].astype(str)
+    table.columns = [str(column) for column in table.columns]
+    return table
+
+
+def test_group_codes_label_every_row(jobs):
+    codes, labels = group_codes(jobs, ["Customer", "Server"])
+    decoded = labels.take(codes).to_frame(index=False)
+    expected = jobs[["Customer", "Server"]].astype(str).reset_index(drop=True)
+    pd.testing.assert_frame_equal(decoded.astype(str), expected)
+
+
+def test_daily_and_client_sla_match_pandas(jobs):
+    daily = daily_sla(jobs).set_index("Backup Date")
+    expected = groupby_counts(jobs, ["Backup Day"])
+    np.testing.assert_allclose(daily["SLA"], expected["Success"] / expected["Total_Jobs"] * 100)
+    clients = client_sla(jobs).set_index("Client")
+    expected = groupby_counts(jobs, ["Client"])
+    np.testing.assert_allclose(clients.loc[expected.index, "SLA"], expected["Success"] / expected["Total_Jobs"] * 100)
+    # "Progress" jobs are still running and never counted
+    assert daily["Total_Jobs"].sum() == len(jobs) - (jobs["Status"] == "Progress").sum()
+
+
+def test_summarize_jobs(jobs):
+    summary = summarize_jobs(jobs)
+    assert summary["days_processed"] == 8
+    assert summary["days_remaining"] == 23
+    assert 0 < summary["current_sla"] < 100
+    assert client_sla(current_month_jobs(jobs))["Total_Jobs"].sum() == summary["total_jobs"]
+
+
+def test_calculate_required_sla():
+    assert calculate_required_sla(98.0, 99.0, 10, 0) == 0.0
+    assert calculate_required_sla(98.0, 99.0, 10, 10) == 100.0
+    assert calculate_required_sla(100.0, 99.0, 10, 10) == 98.0
@@ -0,0 +1,15 @@
+from bsr.batch import run_batch
+from bsr.results import latest_results_file, read_results
+
+
+def test_run_batch_writes_results_per_account(sample_export, tmp_path):
+    output_dir, model_dir = str(tmp_path / "results"), str(tmp_path / "models")
+    reports = run_batch([sample_export], output_dir, model_dir, accounts=["Trane Technologies", "Otis"],
+                        max_workers=2)
+    by_account = {report["account"]: report for report in reports}
+    assert by_account["Otis"]["error"] == "no jobs in the exports"
+    path = latest_results_file("Trane Technologies", output_dir)
+    assert by_account["Trane Technologies"]["path"] == path
+    record = read_results(path)
+    assert record["metrics"]["model_version"] is not None
+    assert len(record["hosts"]) == 5
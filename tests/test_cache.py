@@ -0,0 +1,31 @@
+import os
+
+import pandas as pd
+
+from bsr.cache import LRUCache, file_fingerprint, tmp_path_for
+
+
+def test_lru_cache_evicts_beyond_budget():
+    frame = pd.DataFrame({"x": range(1000)})
+    cache = LRUCache(frame.memory_usage(deep=True).sum() * 2)
+    for key in "abc":
+        cache.get_or_load(key, lambda: frame.copy())
+    assert "a" not in cache and "c" in cache
+    assert cache.get_or_load("c", lambda: None) is not None
+    assert cache.stats()["hits"] == 1
+
+
+def test_file_fingerprint_changes_on_rewrite(tmp_path):
+    path = tmp_path / "f.txt"
+    path.write_text("a")
+    before = file_fingerprint(str(path))
+    path.write_text("ab")
+    assert file_fingerprint(str(path)) != before
+    assert file_fingerprint(str(tmp_path / "missing"))[1] is None
+
+
+def test_tmp_paths_are_unique_per_writer(tmp_path):
+    path = str(tmp_path / "store.parquet")
+    first, second = tmp_path_for(path), tmp_path_for(path)
+    assert first != second
+    assert os.path.dirname(first) == str(tmp_path) and first.startswith(path) and first.endswith(".tmp")
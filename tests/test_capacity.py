@@ -0,0 +1,34 @@
+import numpy as np
+import pandas as pd
+
+from bsr.capacity import capacity_summary, job_intervals, running_jobs, schedule_hour
+
+
+def test_schedule_hour():
+    assert schedule_hour("Daily_30day_10PM_EST_VSS") == 22
+    assert schedule_hour("Weekly_9:30am") == 9.5
+    assert np.isnan(schedule_hour("Daily_30day"))
+
+
+def test_running_jobs_counts_overlaps():
+    jobs = pd.DataFrame({
+        "Server": ["a", "a", "a", "b"],
+        "Policy": ["p"] * 4,
+        "Client": ["c"] * 4,
+        "Start Date": pd.to_datetime(["2024-10-01 00:00", "2024-10-01 00:10", "2024-10-01 00:30",
+                                      "2024-10-01 00:00"]),
+        "End Date": pd.to_datetime(["2024-10-01 00:30", "2024-10-01 00:20", "2024-10-01 01:00",
+                                    "2024-10-01 02:00"]),
+    })
+    timeline = running_jobs(job_intervals(jobs))
+    peaks = timeline.groupby("Server", observed=True)["Running"].max()
+    # Touching jobs do not overlap, so server a peaks at 2
+    assert peaks.to_dict() == {"a": 2, "b": 1}
+    assert (timeline.groupby("Server", observed=True)["Running"].last() == 0).all()
+
+
+def test_capacity_summary(jobs):
+    summary = capacity_summary(jobs, window_hours=8)
+    assert summary["jobs"] == jobs["End Date"].notna().sum()
+    assert summary["durations"]["Jobs"].sum() == summary["jobs"]
+    assert (summary["overruns"]["Overrun_Min"] > 0).all()
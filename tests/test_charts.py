@@ -0,0 +1,33 @@
+from bsr import charts
+from bsr.aggregate import client_sla, daily_sla, jobs_for_account
+from bsr.capacity import capacity_summary
+from bsr.cube import failure_pareto, load_cube
+from bsr.forecast import cumulative_sla, simulate_month_end
+from bsr.history import load_monthly, monthly_sla, regional_sla
+from bsr.timeseries import job_series
+
+
+def test_every_tab_figure_builds(jobs, store_dir):
+    account_jobs = jobs_for_account(jobs, "Trane Technologies")
+    daily = daily_sla(account_jobs)
+    series = job_series(account_jobs)
+    capacity = capacity_summary(account_jobs)
+    monthly = load_monthly(store_dir)
+    figures = [
+        charts.create_sla_trend_chart(daily),
+        charts.create_sla_forecast_chart(cumulative_sla(daily.head(6)), simulate_month_end(daily.head(6), 11)),
+        charts.create_daily_outcome_chart(daily),
+        charts.create_throughput_chart(series, 500),
+        charts.create_duration_chart(series, 500),
+        charts.create_historical_sla_chart(monthly_sla(monthly)),
+        charts.create_ytd_sla_chart(monthly_sla(monthly, 2024)),
+        charts.create_regional_sla_chart(regional_sla(monthly)),
+        charts.create_client_health_chart(charts.client_health_summary(client_sla(account_jobs))),
+        charts.create_concurrency_chart(capacity["timeline"], capacity["peaks"], 500),
+        charts.create_duration_distribution_chart(capacity["durations"]),
+        charts.create_failure_pareto_chart(failure_pareto(load_cube(store_dir), ["Policy"]), "Policy"),
+    ]
+    for figure in figures:
+        assert figure.data
+        # Downsampled traces never send more points than asked for
+        assert all(len(trace.x) <= 2000 for trace in figure.data if getattr(trace, "x", None) is not None)
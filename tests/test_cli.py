@@ -0,0 +1,18 @@
+import json
+
+from bsr.cli import main
+
+
+def test_cli_json_report(sample_export, tmp_path):
+    output = tmp_path / "metrics.json"
+    assert main(["Trane Technologies", "--export", sample_export, "--format", "json", "--output", str(output)]) == 0
+    (report,) = json.loads(output.read_text())
+    assert report["account"] == "Trane Technologies"
+    assert report["days_processed"] == 8
+    assert len(report["worst_hosts"]) == 5
+
+
+def test_cli_csv_report(sample_export, capsys):
+    assert main(["Trane Technologies", "Ingersoll Rand Company", "--export", sample_export, "--format", "csv"]) == 0
+    lines = capsys.readouterr().out.strip().splitlines()
+    assert lines[0].startswith("account,") and len(lines) == 3
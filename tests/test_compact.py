@@ -0,0 +1,11 @@
+import pandas as pd
+
+from bsr.compact import compact_jobs, job_timestamps, memory_report
+
+
+def test_compact_jobs_keeps_values(jobs):
+    compact = compact_jobs(jobs)
+    assert memory_report(compact).loc["Total", "bytes"] < memory_report(jobs).loc["Total", "bytes"]
+    pd.testing.assert_series_equal(
+        job_timestamps(compact, "End Date").astype("datetime64[s]"),
+        jobs["End Date"].astype("datetime64[s]"), check_names=False)
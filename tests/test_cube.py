@@ -0,0 +1,53 @@
+import os
+
+import pandas as pd
+
+from bsr.aggregate import MISSING_LABEL, OUTCOMES
+from bsr.cube import build_cube, cube_path, failure_pareto, load_cube, rollup, slice_cube
+from bsr.incremental import ingest_export, load_daily_store
+
+
+def test_rollup_and_pareto(store_dir):
+    cube = load_cube(store_dir)
+    trane = slice_cube(cube, {"Customer": ["Trane Technologies"]}, start="2024-10-01", end="2024-10-05")
+    assert trane["Backup Day"].max() <= pd.Timestamp("2024-10-05")
+    by_policy = rollup(trane, "Policy")
+    assert by_policy["Total_Jobs"].sum() == trane["Total_Jobs"].sum()
+    pareto = failure_pareto(trane, ["Policy"])
+    assert pareto["Unsuccessful"].is_monotonic_decreasing
+    assert round(pareto["Cumulative_Share"].iloc[-1], 6) == 100
+
+
+def test_cube_totals_match_the_daily_store(store_dir):
+    cube = load_cube(store_dir)
+    store = load_daily_store(store_dir)
+    measures = OUTCOMES + ["Total_Jobs"]
+    assert (rollup(cube, []).loc[0, measures] == store[measures].sum()).all()
+    by_day = rollup(cube, ["Customer", "Backup Day"]).set_index(["Customer", "Backup Day"])[measures]
+    assert by_day.equals(store.set_index(["Customer", "Backup Day"])[measures].sort_index())
+
+
+def test_jobs_without_a_dimension_value_are_kept(jobs):
+    jobs = jobs.copy()
+    failed = (jobs["Status"] == "Failure").to_numpy().nonzero()[0][:5]
+    jobs.loc[jobs.index[failed], "Policy"] = None
+    cube = build_cube(jobs)
+    assert cube["Total_Jobs"].sum() == jobs["Status"].isin(OUTCOMES).sum()
+    missing = cube[cube["Policy"] == MISSING_LABEL]
+    assert missing["Failure"].sum() == len(failed) == missing["Total_Jobs"].sum()
+
+
+def test_missing_cube_is_rebuilt_from_every_stored_day(sample_export, tmp_path):
+    raw = pd.read_csv(sample_export, dtype=str, keep_default_na=False)
+    september, october = str(tmp_path / "september.csv"), str(tmp_path / "october.csv")
+    raw[raw["Backup Day"].str.endswith("Sep-2024")].to_csv(september, index=False)
+    raw[raw["Backup Day"].str.endswith("Oct-2024")].to_csv(october, index=False)
+    store_dir = str(tmp_path / "store")
+    ingest_export(september, store_dir=store_dir, cache_dir=store_dir)
+    ingest_export(october, store_dir=store_dir, cache_dir=store_dir)
+
+    os.remove(cube_path(store_dir))
+    ingest_export(october, store_dir=store_dir, cache_dir=store_dir)
+    cube, store = load_cube(store_dir), load_daily_store(store_dir)
+    assert cube["Backup Day"].min() == pd.Timestamp("2024-09-30")
+    assert cube["Total_Jobs"].sum() == store["Total_Jobs"].sum()
@@ -0,0 +1,11 @@
+from bsr.features import FEATURE_COLUMNS, TARGET_COLUMN, future_features, training_frame
+from bsr.aggregate import daily_sla, jobs_for_account
+
+
+def test_training_frame_targets_the_next_day(jobs):
+    account_jobs = jobs_for_account(jobs, "Trane Technologies")
+    frame = training_frame(account_jobs)
+    assert len(frame) == 8
+    daily = daily_sla(account_jobs)
+    assert frame[TARGET_COLUMN].iloc[0] == daily["SLA"].iloc[1]
+    assert list(future_features(daily, 3)[FEATURE_COLUMNS].columns) == FEATURE_COLUMNS
@@ -0,0 +1,24 @@
+from bsr.aggregate import daily_sla, jobs_for_account
+from bsr.forecast import PERCENTILES, cumulative_sla, simulate_month_end
+
+
+def test_simulate_month_end(jobs):
+    daily = daily_sla(jobs_for_account(jobs, "Trane Technologies")).head(6)
+    forecast = simulate_month_end(daily, 11, target_sla=99.0, trials=2000)
+    percentiles = [forecast["percentiles"][p] for p in PERCENTILES]
+    assert percentiles == sorted(percentiles)
+    assert 0 <= forecast["probability"] <= 1
+    assert len(forecast["bands"]) == 11
+    # The same seed gives the same forecast
+    assert simulate_month_end(daily, 11, target_sla=99.0, trials=2000)["mean"] == forecast["mean"]
+    assert cumulative_sla(daily)["SLA"].iloc[-1] == daily["Success"].sum() / daily["Total_Jobs"].sum() * 100
+
+
+def test_simulate_month_end_without_days(jobs):
+    daily = daily_sla(jobs_for_account(jobs, "Trane Technologies"))
+    assert simulate_month_end(daily.iloc[:0], 5) is None
+    # Days of only in-progress jobs leave nothing to forecast from, with or without days remaining
+    in_progress = daily.head(2).assign(Success=0, Partial=0, Failure=0, Total_Jobs=0)
+    assert simulate_month_end(in_progress, 5) is None
+    assert simulate_month_end(in_progress, 0) is None
+    assert simulate_month_end(daily, 0)["trials"] == 0
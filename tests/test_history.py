@@ -0,0 +1,59 @@
+import pandas as pd
+import pytest
+
+import bsr.history
+from bsr.history import assign_regions, daily_history, load_monthly, monthly_sla, read_partitions, regional_sla
+from bsr.incremental import ingest_export
+
+
+def test_monthly_rollup_matches_daily_partitions(store_dir, jobs):
+    monthly = load_monthly(store_dir)
+    assert set(monthly["Customer"]) == {"Trane Technologies", "Ingersoll Rand Company"}
+    assert monthly_sla(monthly)["Total_Jobs"].iloc[-1] == regional_sla(monthly)["Total_Jobs"].sum()
+    daily = daily_history(store_dir, "Trane Technologies", "2024-10")
+    assert len(daily) == 8
+    october = monthly[(monthly["Customer"] == "Trane Technologies") & (monthly["Month"] == "2024-10")]
+    assert daily["Total_Jobs"].sum() == october["Total_Jobs"].sum()
+
+
+def test_assign_regions(jobs):
+    rules = [{"server": "^igr", "region": "EMEA"}, {"account": "Otis", "server": ".", "region": "APAC"}]
+    regions = assign_regions(jobs, rules)
+    assert set(regions.categories) <= {"EMEA", "Global"}
+    assert (regions[jobs["Server"].astype(str).str.startswith("igr").to_numpy()] == "EMEA").all()
+
+
+def test_changed_region_rules_repartition_stored_months(sample_export, tmp_path, monkeypatch):
+    store_dir = str(tmp_path)
+    ingest_export(sample_export, store_dir=store_dir, cache_dir=store_dir)
+    before = load_monthly(store_dir)
+
+    rules = [{"account": "Trane Technologies", "server": ".", "region": "EMEA"}]
+    monkeypatch.setattr(bsr.history, "load_region_rules", lambda: rules)
+    ingest_export(sample_export, store_dir=store_dir, cache_dir=store_dir)
+    after = load_monthly(store_dir)
+    assert set(after.loc[after["Customer"] == "Trane Technologies", "Region"]) == {"EMEA"}
+    assert after["Total_Jobs"].sum() == before["Total_Jobs"].sum()
+    assert set(read_partitions(store_dir, "Trane Technologies", "2024-10")["Region"]) == {"EMEA"}
+
+
+def test_interrupted_month_rewrite_keeps_the_published_month(sample_export, tmp_path, monkeypatch):
+    store_dir = str(tmp_path)
+    raw = pd.read_csv(sample_export, dtype=str, keep_default_na=False)
+    edited = str(tmp_path / "edited.csv")
+    ingest_export(sample_export, store_dir=store_dir, cache_dir=store_dir)
+    published = read_partitions(store_dir, "Trane Technologies", "2024-10")
+
+    raw.loc[(raw["Backup Day"] == "03-Oct-2024") & (raw["Status"] == "Success"), "Status"] = "Failure"
+    raw.to_csv(edited, index=False)
+    writes = []
+
+    def failing_write(df, path):
+        writes.append(path)
+        raise OSError("disk full")
+
+    monkeypatch.setattr(bsr.history, "_write", failing_write)
+    with pytest.raises(OSError):
+        ingest_export(edited, store_dir=store_dir, cache_dir=store_dir)
+    assert writes
+    pd.testing.assert_frame_equal(read_partitions(store_dir, "Trane Technologies", "2024-10"), published)
@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from bsr.hostnames import HostIndex, canonical_names, canonicalize_hosts
+
+
+@pytest.mark.parametrize("raw, canonical", [
+    ("IGRSCMNDC001.AD.CORP.GLOBAL", "igrscmndc001"),
+    ("igrscmndc001.ad.corp.global", "igrscmndc001"),
+    ("igrscmndc001", "igrscmndc001"),
+    ("  IgrScmNdc001  ", "igrscmndc001"),
+    ("Hpuxmgmt-bu01", "hpuxmgmt"),
+    ("hpuxmgmt-bu", "hpuxmgmt"),
+    ("HPUXMGMT-BU3.corp.irco.com", "hpuxmgmt"),
+    # Only a trailing backup-interface suffix is an alias
+    ("db-build01", "db-build01"),
+    ("bu01-host", "bu01-host"),
+    # IP addresses are kept whole rather than cut at the first dot
+    ("10.20.30.40", "10.20.30.40"),
+])
+def test_canonical_names(raw, canonical):
+    assert canonical_names([raw])[0] == canonical
+
+
+def test_canonicalize_keeps_missing_values_and_sorts_categories():
+    index = HostIndex()
+    values = pd.Series(["zeta.corp", "ALPHA", None, "alpha-bu1", "Zeta"])
+    canonical = index.canonicalize(values)
+    assert canonical.tolist()[:2] == ["zeta", "alpha"]
+    assert pd.isna(canonical[2])
+    assert canonical.tolist()[3:] == ["alpha", "zeta"]
+    assert list(canonical.cat.categories) == ["alpha", "zeta"]
+
+
+def test_canonicalize_all_missing_hosts():
+    canonical = HostIndex().canonicalize(pd.Series([None, np.nan], dtype=object, name="Client"))
+    assert canonical.isna().all() and len(canonical) == 2
+
+
+def test_host_index_persists_and_resolves_each_spelling_once(tmp_path):
+    path = str(tmp_path / "hosts.parquet")
+    index = HostIndex(path)
+    first = index.ids_for(["HostA.corp.com", "hosta", "hostb-bu1"])
+    assert first[0] == first[1] != first[2]
+    index.save()
+
+    reloaded = HostIndex(path)
+    assert reloaded.raw_to_id == index.raw_to_id
+    assert reloaded.canonical == index.canonical
+    # Known spellings keep their IDs, new aliases of a known host join it
+    np.testing.assert_array_equal(reloaded.ids_for(["hostb-bu1", "HOSTA-BU02"]), [first[2], first[0]])
+
+
+def test_canonicalize_hosts_merges_client_aliases(jobs):
+    raw = pd.DataFrame({"Server": ["SRV1.corp", "srv1"], "Client": ["Web01.AD.CORP.GLOBAL", "web01-bu1"]})
+    canonical = canonicalize_hosts(raw.copy(), HostIndex())
+    assert canonical["Server"].nunique() == canonical["Client"].nunique() == 1
+    # The sample export is already canonical after loading
+    assert (canonical_names(jobs["Client"].cat.categories) == jobs["Client"].cat.categories).all()
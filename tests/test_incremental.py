@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+import bsr.incremental
+from bsr.incremental import PARTITION_KEYS, account_daily, ingest_export, load_daily_store, month_to_date
+
+
+@pytest.fixture
+def raw_export(sample_export):
+    """The sample export as text, for writing edited copies"""
+    return pd.read_csv(sample_export, dtype=str, keep_default_na=False)
+
+
+def test_ingest_is_idempotent(sample_export, store_dir, monkeypatch):
+    # An export already merged is recognized by its file hash, without loading or hashing its jobs
+    monkeypatch.setattr(bsr.incremental, "load_jobs", lambda *args, **kwargs: pytest.fail("export reloaded"))
+    store, stats = ingest_export(sample_export, store_dir=store_dir, cache_dir=store_dir)
+    assert stats["unchanged"] and stats["partitions_updated"] == 0
+    pd.testing.assert_frame_equal(store, load_daily_store(store_dir))
+
+
+def test_one_day_edit_updates_only_that_partition(raw_export, tmp_path):
+    store_dir = str(tmp_path / "store")
+    original, edited = str(tmp_path / "original.csv"), str(tmp_path / "edited.csv")
+    raw_export.to_csv(original, index=False)
+    changed_row = raw_export.index[(raw_export["Backup Day"] == "03-Oct-2024")
+                                   & (raw_export["Status"] == "Success")][0]
+    raw_export.loc[changed_row, "Status"] = "Failure"
+    raw_export.to_csv(edited, index=False)
+
+    ingest_export(original, store_dir=store_dir, cache_dir=store_dir)
+    store, stats = ingest_export(edited, store_dir=store_dir, cache_dir=store_dir)
+    assert stats["partitions_updated"] == 1
+    partition = (raw_export["Backup Day"] == "03-Oct-2024") & (
+        raw_export["Customer"] == raw_export.loc[changed_row, "Customer"])
+    assert stats["rows_aggregated"] == partition.sum()
+
+    # The merged store equals a store built from the edited export alone
+    fresh, _ = ingest_export(edited, store_dir=str(tmp_path / "fresh"), cache_dir=str(tmp_path / "fresh"))
+    pd.testing.assert_frame_equal(store.sort_values(PARTITION_KEYS, ignore_index=True),
+                                  fresh.sort_values(PARTITION_KEYS, ignore_index=True), check_dtype=False)
+
+
+def test_days_missing_from_a_later_export_are_kept(raw_export, tmp_path):
+    store_dir = str(tmp_path / "store")
+    full, partial = str(tmp_path / "full.csv"), str(tmp_path / "partial.csv")
+    raw_export.to_csv(full, index=False)
+    raw_export[raw_export["Backup Day"] != "08-Oct-2024"].to_csv(partial, index=False)
+
+    first, _ = ingest_export(full, store_dir=store_dir, cache_dir=store_dir)
+    store, stats = ingest_export(partial, store_dir=store_dir, cache_dir=store_dir)
+    assert stats["partitions_updated"] == 0
+    assert len(store) == len(first)
+
+
+def test_month_to_date(store_dir, jobs):
+    summary = month_to_date(load_daily_store(store_dir), "Trane Technologies")
+    assert summary["days_processed"] == 8
+    october = jobs[(jobs["Customer"] == "Trane Technologies") & (jobs["Backup Day"] >= "2024-10-01")]
+    assert summary["total_jobs"] == october["Status"].isin(["Success", "Partial", "Failure"]).sum()
+
+
+def test_days_without_finished_jobs_are_left_out(store_dir):
+    store = load_daily_store(store_dir)
+    progress_only = store.iloc[[-1]].assign(**{"Backup Day": store["Backup Day"].max() + pd.Timedelta(days=1)})
+    progress_only[["Success", "Partial", "Failure", "Total_Jobs"]] = 0
+    account = progress_only["Customer"].iloc[0]
+    store = pd.concat([store, progress_only], ignore_index=True)
+
+    daily = account_daily(store, account)
+    assert (daily["Total_Jobs"] > 0).all() and daily["SLA"].notna().all()
+    assert month_to_date(store, account)["days_processed"] == month_to_date(store.iloc[:-1], account)["days_processed"]
@@ -0,0 +1,19 @@
+import os
+
+import pandas as pd
+
+from bsr.ingest import CATEGORY_COLUMNS, cache_path_for, load_jobs, source_fingerprint
+
+
+def test_load_jobs_types_columns(jobs):
+    assert len(jobs) == 8079
+    assert pd.api.types.is_datetime64_any_dtype(jobs["Start Date"])
+    assert pd.api.types.is_datetime64_any_dtype(jobs["Backup Day"])
+    for column in CATEGORY_COLUMNS:
+        assert isinstance(jobs[column].dtype, pd.CategoricalDtype), column
+
+
+def test_load_jobs_serves_the_columnar_cache(sample_export, tmp_path):
+    first = load_jobs(sample_export, cache_dir=str(tmp_path))
+    assert os.path.exists(cache_path_for(source_fingerprint(sample_export, str(tmp_path)), str(tmp_path)))
+    pd.testing.assert_frame_equal(load_jobs(sample_export, cache_dir=str(tmp_path)), first)
@@ -0,0 +1,24 @@
+import contextvars
+
+from bsr.profiling import activate, prometheus_text, stage
+
+
+def test_stages_nest_and_render():
+    def run():
+        profiler = activate()
+        with stage("outer", rows=3):
+            with stage("inner"):
+                pass
+        return profiler.table()
+
+    # A copied context keeps the activated profiler out of the other tests
+    timings = contextvars.copy_context().run(run)
+    assert timings["stage"].tolist() == ["outer", "inner"]
+    assert timings["depth"].tolist() == [0, 1]
+    text = prometheus_text(timings, {"account": "A"})
+    assert 'bsr_stage_seconds{account="A",stage="inner"}' in text
+
+
+def test_stage_without_profiler_is_a_no_op():
+    with stage("nothing", rows=1) as record:
+        assert record["rows"] == 1
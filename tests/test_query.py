@@ -0,0 +1,65 @@
+import duckdb
+import pytest
+
+from bsr.query import connect, distinct_values, like_pattern, query_jobs, read_account_jobs, run_sql
+
+
+def test_query_jobs_filters(store_dir, jobs):
+    failed = query_jobs(start="2024-10-05", end="2024-10-06", statuses=["Failure"], client_pattern="HPUX*",
+                        store_dir=store_dir)
+    assert len(failed) and (failed["Status"] == "Failure").all()
+    assert failed["Client"].str.startswith("hpux").all()
+    assert failed["Backup Day"].between("2024-10-05", "2024-10-06").all()
+
+
+def test_run_sql_and_distinct_values(store_dir, jobs):
+    counts = run_sql("SELECT count(*) AS jobs FROM jobs", store_dir=store_dir)
+    assert counts["jobs"].iloc[0] == len(jobs)
+    assert distinct_values("Status", store_dir=store_dir) == sorted(jobs["Status"].unique())
+
+
+def test_job_store_keeps_missing_values_missing(store_dir, jobs):
+    counts = run_sql("SELECT count(*) FILTER (WHERE Policy IS NULL) AS missing, "
+                     "count(*) FILTER (WHERE Policy = 'nan') AS text FROM jobs", store_dir=store_dir)
+    assert counts["missing"].iloc[0] == jobs["Policy"].isna().sum() > 0
+    assert counts["text"].iloc[0] == 0
+
+
+def test_read_account_jobs_reads_one_accounts_days(store_dir, jobs):
+    october = read_account_jobs("Trane Technologies", "2024-10-01", store_dir=store_dir)
+    expected = jobs[(jobs["Customer"] == "Trane Technologies") & (jobs["Backup Day"] >= "2024-10-01")]
+    assert len(october) == len(expected)
+    assert set(october["Customer"]) == {"Trane Technologies"}
+    assert read_account_jobs("No Such Account", store_dir=store_dir) is None
+
+
+def test_like_pattern():
+    assert like_pattern("igr*_0?") == "igr%\\_0_"
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT 1; COPY (SELECT 1) TO 'escaped.csv'",
+    "COPY (SELECT * FROM jobs) TO 'escaped.csv'",
+    "DELETE FROM jobs",
+])
+def test_run_sql_rejects_anything_but_one_select(store_dir, sql):
+    with pytest.raises(ValueError):
+        run_sql(sql, store_dir=store_dir)
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT * FROM read_text('/etc/hostname')",
+    "SELECT * FROM read_csv('BUR SLA REPORT_Oct24.csv')",
+])
+def test_run_sql_cannot_read_outside_the_job_store(store_dir, sql):
+    with pytest.raises(duckdb.PermissionException):
+        run_sql(sql, store_dir=store_dir)
+
+
+def test_connection_settings_are_locked(store_dir):
+    connection = connect(store_dir)
+    try:
+        with pytest.raises(duckdb.Error):
+            connection.execute("SET enable_external_access = true")
+    finally:
+        connection.close()
@@ -0,0 +1,36 @@
+import pandas as pd
+import pytest
+
+from bsr.aggregate import calculate_required_sla, summarize_jobs, worst_clients
+from bsr.results import build_results, latest_results_file, read_results, results_filename, write_results
+
+
+def test_results_round_trip(jobs, tmp_path):
+    summary = summarize_jobs(jobs[jobs["Customer"] == "Trane Technologies"])
+    required = calculate_required_sla(summary["current_sla"], 99.0, summary["days_processed"],
+                                      summary["days_remaining"])
+    results = build_results("Trane Technologies", pd.Timestamp("2024-10-31"), summary, 97.5, required, 99.0, None,
+                            worst_clients(summary["client_data"], 5))
+    path = write_results(results, str(tmp_path / results_filename("Trane Technologies", pd.Timestamp("2024-10-31"))))
+    assert latest_results_file("Trane Technologies", str(tmp_path)) == path
+    record = read_results(path)
+    assert record["metrics"] == results["metrics"]
+    pd.testing.assert_frame_equal(record["hosts"], results["hosts"])
+
+
+@pytest.mark.parametrize("path", [
+    "SLA_Prediction_Results_20241009.csv", "Customer_SLA_Prediction_Results_20241013(1).csv"
+])
+def test_read_legacy_results(path):
+    record = read_results(path)
+    assert record["metrics"]["current_sla"] is not None
+    assert list(record["hosts"].columns) == ["Client", "SLA", "Total_Jobs", "Success_Rate"]
+
+
+def test_latest_results_file_ignores_accounts_sharing_a_prefix(tmp_path):
+    for name in ["SLA_Prediction_Results_cibc_20241001.parquet", "SLA_Prediction_Results_cibc_20241013.parquet",
+                 "SLA_Prediction_Results_cibc_wealth_20241031.parquet"]:
+        (tmp_path / name).touch()
+    assert latest_results_file("CIBC", str(tmp_path)).endswith("SLA_Prediction_Results_cibc_20241013.parquet")
+    assert latest_results_file("CIBC Wealth", str(tmp_path)).endswith("cibc_wealth_20241031.parquet")
+    assert latest_results_file("Otis", str(tmp_path)) is None
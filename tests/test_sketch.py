@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from bsr.aggregate import MISSING_LABEL
+from bsr.incremental import ingest_export
+from bsr.sketch import (
+    RELATIVE_ACCURACY, SKETCH_KEYS, build_sketches, load_sketches, sketch_path, sketch_quantiles
+)
+
+
+def test_sketch_quantiles_are_within_relative_accuracy(jobs):
+    values = jobs["KB/Sec"].dropna()
+    values = values[values > 0].to_numpy()
+    sketches = build_sketches(pd.DataFrame({"Customer": "a", "Backup Day": pd.Timestamp("2024-10-01"),
+                                            "Server": "s", "Product": "p", "Policy": "q", "KB/Sec": values}),
+                              metrics=["KB/Sec"])
+    table = sketch_quantiles(sketches, quantiles=(0.5, 0.99))
+    for column, q in [("P50", 0.5), ("P99", 0.99)]:
+        exact = np.sort(values)[int(np.floor(q * (len(values) - 1)))]
+        assert abs(table[column].iloc[0] - exact) <= RELATIVE_ACCURACY * exact * 1.0001
+
+
+def test_stored_sketches_merge_by_any_grouping(store_dir):
+    sketches = load_sketches(store_dir)
+    by_server = sketch_quantiles(sketches, ["Server"])
+    overall = sketch_quantiles(sketches)
+    size = by_server["Metric"] == "Size"
+    assert by_server[size]["Count"].sum() == overall.set_index("Metric").loc["Size", "Count"]
+
+
+def test_sketch_counts_match_job_counts(store_dir, jobs):
+    sketches = load_sketches(store_dir)
+    counts = sketches.groupby("Metric")["Count"].sum()
+    for metric in ["KB/Sec", "Size"]:
+        assert counts[metric] == jobs[metric].notna().sum()
+    # The sample's jobs without a policy still have sizes
+    missing = sketches[(sketches["Policy"] == MISSING_LABEL) & (sketches["Metric"] == "Size")]
+    assert missing["Count"].sum() == jobs.loc[jobs["Policy"].isna(), "Size"].notna().sum() > 0
+
+
+def test_missing_sketches_are_rebuilt_from_every_stored_day(sample_export, tmp_path):
+    raw = pd.read_csv(sample_export, dtype=str, keep_default_na=False)
+    september, october = str(tmp_path / "september.csv"), str(tmp_path / "october.csv")
+    raw[raw["Backup Day"].str.endswith("Sep-2024")].to_csv(september, index=False)
+    raw[raw["Backup Day"].str.endswith("Oct-2024")].to_csv(october, index=False)
+    store_dir = str(tmp_path / "store")
+    ingest_export(september, store_dir=store_dir, cache_dir=store_dir)
+    ingest_export(october, store_dir=store_dir, cache_dir=store_dir)
+    before = load_sketches(store_dir)
+
+    os.remove(sketch_path(store_dir))
+    ingest_export(october, store_dir=store_dir, cache_dir=store_dir)
+    after = load_sketches(store_dir)
+    assert after["Backup Day"].min() == pd.Timestamp("2024-09-30")
+    keys = SKETCH_KEYS + ["Metric", "Bin"]
+    pd.testing.assert_frame_equal(after.sort_values(keys, ignore_index=True),
+                                  before.sort_values(keys, ignore_index=True), check_dtype=False)
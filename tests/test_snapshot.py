@@ -0,0 +1,100 @@
+import os
+import threading
+import time
+
+import pandas as pd
+
+import bsr.snapshot
+from bsr.incremental import ingest_export, ingested_exports, load_daily_store, store_lock
+from bsr.ingest import source_fingerprint
+from bsr.snapshot import (
+    SNAPSHOT_FORMAT, latest_snapshot_version, pending_exports, publish_snapshot, read_latest_snapshot, refresh,
+    refresh_account
+)
+
+
+def test_refresh_publishes_only_on_change(sample_export, tmp_path):
+    snapshot_dir = str(tmp_path)
+    version = refresh_account("Trane Technologies", sample_export, snapshot_dir=snapshot_dir)
+    assert latest_snapshot_version("Trane Technologies", snapshot_dir) == version
+    assert refresh_account("Trane Technologies", sample_export, snapshot_dir=snapshot_dir) is None
+
+    metadata, account_data = read_latest_snapshot("Trane Technologies", snapshot_dir)
+    assert metadata["version"] == version
+    assert metadata["raw_export"] == sample_export
+    assert account_data["days_processed"] == 8
+
+
+def test_refresh_reports_every_account(tmp_path):
+    published = refresh(["Otis", "No Such Account"], snapshot_dir=str(tmp_path))
+    assert list(published) == ["Otis"]
+    assert read_latest_snapshot("No Such Account", str(tmp_path)) is None
+
+
+def test_snapshot_carries_the_views_requests_need(sample_export, tmp_path):
+    refresh_account("Trane Technologies", sample_export, snapshot_dir=str(tmp_path))
+    _, account_data = read_latest_snapshot("Trane Technologies", str(tmp_path))
+    assert account_data["capacity"]["jobs"] > 0
+    assert set(account_data["cube"]["Customer"]) == {"Trane Technologies"}
+    assert set(account_data["sketches"]["Customer"]) == {"Trane Technologies"}
+    assert account_data["job_memory"].loc["Total", "bytes"] > 0
+
+
+def test_concurrent_refreshes_build_once(sample_export, tmp_path, monkeypatch):
+    builds = []
+
+    def slow_build(*args):
+        builds.append(args)
+        time.sleep(0.2)
+        return {"days_processed": 8}
+
+    monkeypatch.setattr(bsr.snapshot, "read_account_data", slow_build)
+    threads = [threading.Thread(target=refresh_account, args=("Trane Technologies", sample_export),
+                                kwargs={"snapshot_dir": str(tmp_path)}) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(builds) == 1
+    assert read_latest_snapshot("Trane Technologies", str(tmp_path))[1] == {"days_processed": 8}
+
+
+def test_versions_sort_in_publication_order(tmp_path, monkeypatch):
+    monkeypatch.setattr(time, "time_ns", lambda: 1_700_000_000_000_000_000)
+    versions = [publish_snapshot("Otis", {}, {}, str(tmp_path)) for _ in range(4)]
+    assert sorted(versions) == versions and len(set(versions)) == 4
+    assert latest_snapshot_version("Otis", str(tmp_path)) == versions[-1]
+
+
+def test_older_snapshot_formats_are_rebuilt(sample_export, tmp_path):
+    publish_snapshot("Trane Technologies", {}, {"format": SNAPSHOT_FORMAT - 1}, str(tmp_path))
+    assert read_latest_snapshot("Trane Technologies", str(tmp_path)) is None
+    assert refresh_account("Trane Technologies", sample_export, snapshot_dir=str(tmp_path)) is not None
+    assert read_latest_snapshot("Trane Technologies", str(tmp_path))[0]["format"] == SNAPSHOT_FORMAT
+
+
+def test_every_new_export_is_ingested_oldest_first(sample_export, tmp_path):
+    raw = pd.read_csv(sample_export, dtype=str, keep_default_na=False)
+    drop_dir = tmp_path / "drop"
+    drop_dir.mkdir()
+    september, october = str(drop_dir / "BUR SLA REPORT_Sep24.csv"), str(drop_dir / "BUR SLA REPORT_Oct24.csv")
+    raw[raw["Backup Day"].str.endswith("Sep-2024")].to_csv(september, index=False)
+    raw[raw["Backup Day"].str.endswith("Oct-2024")].to_csv(october, index=False)
+    os.utime(september, (1_700_000_000, 1_700_000_000))
+    assert pending_exports(str(drop_dir)) == [september, october]
+
+    refresh(["No Such Account"], drop_dir=str(drop_dir), snapshot_dir=str(tmp_path / "snapshots"))
+    assert pending_exports(str(drop_dir)) == []
+    assert {source_fingerprint(september), source_fingerprint(october)} <= set(ingested_exports())
+
+
+def test_ingests_wait_for_the_store_lock(sample_export, tmp_path):
+    store_dir = str(tmp_path)
+    ingest = threading.Thread(target=ingest_export, args=(sample_export,),
+                              kwargs={"store_dir": store_dir, "cache_dir": store_dir})
+    with store_lock(store_dir):
+        ingest.start()
+        ingest.join(0.5)
+        assert ingest.is_alive()
+    ingest.join()
+    assert len(load_daily_store(store_dir))
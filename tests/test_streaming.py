@@ -0,0 +1,54 @@
+import sys
+
+import pandas as pd
+import pytest
+
+from bsr import streaming
+from bsr.aggregate import client_sla, daily_sla, jobs_for_account
+from bsr.streaming import DAILY_KEYS, account_client_sla, account_daily_sla, stream_aggregates
+
+ACCOUNTS = ["Trane Technologies", "Ingersoll Rand Company"]
+
+
+def plain(table, label):
+    table = table.copy()
+    table[label] = table[label].astype(str) if label == "Client" else table[label]
+    return table.reset_index(drop=True)
+
+
+# The sample's days are interleaved, so chunks smaller than the file split every day's jobs across chunks
+@pytest.mark.parametrize("chunksize", [997, 2500, 100_000])
+def test_streaming_matches_the_in_memory_path(sample_export, jobs, tmp_path, chunksize):
+    streamed = stream_aggregates(sample_export, chunksize=chunksize, cache_dir=str(tmp_path))
+    assert streamed["rows"] == len(jobs)
+    for account in ACCOUNTS:
+        account_jobs = jobs_for_account(jobs, account)
+        pd.testing.assert_frame_equal(plain(account_daily_sla(streamed, account), "Backup Date"),
+                                      plain(daily_sla(account_jobs), "Backup Date"), check_dtype=False)
+        pd.testing.assert_frame_equal(plain(account_client_sla(streamed, account), "Client"),
+                                      plain(client_sla(account_jobs), "Client"), check_dtype=False)
+
+    # Running size and throughput sums equal one pass over every job
+    grouped = jobs.groupby(DAILY_KEYS, observed=True)
+    expected = pd.DataFrame({"Size_Sum": grouped["Size"].sum(), "KB/Sec_Sum": grouped["KB/Sec"].sum(),
+                             "KB/Sec_Count": grouped["KB/Sec"].count()})
+    sums = streamed["daily"][expected.columns]
+    sums.index = sums.index.set_levels(sums.index.levels[0].astype(str), level=0)
+    expected.index = expected.index.set_levels(expected.index.levels[0].astype(str), level=0)
+    pd.testing.assert_frame_equal(sums.sort_index(), expected.sort_index(), check_dtype=False, check_names=False)
+
+
+def test_stream_aggregates_reports_throughput(sample_export, tmp_path):
+    streamed = stream_aggregates(sample_export, chunksize=2000, cache_dir=str(tmp_path))
+    assert streamed["rows_per_sec"] > 0
+    if sys.platform != "win32":
+        assert 1 < streamed["peak_rss_mb"] < 100_000
+
+
+def test_peak_rss_units(monkeypatch):
+    resource = pytest.importorskip("resource")
+    monkeypatch.setattr(resource, "getrusage", lambda who: type("Usage", (), {"ru_maxrss": 512 * 1024 ** 2})())
+    monkeypatch.setattr(sys, "platform", "darwin")
+    assert streaming.peak_rss_mb() == 512
+    monkeypatch.setattr(sys, "platform", "linux")
+    assert streaming.peak_rss_mb() == 512 * 1024
@@ -0,0 +1,38 @@
+import pandas as pd
+
+from bsr.capacity import schedule_hour
+from bsr.ingest import read_bur_export
+from bsr.synthetic import EXPORT_COLUMNS, generate_export
+
+
+def test_generated_export_parses_like_a_real_one(tmp_path):
+    path = str(tmp_path / "synthetic.csv")
+    generate_export(path, rows=5000, hosts=200, policies=10, seed=3, chunk_rows=2000, max_workers=2)
+    jobs = read_bur_export(path)
+    assert list(jobs.columns) == EXPORT_COLUMNS
+    assert len(jobs) == 5000
+    assert jobs["Job ID"].is_unique
+    assert set(jobs["Status"].cat.categories) <= {"Success", "Partial", "Failure", "Progress"}
+    assert pd.api.types.is_datetime64_any_dtype(jobs["Start Date"])
+
+
+def test_generation_is_deterministic(tmp_path):
+    paths = [str(tmp_path / f"{workers}.csv") for workers in (1, 2)]
+    for path, workers in zip(paths, (1, 2)):
+        generate_export(path, rows=3000, hosts=100, seed=5, chunk_rows=1000, max_workers=workers)
+    with open(paths[0], "rb") as a, open(paths[1], "rb") as b:
+        assert a.read() == b.read()
+
+
+def test_generated_policies_carry_schedule_times(tmp_path):
+    path = str(tmp_path / "synthetic.csv")
+    generate_export(path, rows=4000, hosts=200, policies=40, seed=7, chunk_rows=1000, max_workers=2, window=1)
+    jobs = read_bur_export(path)
+    hours = pd.Series([schedule_hour(policy) for policy in jobs["Policy"].cat.categories])
+    assert hours.notna().mean() > 0.5
+    assert hours.dropna().between(18, 22).all()
+    # Timed hosts start within half an hour of their policy's schedule
+    timed = jobs["Policy"].map(dict(zip(jobs["Policy"].cat.categories, hours))).astype(float).notna()
+    start_hour = jobs.loc[timed, "Start Date"].dt.hour + jobs.loc[timed, "Start Date"].dt.minute / 60
+    scheduled = jobs.loc[timed, "Policy"].map(schedule_hour).astype(float)
+    assert ((start_hour - scheduled) % 24).lt(0.5).all()
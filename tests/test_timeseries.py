@@ -0,0 +1,12 @@
+from bsr.timeseries import downsample, hourly_series, job_series
+
+
+def test_job_series_and_downsampling(jobs):
+    series = job_series(jobs)
+    assert series["Start Date"].is_monotonic_increasing
+    assert hourly_series(series)["Jobs"].sum() == len(series)
+    assert len(downsample(series, "Start Date", "KB/Sec", max_points=500)) <= 500
+    # Min-max bucketing keeps every spike
+    spikes = downsample(series, "Start Date", "KB/Sec", max_points=500, method="minmax")
+    assert len(spikes) <= 500
+    assert spikes["KB/Sec"].max() == series["KB/Sec"].max()
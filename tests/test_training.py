@@ -0,0 +1,33 @@
+import json
+import os
+import time
+
+from bsr.aggregate import daily_sla, jobs_for_account
+from bsr.predict import account_model_dir, latest_version, load_metadata, predict_account
+from bsr.training import save_artifacts, train_account
+
+
+def test_train_save_and_predict(jobs, tmp_path):
+    model_dir = str(tmp_path)
+    model, scaler, metadata = train_account(jobs, "Trane Technologies", params={"n_estimators": 20})
+    version = save_artifacts("Trane Technologies", model, scaler, metadata, model_dir)
+    assert latest_version("Trane Technologies", model_dir) == version
+    assert load_metadata("Trane Technologies", model_dir=model_dir)["training_days"] == 8
+    with open(os.path.join(account_model_dir("Trane Technologies", model_dir), version, "metadata.json")) as f:
+        assert json.load(f)["version"] == version
+
+    daily = daily_sla(jobs_for_account(jobs, "Trane Technologies")).head(6)
+    predicted = predict_account("Trane Technologies", daily, 11, model_dir)
+    assert 0 <= predicted <= 100
+    assert predict_account("Otis", daily, 11, model_dir) is None
+
+
+def test_versions_saved_in_the_same_instant_never_collide(jobs, tmp_path, monkeypatch):
+    model, scaler, metadata = train_account(jobs, "Trane Technologies", params={"n_estimators": 5})
+    monkeypatch.setattr(time, "time_ns", lambda: 1_730_000_000_123_456_789)
+    versions = [save_artifacts("Trane Technologies", model, scaler, metadata, str(tmp_path)) for _ in range(3)]
+    assert len(set(versions)) == 3
+    assert latest_version("Trane Technologies", str(tmp_path)) == versions[-1]
+    for version in versions:
+        with open(os.path.join(account_model_dir("Trane Technologies", str(tmp_path)), version, "metadata.json")) as f:
+            assert json.load(f)["version"] == version
@@ -0,0 +1,44 @@
+import multiprocessing
+import time
+
+import numpy as np
+
+from bsr.aggregate import jobs_for_account
+from bsr.features import FEATURE_COLUMNS, training_frame
+from bsr.tuning import PARAM_GRID, build_folds, evaluate_params, grid_candidates, successive_halving
+
+
+def test_successive_halving_finds_a_candidate(jobs):
+    folds = build_folds(training_frame(jobs_for_account(jobs, "Trane Technologies")), n_folds=3)
+    candidates = grid_candidates({"colsample_bytree": [1.0], "learning_rate": [0.1, 0.3], "max_depth": [3],
+                                  "n_estimators": [20], "subsample": [1.0]})
+    best, trials = successive_halving(folds, candidates, budget_seconds=60, max_workers=2)
+    assert best["params"] in candidates
+    assert min(trial["cv_mae"] for trial in trials if trial["round"] == best["round"]) == best["cv_mae"]
+    # Halving two candidates leaves one, which is not trained again
+    assert {trial["round"] for trial in trials} == {0} and len(trials) == len(candidates)
+
+
+def test_search_returns_within_a_tiny_budget():
+    # Folds large enough that one full-size trial takes far longer than the budget
+    rng = np.random.default_rng(0)
+    X, y = rng.random((20_000, len(FEATURE_COLUMNS))), rng.random(20_000) * 100
+    folds = [(X[:15_000], y[:15_000], X[15_000:], y[15_000:])] * 3
+    candidates = grid_candidates(dict(PARAM_GRID, n_estimators=[2000]))
+    started = time.monotonic()
+    best, trials = successive_halving(folds, candidates, budget_seconds=1.0, max_workers=2)
+    elapsed = time.monotonic() - started
+    assert elapsed < 2.5
+    # Only trials that finished inside the budget are recorded
+    assert len(trials) < len(candidates)
+    assert best is None or best["params"] in candidates
+    # Trials running at the deadline stop themselves, so no worker outlives the search
+    assert not multiprocessing.active_children()
+
+
+def test_trial_past_its_deadline_has_no_score():
+    rng = np.random.default_rng(0)
+    X, y = rng.random((200, len(FEATURE_COLUMNS))), rng.random(200)
+    folds = [(X[:150], y[:150], X[150:], y[150:])]
+    score, _ = evaluate_params(grid_candidates()[0], 10, folds, deadline=time.monotonic())
+    assert score is None
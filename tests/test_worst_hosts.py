@@ -0,0 +1,20 @@
+import pandas as pd
+import pytest
+
+from bsr.aggregate import client_sla, current_month_jobs, worst_clients
+
+
+@pytest.mark.parametrize("count", [0, 1, 5, 20, 10_000])
+@pytest.mark.parametrize("min_jobs", [1, 5, 50])
+def test_worst_clients_match_a_full_sort(jobs, count, min_jobs):
+    client_data = client_sla(current_month_jobs(jobs))
+    eligible = client_data[client_data["Total_Jobs"] >= min_jobs]
+    expected = eligible.sort_values(["SLA", "Total_Jobs"], ascending=[True, False], kind="stable").head(count)
+    pd.testing.assert_frame_equal(worst_clients(client_data, count, min_jobs), expected.reset_index(drop=True))
+
+
+def test_worst_clients_break_sla_ties_by_volume():
+    client_data = pd.DataFrame({"Client": ["a", "b", "c", "d"], "SLA": [50.0, 0.0, 50.0, 100.0],
+                                "Total_Jobs": [2, 1, 9, 4]})
+    assert worst_clients(client_data, 3)["Client"].tolist() == ["b", "c", "a"]
+    assert worst_clients(client_data, 3, min_jobs=2)["Client"].tolist() == ["c", "a", "d"]